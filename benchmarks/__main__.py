@@ -0,0 +1,228 @@
+"""
+Launch validation benchmarks against the local fake platform.
+
+    python -m benchmarks --iterations 200 --output results.json
+    python -m benchmarks --compare results.json --threshold 0.2
+"""
+
+import argparse
+import copy
+import functools
+import operator
+import shutil
+import sys
+import tempfile
+import typing as t
+from urllib.parse import parse_qs, urlparse
+
+from pylti1p3.access_token_store import AccessTokenStore, MemoryAccessTokenStore
+from pylti1p3.assignments_grades import AssignmentsGradesService
+from pylti1p3.launch_data_storage.mmap_file import MmapFileDataStorage
+from pylti1p3.names_roles import NamesRolesProvisioningService
+from pylti1p3.service_connector import ServiceConnector
+from pylti1p3.tool_config import ToolConfDict
+
+from .fake_platform import FakePlatform
+from .runner import (
+    TBenchmarkResult,
+    compare_reports,
+    format_results,
+    get_report,
+    load_report,
+    measure,
+    save_report,
+)
+from .tool import BenchMessageLaunch, BenchOIDCLogin, BenchRequest
+
+LAUNCH_STAGES = [
+    "validate_state",
+    "validate_jwt_format",
+    "validate_nonce",
+    "validate_registration",
+    "validate_jwt_signature",
+    "validate_deployment",
+    "validate_message",
+    "save_launch_data",
+]
+
+
+class LaunchBenchmarks:
+    # pylint: disable=too-many-instance-attributes
+    target_link_uri = "https://tool.bench.test/launch/"
+
+    def __init__(self, platform: FakePlatform, iterations: int) -> None:
+        self.platform = platform
+        self.iterations = iterations
+        self.tool_conf = ToolConfDict(platform.get_tool_config())
+        self.tool_conf.set_private_key(
+            platform.issuer,
+            platform.get_tool_private_key(),
+            client_id=platform.client_id,
+        )
+        self.login_params = {
+            "iss": platform.issuer,
+            "client_id": platform.client_id,
+            "login_hint": "bench-user",
+            "target_link_uri": self.target_link_uri,
+        }
+        # single OIDC login: its session and cookies are copied to every launch
+        login_request = BenchRequest(dict(self.login_params))
+        redirect_url = (
+            BenchOIDCLogin(login_request, self.tool_conf)
+            .get_redirect_object(self.target_link_uri)
+            .get_redirect_url()
+        )
+        query = parse_qs(urlparse(redirect_url).query)
+        self.state = query["state"][0]
+        self.id_token = platform.make_id_token(query["nonce"][0])
+        self.login_session = login_request.session
+        self.login_cookies = login_request.cookies
+        self.storage_path = tempfile.mkdtemp()
+
+    def close(self) -> None:
+        shutil.rmtree(self.storage_path, ignore_errors=True)
+
+    def _measure(
+        self,
+        name: str,
+        fn: t.Callable[[t.Any], t.Any],
+        setup: t.Optional[t.Callable[[], t.Any]] = None,
+    ) -> TBenchmarkResult:
+        return measure(name, fn, setup, iterations=self.iterations)
+
+    def _get_launch_request(self) -> BenchRequest:
+        return BenchRequest(
+            {"state": self.state, "id_token": self.id_token},
+            cookies=dict(self.login_cookies),
+            session=copy.deepcopy(self.login_session),
+        )
+
+    def _get_launch(self, shared_jwks_cache: bool = False) -> BenchMessageLaunch:
+        launch = BenchMessageLaunch(self._get_launch_request(), self.tool_conf)
+        if shared_jwks_cache:
+            launch.set_public_key_caching(
+                MmapFileDataStorage(self.storage_path), cache_lifetime=3600
+            )
+        return launch
+
+    def _get_launch_before_stage(self, stage: str) -> BenchMessageLaunch:
+        launch = self._get_launch()
+        # otherwise the first access to the JWT body runs the whole validation
+        launch.set_auto_validation(enable=False)
+        for prev_stage in LAUNCH_STAGES[: LAUNCH_STAGES.index(stage)]:
+            getattr(launch, prev_stage)()
+        return launch
+
+    def _get_service_connector(
+        self, access_token_store: t.Optional[AccessTokenStore] = None
+    ) -> ServiceConnector:
+        registration = self.tool_conf.find_registrations()[0]
+        return ServiceConnector(registration, access_token_store=access_token_store)
+
+    def run(self) -> t.List[TBenchmarkResult]:
+        results = [
+            self._measure(
+                "oidc_login",
+                lambda request: BenchOIDCLogin(request, self.tool_conf)
+                .get_redirect_object(self.target_link_uri)
+                .get_redirect_url(),
+                lambda: BenchRequest(dict(self.login_params)),
+            )
+        ]
+        for stage in LAUNCH_STAGES:
+            results.append(
+                self._measure(
+                    "launch." + stage,
+                    operator.methodcaller(stage),
+                    functools.partial(self._get_launch_before_stage, stage),
+                )
+            )
+        results.append(
+            self._measure(
+                "launch.validate", lambda launch: launch.validate(), self._get_launch
+            )
+        )
+        results.append(
+            self._measure(
+                "launch.validate_shared_jwks_cache",
+                lambda launch: launch.validate(),
+                lambda: self._get_launch(shared_jwks_cache=True),
+            )
+        )
+
+        launch_request = self._get_launch_request()
+        launch = BenchMessageLaunch(launch_request, self.tool_conf).validate()
+        results.append(
+            self._measure(
+                "launch.from_cache",
+                lambda request: BenchMessageLaunch.from_cache(
+                    launch.get_launch_id(), request, self.tool_conf
+                ),
+                lambda: launch_request,
+            )
+        )
+
+        results.append(
+            self._measure(
+                "service.access_token",
+                lambda connector: connector.get_access_token(
+                    ["https://purl.imsglobal.org/spec/lti-ags/scope/score"]
+                ),
+                # empty store on every iteration, otherwise only the first one exchanges the token
+                lambda: self._get_service_connector(MemoryAccessTokenStore()),
+            )
+        )
+        connector = self._get_service_connector()
+        jwt_body = launch.get_launch_data()
+        nrps = NamesRolesProvisioningService(
+            connector,
+            jwt_body["https://purl.imsglobal.org/spec/lti-nrps/claim/namesroleservice"],
+        )
+        results.append(
+            self._measure("service.nrps_get_members", lambda _: nrps.get_members())
+        )
+        ags = AssignmentsGradesService(
+            connector,
+            jwt_body["https://purl.imsglobal.org/spec/lti-ags/claim/endpoint"],
+        )
+        results.append(
+            self._measure("service.ags_get_grades", lambda _: ags.get_grades())
+        )
+        return results
+
+
+def main(argv: t.Optional[t.Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="PyLTI1p3 launch benchmarks")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--output", help="save results to the JSON file")
+    parser.add_argument("--compare", help="JSON file with the baseline results")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="max allowed p50 slowdown compared with the baseline (0.2 = 20%%)",
+    )
+    args = parser.parse_args(argv)
+
+    with FakePlatform() as platform:
+        benchmarks = LaunchBenchmarks(platform, args.iterations)
+        try:
+            results = benchmarks.run()
+        finally:
+            benchmarks.close()
+
+    print(format_results(results))
+    report = get_report(results)
+    if args.output:
+        save_report(report, args.output)
+
+    if args.compare:
+        regressions = compare_reports(load_report(args.compare), report, args.threshold)
+        if regressions:
+            print("\nRegressions:\n" + "\n".join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
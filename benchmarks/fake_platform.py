@@ -0,0 +1,203 @@
+import json
+import threading
+import time
+import typing as t
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+
+def generate_rsa_key() -> rsa.RSAPrivateKey:
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+def get_private_pem(private_key: rsa.RSAPrivateKey) -> str:
+    return private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.TraditionalOpenSSL,
+        encryption_algorithm=serialization.NoEncryption(),
+    ).decode("utf-8")
+
+
+class FakePlatformHandler(BaseHTTPRequestHandler):
+    server: "FakePlatformServer"
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args) -> None:  # pylint: disable=arguments-differ
+        pass
+
+    def _send_json(
+        self,
+        data: t.Any,
+        content_type: str = "application/json",
+        headers: t.Optional[t.Dict[str, str]] = None,
+    ) -> None:
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        platform = self.server.platform
+        path = urlparse(self.path).path
+        with platform.lock:
+            platform.requests_count[path] = platform.requests_count.get(path, 0) + 1
+        if path == "/jwks":
+            self._send_json(platform.get_jwks())
+        elif path == "/memberships":
+            self._send_json(
+                {"id": platform.url + path, "members": platform.members},
+                "application/vnd.ims.lti-nrps.v2.membershipcontainer+json",
+            )
+        elif path == "/lineitems/1/results":
+            self._send_json(
+                platform.results, "application/vnd.ims.lis.v2.resultcontainer+json"
+            )
+        else:
+            self.send_error(404)
+
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        platform = self.server.platform
+        path = urlparse(self.path).path
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with platform.lock:
+            platform.requests_count[path] = platform.requests_count.get(path, 0) + 1
+        if path == "/token":
+            self._send_json(
+                {
+                    "access_token": "token-" + str(uuid.uuid4()),
+                    "token_type": "Bearer",
+                    "expires_in": 3600,
+                }
+            )
+        else:
+            self.send_error(404)
+
+
+class FakePlatformServer(ThreadingHTTPServer):
+    daemon_threads = True
+    platform: "FakePlatform"
+
+
+class FakePlatform:
+    """
+    Self-contained LMS: serves JWKS, OAuth2 token endpoint and LTI services (NRPS, AGS results)
+    on the local port and signs id_tokens for the launches.
+    """
+
+    issuer = "https://platform.bench.test"
+    client_id = "bench-client-id"
+    deployment_id = "bench-deployment-id"
+    kid = "bench-platform-key"
+
+    def __init__(self, members_count: int = 50, results_count: int = 50) -> None:
+        self.platform_key = generate_rsa_key()
+        self.tool_key = generate_rsa_key()
+        self.members = [
+            {
+                "status": "Active",
+                "name": f"User {i}",
+                "user_id": str(uuid.uuid4()),
+                "roles": ["http://purl.imsglobal.org/vocab/lis/v2/membership#Learner"],
+            }
+            for i in range(members_count)
+        ]
+        self.results = [
+            {"userId": member["user_id"], "resultScore": 0.5, "resultMaximum": 1}
+            for member in self.members[:results_count]
+        ]
+        self.requests_count: t.Dict[str, int] = {}
+        self.lock = threading.Lock()
+        self._server = FakePlatformServer(("127.0.0.1", 0), FakePlatformHandler)
+        self._server.platform = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def start(self) -> "FakePlatform":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakePlatform":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def get_jwks(self) -> t.Dict[str, t.Any]:
+        jwk = json.loads(RSAAlgorithm.to_jwk(self.platform_key.public_key()))
+        jwk.update({"kid": self.kid, "alg": "RS256", "use": "sig"})
+        return {"keys": [jwk]}
+
+    def get_tool_config(self) -> t.Dict[str, t.Any]:
+        return {
+            self.issuer: [
+                {
+                    "default": True,
+                    "client_id": self.client_id,
+                    "auth_login_url": self.url + "/authorize",
+                    "auth_token_url": self.url + "/token",
+                    "key_set_url": self.url + "/jwks",
+                    "key_set": None,
+                    "private_key_file": "private.key",
+                    "deployment_ids": [self.deployment_id],
+                }
+            ]
+        }
+
+    def get_tool_private_key(self) -> str:
+        return get_private_pem(self.tool_key)
+
+    def make_id_token(self, nonce: str, extra_claims: t.Optional[dict] = None) -> str:
+        now = int(time.time())
+        claims = {
+            "iss": self.issuer,
+            "aud": self.client_id,
+            "sub": str(uuid.uuid4()),
+            "iat": now,
+            "exp": now + 3600,
+            "nonce": nonce,
+            "https://purl.imsglobal.org/spec/lti/claim/message_type": "LtiResourceLinkRequest",
+            "https://purl.imsglobal.org/spec/lti/claim/version": "1.3.0",
+            "https://purl.imsglobal.org/spec/lti/claim/deployment_id": self.deployment_id,
+            "https://purl.imsglobal.org/spec/lti/claim/target_link_uri": "https://tool.bench.test/launch/",
+            "https://purl.imsglobal.org/spec/lti/claim/resource_link": {
+                "id": "bench-link"
+            },
+            "https://purl.imsglobal.org/spec/lti/claim/roles": [
+                "http://purl.imsglobal.org/vocab/lis/v2/membership#Learner"
+            ],
+            "https://purl.imsglobal.org/spec/lti-nrps/claim/namesroleservice": {
+                "context_memberships_url": self.url + "/memberships",
+                "service_versions": ["2.0"],
+            },
+            "https://purl.imsglobal.org/spec/lti-ags/claim/endpoint": {
+                "scope": [
+                    "https://purl.imsglobal.org/spec/lti-ags/scope/lineitem",
+                    "https://purl.imsglobal.org/spec/lti-ags/scope/result.readonly",
+                ],
+                "lineitems": self.url + "/lineitems",
+                "lineitem": self.url + "/lineitems/1",
+            },
+        }
+        claims.update(extra_claims or {})
+        return jwt.encode(
+            claims, self.platform_key, algorithm="RS256", headers={"kid": self.kid}
+        )
@@ -0,0 +1,134 @@
+import datetime
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import typing as t
+
+import typing_extensions as te
+
+from pylti1p3 import __version__
+
+TBenchmarkResult = te.TypedDict(
+    "TBenchmarkResult",
+    {
+        "name": str,
+        "iterations": int,
+        "ops_per_sec": float,
+        "mean_us": float,
+        "p50_us": float,
+        "p99_us": float,
+        "alloc_peak_bytes": int,
+        "alloc_blocks": int,
+    },
+)
+
+
+def _percentile(sorted_values: t.Sequence[float], percent: float) -> float:
+    index = min(
+        int(round(percent / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1
+    )
+    return sorted_values[index]
+
+
+def measure(
+    name: str,
+    fn: t.Callable[[t.Any], t.Any],
+    setup: t.Optional[t.Callable[[], t.Any]] = None,
+    iterations: int = 200,
+    warmup: int = 10,
+) -> TBenchmarkResult:
+    """
+    Run fn(setup()) the given number of times. Only fn is timed: setup prepares the state
+    which the measured stage depends on (i.e. launch object which has passed the previous stages).
+    Allocations are measured in the separate pass because tracemalloc slows down the code:
+    alloc_peak_bytes is the peak of memory allocated during the call, alloc_blocks is the number
+    of memory blocks allocated by the call which are still alive after it.
+    """
+    # pylint: disable=too-many-arguments
+    for _ in range(warmup):
+        fn(setup() if setup else None)
+
+    timings = []
+    for _ in range(iterations):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        fn(arg)
+        timings.append(time.perf_counter() - start)
+
+    alloc_iterations = max(iterations // 10, 1)
+    alloc_peak_bytes = alloc_blocks = 0
+    for _ in range(alloc_iterations):
+        arg = setup() if setup else None
+        tracemalloc.start()
+        fn(arg)
+        alloc_peak_bytes += tracemalloc.get_traced_memory()[1]
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        alloc_blocks += sum(stat.count for stat in snapshot.statistics("filename"))
+
+    timings.sort()
+    total = sum(timings)
+    return {
+        "name": name,
+        "iterations": iterations,
+        "ops_per_sec": iterations / total if total else 0.0,
+        "mean_us": total / iterations * 1e6,
+        "p50_us": _percentile(timings, 50) * 1e6,
+        "p99_us": _percentile(timings, 99) * 1e6,
+        "alloc_peak_bytes": alloc_peak_bytes // alloc_iterations,
+        "alloc_blocks": alloc_blocks // alloc_iterations,
+    }
+
+
+def get_report(results: t.Sequence[TBenchmarkResult]) -> t.Dict[str, t.Any]:
+    return {
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "pylti1p3_version": __version__,
+        "python_version": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": list(results),
+    }
+
+
+def save_report(report: t.Dict[str, t.Any], path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+
+def load_report(path: str) -> t.Dict[str, t.Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_reports(
+    baseline: t.Dict[str, t.Any], current: t.Dict[str, t.Any], threshold: float = 0.2
+) -> t.List[str]:
+    """
+    Return list of the benchmarks whose p50 latency grew by more than threshold (0.2 = 20%).
+    """
+    baseline_results = {res["name"]: res for res in baseline["results"]}
+    regressions = []
+    for res in current["results"]:
+        base = baseline_results.get(res["name"])
+        if not base or not base["p50_us"]:
+            continue
+        change = res["p50_us"] / base["p50_us"] - 1
+        if change > threshold:
+            regressions.append(
+                f"{res['name']}: p50 {base['p50_us']:.1f}us -> {res['p50_us']:.1f}us (+{change:.0%})"
+            )
+    return regressions
+
+
+def format_results(results: t.Sequence[TBenchmarkResult]) -> str:
+    lines = [
+        f"{'benchmark':<32}{'ops/s':>10}{'p50 us':>12}{'p99 us':>12}{'peak KiB':>12}{'blocks':>9}"
+    ]
+    for res in results:
+        lines.append(
+            f"{res['name']:<32}{res['ops_per_sec']:>10.0f}{res['p50_us']:>12.1f}"
+            f"{res['p99_us']:>12.1f}{res['alloc_peak_bytes'] / 1024:>12.1f}{res['alloc_blocks']:>9}"
+        )
+    return "\n".join(lines)
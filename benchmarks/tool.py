@@ -0,0 +1,97 @@
+import typing as t
+
+from pylti1p3.cookie import CookieService
+from pylti1p3.message_launch import MessageLaunch
+from pylti1p3.oidc_login import OIDCLogin
+from pylti1p3.redirect import Redirect
+from pylti1p3.request import Request
+from pylti1p3.session import SessionService
+
+
+class BenchRequest(Request):
+    def __init__(
+        self,
+        params: t.Dict[str, str],
+        cookies: t.Optional[t.Dict[str, str]] = None,
+        session: t.Optional[t.Dict[str, t.Any]] = None,
+    ) -> None:
+        self._params = params
+        self.cookies = cookies if cookies is not None else {}
+        self._session = session if session is not None else {}
+
+    @property
+    def session(self):
+        return self._session
+
+    def is_secure(self) -> bool:
+        return True
+
+    def get_param(self, key: str) -> str:
+        return self._params.get(key)  # type: ignore
+
+
+class BenchCookieService(CookieService):
+    def __init__(self, request: BenchRequest) -> None:
+        self._request = request
+
+    def get_cookie(self, name: str) -> t.Optional[str]:
+        return self._request.cookies.get(self._cookie_prefix + "-" + name)
+
+    def set_cookie(
+        self, name: str, value: t.Union[str, int], exp: t.Optional[int] = 3600
+    ):
+        self._request.cookies[self._cookie_prefix + "-" + name] = str(value)
+
+
+class BenchRedirect(Redirect[str]):
+    def __init__(self, location: str) -> None:
+        self._location = location
+
+    def do_redirect(self) -> str:
+        return self._location
+
+    def do_js_redirect(self) -> str:
+        return self._location
+
+    def set_redirect_url(self, location: str):
+        self._location = location
+
+    def get_redirect_url(self) -> str:
+        return self._location
+
+
+class BenchOIDCLogin(OIDCLogin):
+    def __init__(self, request: BenchRequest, tool_config, **kwargs) -> None:
+        super().__init__(
+            request,
+            tool_config,
+            SessionService(request),
+            BenchCookieService(request),
+            **kwargs,
+        )
+
+    def get_redirect(self, url: str) -> BenchRedirect:
+        return BenchRedirect(url)
+
+
+class BenchMessageLaunch(MessageLaunch):
+    def __init__(
+        self,
+        request,
+        tool_config,
+        session_service=None,
+        cookie_service=None,
+        launch_data_storage=None,
+        requests_session=None,
+    ):
+        super().__init__(
+            request,
+            tool_config,
+            session_service if session_service else SessionService(request),
+            cookie_service if cookie_service else BenchCookieService(request),
+            launch_data_storage,
+            requests_session,
+        )
+
+    def _get_request_param(self, key: str) -> str:
+        return self._request.get_param(key)
@@ -0,0 +1,134 @@
+import threading
+import time
+import typing as t
+
+if t.TYPE_CHECKING:
+    from .service_connector import ServiceConnector
+
+
+class _TrackedToken:
+    def __init__(
+        self,
+        connector: "ServiceConnector",
+        scopes: t.Sequence[str],
+        refresh_at: float,
+    ) -> None:
+        self.connector = connector
+        self.scopes = scopes
+        self.refresh_at = refresh_at
+        self.used_at = time.time()
+
+
+class AccessTokenRefresher:
+    """
+    Renews access tokens in the background thread before they expire (after refresh_ratio of "expires_in"
+    is over), so the calls to LTI services don't wait for the token exchange. Only tokens which were used
+    during the last idle_timeout seconds are renewed.
+    """
+
+    _refresh_ratio: float
+    _idle_timeout: int
+    _check_interval: float
+    _tokens: t.Dict[str, _TrackedToken]
+    _thread: t.Optional[threading.Thread] = None
+
+    def __init__(
+        self,
+        refresh_ratio: float = 0.8,
+        idle_timeout: int = 600,
+        check_interval: float = 5,
+    ):
+        self._refresh_ratio = refresh_ratio
+        self._idle_timeout = idle_timeout
+        self._check_interval = check_interval
+        self._tokens = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def track(
+        self,
+        cache_key: str,
+        connector: "ServiceConnector",
+        scopes: t.Sequence[str],
+        expires_in: t.Optional[int],
+        expires_at: t.Optional[float] = None,
+    ) -> None:
+        """
+        Remember the token which was just received from the platform.
+
+        :param cache_key: token cache key
+        :param connector: ServiceConnector which will be used to renew the token
+        :param scopes: token scopes
+        :param expires_in: "expires_in" value from the token response
+        :param expires_at: moment when the token expires in the store
+        """
+        if not expires_in:
+            return
+        now = time.time()
+        refresh_at = now + expires_in * self._refresh_ratio
+        if expires_at is not None:
+            # store expires short tokens before refresh_ratio of their lifetime is over,
+            # the token must be renewed before the next check which comes after that moment
+            refresh_at = max(min(refresh_at, expires_at - self._check_interval), now)
+        # data storage is bound to the current request, so the background thread works with its own copy
+        token = _TrackedToken(connector.copy_for_background(), scopes, refresh_at)
+        with self._lock:
+            prev_token = self._tokens.get(cache_key)
+            if prev_token:
+                # renewal by itself doesn't mean that the token is used
+                token.used_at = prev_token.used_at
+            self._tokens[cache_key] = token
+        self.start()
+
+    def touch(self, cache_key: str) -> None:
+        with self._lock:
+            token = self._tokens.get(cache_key)
+            if token:
+                token.used_at = time.time()
+
+    def is_tracked(self, cache_key: str) -> bool:
+        with self._lock:
+            return cache_key in self._tokens
+
+    def refresh_due(self) -> int:
+        """
+        Renew tokens which should be renewed at the moment.
+
+        :return: number of renewed tokens
+        """
+        now = time.time()
+        due = []
+        with self._lock:
+            for cache_key, token in list(self._tokens.items()):
+                if now - token.used_at > self._idle_timeout:
+                    del self._tokens[cache_key]
+                elif token.refresh_at <= now:
+                    due.append(token)
+
+        refreshed = 0
+        for token in due:
+            try:
+                token.connector.refresh_access_token(token.scopes)
+                refreshed += 1
+            except Exception:  # pylint: disable=broad-except
+                # token is still valid, the next attempt will be made on the next check
+                pass
+        return refreshed
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self._check_interval):
+            self.refresh_due()
@@ -0,0 +1,163 @@
+import copy
+import threading
+import time
+import typing as t
+from abc import ABCMeta, abstractmethod
+from collections import OrderedDict
+
+from .launch_data_storage.base import DisableSessionId, LaunchDataStorage
+
+
+class AccessTokenStore:
+    """
+    Storage of the platforms' access tokens. Token expires safety_margin seconds before
+    the platform's "expires_in" is over, so it isn't used right at the moment it becomes invalid.
+    """
+
+    __metaclass__ = ABCMeta
+    _safety_margin: int = 60
+    _default_expires_in: int = 300
+
+    def __init__(self, safety_margin: int = 60, default_expires_in: int = 300):
+        self._safety_margin = safety_margin
+        self._default_expires_in = default_expires_in
+
+    def get_expires_at(self, expires_in: t.Optional[int]) -> t.Optional[float]:
+        """
+        Calculate the moment after which the token shouldn't be used anymore.
+
+        :param expires_in: "expires_in" value from the token response (may be absent)
+        :return: timestamp or None if the token shouldn't be stored at all
+        """
+        if expires_in is None:
+            expires_in = self._default_expires_in
+        # don't let safety margin eat more than a half of the short-living token
+        lifetime = expires_in - min(self._safety_margin, expires_in // 2)
+        if lifetime <= 0:
+            return None
+        return time.time() + lifetime
+
+    def copy_for_background(self) -> "AccessTokenStore":
+        """
+        Store which may be used by the background thread (the same one if it isn't bound to the request).
+        """
+        return self
+
+    @abstractmethod
+    def get_access_token(self, key: str) -> t.Optional[str]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def set_access_token(
+        self, key: str, access_token: str, expires_in: t.Optional[int] = None
+    ) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def remove_access_token(self, key: str) -> None:
+        raise NotImplementedError
+
+
+class MemoryAccessTokenStore(AccessTokenStore):
+    """
+    Process-wide bounded store (default one).
+    """
+
+    _max_size: int
+    _tokens: "OrderedDict[str, t.Tuple[str, float]]"
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        safety_margin: int = 60,
+        default_expires_in: int = 300,
+    ):
+        super().__init__(safety_margin, default_expires_in)
+        self._max_size = max_size
+        self._tokens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_access_token(self, key: str) -> t.Optional[str]:
+        with self._lock:
+            item = self._tokens.get(key)
+            if item is None:
+                return None
+            if item[1] <= time.time():
+                del self._tokens[key]
+                return None
+            self._tokens.move_to_end(key)
+            return item[0]
+
+    def set_access_token(
+        self, key: str, access_token: str, expires_in: t.Optional[int] = None
+    ) -> None:
+        expires_at = self.get_expires_at(expires_in)
+        if expires_at is None:
+            return
+        with self._lock:
+            self._tokens[key] = (access_token, expires_at)
+            self._tokens.move_to_end(key)
+            while len(self._tokens) > self._max_size:
+                self._tokens.popitem(last=False)
+
+    def remove_access_token(self, key: str) -> None:
+        with self._lock:
+            self._tokens.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tokens.clear()
+
+
+class LaunchDataStorageAccessTokenStore(AccessTokenStore):
+    """
+    Store which keeps tokens in the launch data storage (i.e. Django cache, Flask-Caching, ...),
+    so token fetched by one worker is used by all workers which share the same cache.
+    """
+
+    _data_storage: LaunchDataStorage[t.Any]
+
+    def __init__(
+        self,
+        data_storage: LaunchDataStorage[t.Any],
+        safety_margin: int = 60,
+        default_expires_in: int = 300,
+    ):
+        super().__init__(safety_margin, default_expires_in)
+        self._data_storage = data_storage
+
+    def copy_for_background(self) -> "LaunchDataStorageAccessTokenStore":
+        # session id of the data storage is switched while it is used
+        return LaunchDataStorageAccessTokenStore(
+            copy.copy(self._data_storage),
+            self._safety_margin,
+            self._default_expires_in,
+        )
+
+    def get_access_token(self, key: str) -> t.Optional[str]:
+        with DisableSessionId(self._data_storage):
+            value = self._data_storage.get_value(key)
+        # storage may not support keys expiration
+        if not value or value["expires_at"] <= time.time():
+            return None
+        return value["access_token"]
+
+    def set_access_token(
+        self, key: str, access_token: str, expires_in: t.Optional[int] = None
+    ) -> None:
+        expires_at = self.get_expires_at(expires_in)
+        if expires_at is None:
+            return
+        with DisableSessionId(self._data_storage):
+            self._data_storage.set_value(
+                key,
+                {"access_token": access_token, "expires_at": expires_at},
+                exp=max(int(expires_at - time.time()), 1),
+            )
+
+    def remove_access_token(self, key: str) -> None:
+        with DisableSessionId(self._data_storage):
+            try:
+                self._data_storage.remove_value(key)
+            except NotImplementedError:
+                self._data_storage.set_value(key, None)
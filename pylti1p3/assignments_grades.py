@@ -1,11 +1,14 @@
+import copy
 import typing as t
 import typing_extensions as te
 from .exception import LtiException
 from .lineitem import LineItem
 from .grade import Grade
+from .pagination import iter_pages
 from .lineitem import TLineItem
+from .lineitem_index import LineItemIndex
 from .service_connector import ServiceConnector, TServiceConnectorResponse
-
+from .utils import add_param_to_url
 
 TAssignmentsGradersData = te.TypedDict(
     "TAssignmentsGradersData",
@@ -24,10 +27,25 @@ TAssignmentsGradersData = te.TypedDict(
     total=False,
 )
 
+TResult = te.TypedDict(
+    "TResult",
+    {
+        "id": str,
+        "scoreOf": str,
+        "userId": str,
+        "resultScore": float,
+        "resultMaximum": float,
+        "scoringUserId": str,
+        "comment": str,
+    },
+    total=False,
+)
+
 
 class AssignmentsGradesService:
     _service_connector: ServiceConnector
     _service_data: TAssignmentsGradersData
+    _lineitem_index: t.Optional[LineItemIndex] = None
 
     def __init__(
         self, service_connector: ServiceConnector, service_data: TAssignmentsGradersData
@@ -35,6 +53,41 @@ class AssignmentsGradesService:
         self._service_connector = service_connector
         self._service_data = service_data
 
+    @classmethod
+    def set_default_lineitem_index(
+        cls, lineitem_index: t.Optional[LineItemIndex]
+    ) -> None:
+        """
+        Set line items cache which is used by all services in the process.
+        """
+        cls._lineitem_index = lineitem_index
+
+    def set_lineitem_index(
+        self, lineitem_index: t.Optional[LineItemIndex]
+    ) -> "AssignmentsGradesService":
+        self._lineitem_index = lineitem_index
+        return self
+
+    def get_lineitem_index(self) -> t.Optional[LineItemIndex]:
+        return self._lineitem_index
+
+    def get_lineitem_index_key(self) -> str:
+        registration = self._service_connector.get_registration()
+        return LineItemIndex.get_key(
+            registration.get_issuer(),
+            registration.get_client_id(),
+            self._service_data["lineitems"],
+        )
+
+    def copy_for_background(self) -> "AssignmentsGradesService":
+        """
+        Copy which may be used by the background thread (i.e. to prefetch pages) while the current request goes on.
+        """
+        # pylint: disable=protected-access
+        service = copy.copy(self)
+        service._service_connector = self._service_connector.copy_for_background()
+        return service
+
     def can_read_lineitem(self) -> bool:
         return (
             "https://purl.imsglobal.org/spec/lti-ags/scope/lineitem.readonly"
@@ -130,29 +183,43 @@ class AssignmentsGradesService:
         if not lineitems_url:
             lineitems_url = self._service_data["lineitems"]
 
-        lineitems = self._service_connector.make_service_request(
+        # page is parsed while it is received, so the raw body isn't kept in memory
+        lineitems = self._service_connector.make_streaming_service_request(
             self._service_data["scope"],
             lineitems_url,
             accept="application/vnd.ims.lis.v2.lineitemcontainer+json",
         )
-        if not isinstance(lineitems["body"], list):
-            raise LtiException("Unknown response type received for line items")
-        return lineitems["body"], lineitems["next_page_url"]
+        try:
+            return list(lineitems["items"]), lineitems["next_page_url"]
+        except ValueError as e:
+            raise LtiException("Unknown response type received for line items") from e
 
-    def get_lineitems(self) -> list:
+    def iter_lineitems(self, prefetch: int = 0) -> t.Iterator[TLineItem]:
         """
-        Get list of all available line items.
+        Iterate over all available line items. Pages are requested with get_lineitems_page()
+        only when they are needed, so only one page is kept in memory.
 
-        :return: list
+        :param prefetch: number of pages requested ahead in the background (they are kept in memory too)
+        :return: iterator
         """
-        lineitems_res_lst = []
-        lineitems_url: t.Optional[str] = self._service_data["lineitems"]
+        if not self.can_read_lineitem():
+            raise LtiException("Can't read lineitem: Missing required scope")
 
-        while lineitems_url:
-            lineitems, lineitems_url = self.get_lineitems_page(lineitems_url)
-            lineitems_res_lst.extend(lineitems)
+        # connector is bound to the current request, background thread requests pages with its copy
+        service = self.copy_for_background() if prefetch > 0 else self
+        for page in iter_pages(
+            service.get_lineitems_page, self._service_data["lineitems"], prefetch
+        ):
+            yield from page
 
-        return lineitems_res_lst
+    def get_lineitems(self, prefetch: int = 0) -> list:
+        """
+        Get list of all available line items.
+
+        :param prefetch: number of pages requested ahead in the background
+        :return: list
+        """
+        return list(self.iter_lineitems(prefetch))
 
     def find_lineitem(self, prop_name: str, prop_value: t.Any) -> t.Optional[LineItem]:
         """
@@ -162,16 +229,44 @@ class AssignmentsGradesService:
         :param prop_value: property value
         :return: LineItem instance or None
         """
-        lineitems_url: t.Optional[str] = self._service_data["lineitems"]
-
-        while lineitems_url:
-            lineitems, lineitems_url = self.get_lineitems_page(lineitems_url)
-            for lineitem in lineitems:
-                lineitem_prop_value = lineitem.get(prop_name)
-                if lineitem_prop_value == prop_value:
-                    return LineItem(lineitem)
+        if self._lineitem_index and self._lineitem_index.is_indexed(prop_name):
+            return self._find_indexed_lineitem(
+                self._lineitem_index, prop_name, prop_value
+            )
+
+        for lineitem in self.iter_lineitems():
+            lineitem_prop_value = lineitem.get(prop_name)
+            if lineitem_prop_value == prop_value:
+                return LineItem(lineitem)
         return None
 
+    def _find_indexed_lineitem(
+        self, lineitem_index: LineItemIndex, prop_name: str, prop_value: t.Any
+    ) -> t.Optional[LineItem]:
+        lineitem = self._find_in_lineitem_index(lineitem_index, prop_name, prop_value)
+        if lineitem is None:
+            # line item could be created by someone else after the index was built
+            lineitem = self._reindex_lineitems(
+                lineitem_index, self.iter_lineitems(), prop_name, prop_value
+            )
+        return LineItem(lineitem) if lineitem else None
+
+    def _find_in_lineitem_index(
+        self, lineitem_index: LineItemIndex, prop_name: str, prop_value: t.Any
+    ) -> t.Optional[TLineItem]:
+        index = lineitem_index.get_index(self.get_lineitem_index_key())
+        return lineitem_index.find(index, prop_name, prop_value) if index else None
+
+    def _reindex_lineitems(
+        self,
+        lineitem_index: LineItemIndex,
+        lineitems: t.Iterable[TLineItem],
+        prop_name: str,
+        prop_value: t.Any,
+    ) -> t.Optional[TLineItem]:
+        index = lineitem_index.set_lineitems(self.get_lineitem_index_key(), lineitems)
+        return lineitem_index.find(index, prop_name, prop_value)
+
     def find_lineitem_by_id(self, ln_id: str) -> t.Optional[LineItem]:
         """
         Find line item by ID.
@@ -259,14 +354,27 @@ class AssignmentsGradesService:
         )
         if not isinstance(created_lineitem["body"], dict):
             raise LtiException("Unknown response type received for create line item")
+        self._add_to_lineitem_index(t.cast(TLineItem, created_lineitem["body"]))
         return LineItem(t.cast(TLineItem, created_lineitem["body"]))
 
-    def get_grades(self, lineitem: t.Optional[LineItem] = None) -> list:
+    def _add_to_lineitem_index(self, lineitem: TLineItem) -> None:
+        if self._lineitem_index:
+            self._lineitem_index.add_lineitem(self.get_lineitem_index_key(), lineitem)
+
+    def iter_grades(
+        self,
+        lineitem: t.Optional[LineItem] = None,
+        user_id: t.Optional[str] = None,
+        limit: t.Optional[int] = None,
+    ) -> t.Iterator[TResult]:
         """
-        Return all grades for the passed line item (across all users enrolled in the line item's context).
+        Iterate over the grades for the passed line item across all pages. Results are parsed from the response
+        while it is received and next pages are requested only when they are needed.
 
         :param lineitem: LineItem instance
-        :return: list of grades
+        :param user_id: return only the result of this user (optional)
+        :param limit: max number of results per page (optional)
+        :return: iterator
         """
         if not self.can_read_grades():
             raise LtiException("Can't read grades: Missing required scope")
@@ -277,17 +385,42 @@ class AssignmentsGradesService:
             lineitem_id = self._service_data.get("lineitem")
 
         if not lineitem_id:
-            return []
+            return
 
         results_url = self._add_url_path_ending(lineitem_id, "results")
-        scores = self._service_connector.make_service_request(
-            self._service_data["scope"],
-            results_url,
-            accept="application/vnd.ims.lis.v2.resultcontainer+json",
-        )
-        if not isinstance(scores["body"], list):
-            raise LtiException("Unknown response type received for results")
-        return scores["body"]
+        if user_id:
+            results_url = add_param_to_url(results_url, "user_id", user_id)
+        if limit:
+            results_url = add_param_to_url(results_url, "limit", limit)
+
+        page_url: t.Optional[str] = results_url
+        while page_url:
+            scores = self._service_connector.make_streaming_service_request(
+                self._service_data["scope"],
+                page_url,
+                accept="application/vnd.ims.lis.v2.resultcontainer+json",
+            )
+            try:
+                yield from scores["items"]
+            except ValueError as e:
+                raise LtiException("Unknown response type received for results") from e
+            page_url = scores["next_page_url"]
+
+    def get_grades(
+        self,
+        lineitem: t.Optional[LineItem] = None,
+        user_id: t.Optional[str] = None,
+        limit: t.Optional[int] = None,
+    ) -> t.List[TResult]:
+        """
+        Return all grades for the passed line item (across all users enrolled in the line item's context).
+
+        :param lineitem: LineItem instance
+        :param user_id: return only the result of this user (optional)
+        :param limit: max number of results per page (optional)
+        :return: list of grades
+        """
+        return list(self.iter_grades(lineitem, user_id, limit))
 
     @staticmethod
     def _add_url_path_ending(url: str, url_path_ending: str) -> str:
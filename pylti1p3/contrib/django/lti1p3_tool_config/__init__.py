@@ -74,6 +74,9 @@ class DjangoDbToolConf(ToolConfAbstract):
 
     def find_registration_by_params(self, iss, client_id, *args, **kwargs):
         lti_tool = self.get_lti_tool(iss, client_id)
+        return self._get_registration(lti_tool)
+
+    def _get_registration(self, lti_tool):
         auth_audience = lti_tool.auth_audience if lti_tool.auth_audience else None
         key_set = json.loads(lti_tool.key_set) if lti_tool.key_set else None
         key_set_url = lti_tool.key_set_url if lti_tool.key_set_url else None
@@ -99,6 +102,14 @@ class DjangoDbToolConf(ToolConfAbstract):
         )
         return reg
 
+    def find_registrations(self, *args, **kwargs):
+        # pylint: disable=no-member
+        registrations = []
+        qs = self._tools_cls.objects.filter(is_active=True).select_related("tool_key")
+        for lti_tool in qs:
+            registrations.append(self._get_registration(lti_tool))
+        return registrations
+
     def find_deployment(self, iss, deployment_id):
         pass
 
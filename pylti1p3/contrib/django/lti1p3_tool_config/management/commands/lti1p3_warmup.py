@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError  # type: ignore
+from pylti1p3.contrib.django.launch_data_storage.cache import DjangoCacheDataStorage
+from pylti1p3.contrib.django.lti1p3_tool_config import DjangoDbToolConf
+from pylti1p3.warmup import format_warmup_results, warmup
+
+
+class Command(BaseCommand):
+    help = (
+        "Fetch key sets of all active LTI tools and save them in the shared cache (--cache-name), "
+        "so workers which use the same cache in set_public_key_caching don't download them. "
+        "Without --cache-name it only checks that key sets can be fetched and parsed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cache-name", default=None)
+        parser.add_argument("--cache-lifetime", type=int, default=7200)
+        parser.add_argument("--workers", type=int, default=8)
+
+    def handle(self, *args, **options):
+        cache_name = options["cache_name"]
+        data_storage = DjangoCacheDataStorage(cache_name) if cache_name else None
+        results = warmup(
+            DjangoDbToolConf(),
+            data_storage=data_storage,
+            cache_lifetime=options["cache_lifetime"],
+            max_workers=options["workers"],
+        )
+        self.stdout.write(format_warmup_results(results))
+        if any(res["error"] for res in results):
+            raise CommandError("Some key sets weren't fetched")
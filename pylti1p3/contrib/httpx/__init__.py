@@ -0,0 +1,5 @@
+# flake8: noqa
+from .service_connector import AsyncServiceConnector
+from .assignments_grades import AsyncAssignmentsGradesService
+from .course_groups import AsyncCourseGroupsService
+from .names_roles import AsyncNamesRolesProvisioningService
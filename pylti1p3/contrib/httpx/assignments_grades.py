@@ -0,0 +1,342 @@
+import typing as t
+from ...assignments_grades import (
+    AssignmentsGradesService,
+    TAssignmentsGradersData,
+    TResult,
+)
+from ...exception import LtiException
+from ...grade import Grade
+from ...lineitem import LineItem, TLineItem
+from ...lineitem_index import LineItemIndex
+from ...service_connector import TServiceConnectorResponse
+from ...utils import add_param_to_url
+from .service_connector import AsyncServiceConnector
+
+
+class AsyncAssignmentsGradesService:
+    _service_connector: AsyncServiceConnector
+    _service_data: TAssignmentsGradersData
+    _sync_service: AssignmentsGradesService
+
+    def __init__(
+        self,
+        service_connector: AsyncServiceConnector,
+        service_data: TAssignmentsGradersData,
+    ):
+        self._service_connector = service_connector
+        self._service_data = service_data
+        # scopes checks don't make requests, so they are shared with the sync service
+        self._sync_service = AssignmentsGradesService(
+            service_connector.get_service_connector(), service_data
+        )
+
+    def set_lineitem_index(
+        self, lineitem_index: t.Optional[LineItemIndex]
+    ) -> "AsyncAssignmentsGradesService":
+        self._sync_service.set_lineitem_index(lineitem_index)
+        return self
+
+    def get_lineitem_index(self) -> t.Optional[LineItemIndex]:
+        return self._sync_service.get_lineitem_index()
+
+    def can_read_lineitem(self) -> bool:
+        return self._sync_service.can_read_lineitem()
+
+    def can_create_lineitem(self) -> bool:
+        return self._sync_service.can_create_lineitem()
+
+    def can_read_grades(self) -> bool:
+        return self._sync_service.can_read_grades()
+
+    def can_put_grade(self) -> bool:
+        return self._sync_service.can_put_grade()
+
+    async def put_grade(
+        self, grade: Grade, lineitem: t.Optional[LineItem] = None
+    ) -> TServiceConnectorResponse:
+        """
+        Send grade to the LTI platform.
+
+        :param grade: Grade instance
+        :param lineitem: LineItem instance
+        :return: dict with HTTP response body and headers
+        """
+
+        if not self.can_put_grade():
+            raise LtiException("Can't put grade: Missing required scope")
+
+        if lineitem:
+            if not lineitem.get_id():
+                lineitem = await self.find_or_create_lineitem(lineitem)
+            score_url = lineitem.get_id()
+        elif not lineitem and self._service_data.get("lineitem"):
+            score_url = self._service_data.get("lineitem")
+        else:
+            raise LtiException("Can't find lineitem to put grade")
+
+        assert score_url is not None
+        score_url = self._add_url_path_ending(score_url, "scores")
+        return await self._service_connector.make_service_request(
+            self._service_data["scope"],
+            score_url,
+            is_post=True,
+            data=grade.get_value(),
+            content_type="application/vnd.ims.lis.v1.score+json",
+        )
+
+    async def get_lineitem(self, lineitem_url: t.Optional[str] = None):
+        """
+        Retrieves an individual lineitem. By default retrieves the lineitem
+        associated with the LTI message.
+
+        :param lineitem_url: endpoint for LTI line item (optional)
+        :return: LineItem instance
+        """
+        if not self.can_read_lineitem():
+            raise LtiException("Can't read lineitem: Missing required scope")
+
+        if lineitem_url is None:
+            lineitem_url = self._service_data["lineitem"]
+
+        lineitem_response = await self._service_connector.make_service_request(
+            self._service_data["scope"],
+            lineitem_url,
+            accept="application/vnd.ims.lis.v2.lineitem+json",
+        )
+        return LineItem(t.cast(TLineItem, lineitem_response["body"]))
+
+    async def get_lineitems_page(
+        self, lineitems_url: t.Optional[str] = None
+    ) -> t.Tuple[list, t.Optional[str]]:
+        """
+        Get one page with line items.
+
+        :param lineitems_url: LTI platform's URL (optional)
+        :return: tuple in format: (list with line items, next page url)
+        """
+        if not self.can_read_lineitem():
+            raise LtiException("Can't read lineitem: Missing required scope")
+
+        if not lineitems_url:
+            lineitems_url = self._service_data["lineitems"]
+
+        # page is parsed while it is received, so the raw body isn't kept in memory
+        lineitems = await self._service_connector.make_streaming_service_request(
+            self._service_data["scope"],
+            lineitems_url,
+            accept="application/vnd.ims.lis.v2.lineitemcontainer+json",
+        )
+        items = lineitems["items"]
+        try:
+            return [lineitem async for lineitem in items], lineitems["next_page_url"]
+        except ValueError as e:
+            raise LtiException("Unknown response type received for line items") from e
+        finally:
+            await items.aclose()
+
+    async def iter_lineitems(self) -> t.AsyncGenerator[TLineItem, None]:
+        """
+        Iterate over all available line items. Pages are requested with get_lineitems_page()
+        only when they are needed, so only one page is kept in memory.
+
+        :return: async iterator
+        """
+        if not self.can_read_lineitem():
+            raise LtiException("Can't read lineitem: Missing required scope")
+
+        lineitems_url: t.Optional[str] = self._service_data["lineitems"]
+
+        while lineitems_url:
+            lineitems, lineitems_url = await self.get_lineitems_page(lineitems_url)
+            for lineitem in lineitems:
+                yield lineitem
+
+    async def get_lineitems(self) -> list:
+        """
+        Get list of all available line items.
+
+        :return: list
+        """
+        return [lineitem async for lineitem in self.iter_lineitems()]
+
+    async def find_lineitem(
+        self, prop_name: str, prop_value: t.Any
+    ) -> t.Optional[LineItem]:
+        """
+        Find line item by some property (ID/Tag).
+
+        :param prop_name: property name
+        :param prop_value: property value
+        :return: LineItem instance or None
+        """
+        lineitem_index = self.get_lineitem_index()
+        if lineitem_index and lineitem_index.is_indexed(prop_name):
+            # index may be kept in the shared cache, so it is used in the thread pool
+            # pylint: disable=protected-access
+            found = await self._service_connector.run_sync(
+                self._sync_service._find_in_lineitem_index,
+                lineitem_index,
+                prop_name,
+                prop_value,
+            )
+            if found is None:
+                # line item could be created by someone else after the index was built
+                found = await self._service_connector.run_sync(
+                    self._sync_service._reindex_lineitems,
+                    lineitem_index,
+                    [item async for item in self.iter_lineitems()],
+                    prop_name,
+                    prop_value,
+                )
+            return LineItem(found) if found else None
+
+        lineitems = self.iter_lineitems()
+        try:
+            async for lineitem in lineitems:
+                lineitem_prop_value = lineitem.get(prop_name)
+                if lineitem_prop_value == prop_value:
+                    return LineItem(lineitem)
+        finally:
+            await lineitems.aclose()
+        return None
+
+    async def find_lineitem_by_id(self, ln_id: str) -> t.Optional[LineItem]:
+        return await self.find_lineitem("id", ln_id)
+
+    async def find_lineitem_by_tag(self, tag: str) -> t.Optional[LineItem]:
+        return await self.find_lineitem("tag", tag)
+
+    async def find_lineitem_by_resource_link_id(
+        self, resource_link_id: str
+    ) -> t.Optional[LineItem]:
+        return await self.find_lineitem("resourceLinkId", resource_link_id)
+
+    async def find_lineitem_by_resource_id(
+        self, resource_id: str
+    ) -> t.Optional[LineItem]:
+        return await self.find_lineitem("resourceId", resource_id)
+
+    async def find_or_create_lineitem(
+        self, new_lineitem: LineItem, find_by: str = "tag"
+    ) -> LineItem:
+        """
+        Try to find line item using ID or Tag. New lime item will be created if nothing is found.
+
+        :param new_lineitem: LineItem instance
+        :param find_by: str ("tag"/"id"/"resource_link_id"/"resource_id")
+        :return: LineItem instance (based on response from the LTI platform)
+        """
+        if find_by == "tag":
+            tag = new_lineitem.get_tag()
+            if not tag:
+                raise LtiException("Tag value is not specified")
+            lineitem = await self.find_lineitem_by_tag(tag)
+        elif find_by == "id":
+            line_id = new_lineitem.get_id()
+            if not line_id:
+                raise LtiException("ID value is not specified")
+            lineitem = await self.find_lineitem_by_id(line_id)
+        elif find_by == "resource_link_id":
+            resource_link_id = new_lineitem.get_resource_link_id()
+            if not resource_link_id:
+                raise LtiException("Resource Link ID value is not specified")
+            lineitem = await self.find_lineitem_by_resource_link_id(resource_link_id)
+        elif find_by == "resource_id":
+            resource_id = new_lineitem.get_resource_id()
+            if not resource_id:
+                raise LtiException("Resource ID value is not specified")
+            lineitem = await self.find_lineitem_by_resource_id(resource_id)
+        else:
+            raise LtiException('Invalid "find_by" value: ' + str(find_by))
+
+        if lineitem:
+            return lineitem
+
+        if not self.can_create_lineitem():
+            raise LtiException("Can't create lineitem: Missing required scope")
+
+        created_lineitem = await self._service_connector.make_service_request(
+            self._service_data["scope"],
+            self._service_data["lineitems"],
+            is_post=True,
+            data=new_lineitem.get_value(),
+            content_type="application/vnd.ims.lis.v2.lineitem+json",
+            accept="application/vnd.ims.lis.v2.lineitem+json",
+        )
+        if not isinstance(created_lineitem["body"], dict):
+            raise LtiException("Unknown response type received for create line item")
+        # pylint: disable=protected-access
+        await self._service_connector.run_sync(
+            self._sync_service._add_to_lineitem_index,
+            t.cast(TLineItem, created_lineitem["body"]),
+        )
+        return LineItem(t.cast(TLineItem, created_lineitem["body"]))
+
+    async def iter_grades(
+        self,
+        lineitem: t.Optional[LineItem] = None,
+        user_id: t.Optional[str] = None,
+        limit: t.Optional[int] = None,
+    ) -> t.AsyncGenerator[TResult, None]:
+        """
+        Iterate over the grades for the passed line item across all pages.
+
+        :param lineitem: LineItem instance
+        :param user_id: return only the result of this user (optional)
+        :param limit: max number of results per page (optional)
+        :return: async iterator
+        """
+        if not self.can_read_grades():
+            raise LtiException("Can't read grades: Missing required scope")
+
+        if lineitem:
+            lineitem_id = lineitem.get_id()
+        else:
+            lineitem_id = self._service_data.get("lineitem")
+
+        if not lineitem_id:
+            return
+
+        results_url = self._add_url_path_ending(lineitem_id, "results")
+        if user_id:
+            results_url = add_param_to_url(results_url, "user_id", user_id)
+        if limit:
+            results_url = add_param_to_url(results_url, "limit", limit)
+
+        page_url: t.Optional[str] = results_url
+        while page_url:
+            scores = await self._service_connector.make_streaming_service_request(
+                self._service_data["scope"],
+                page_url,
+                accept="application/vnd.ims.lis.v2.resultcontainer+json",
+            )
+            items = scores["items"]
+            try:
+                async for result in items:
+                    yield result
+            except ValueError as e:
+                raise LtiException("Unknown response type received for results") from e
+            finally:
+                await items.aclose()
+            page_url = scores["next_page_url"]
+
+    async def get_grades(
+        self,
+        lineitem: t.Optional[LineItem] = None,
+        user_id: t.Optional[str] = None,
+        limit: t.Optional[int] = None,
+    ) -> t.List[TResult]:
+        """
+        Return all grades for the passed line item (across all users enrolled in the line item's context).
+
+        :param lineitem: LineItem instance
+        :param user_id: return only the result of this user (optional)
+        :param limit: max number of results per page (optional)
+        :return: list of grades
+        """
+        return [result async for result in self.iter_grades(lineitem, user_id, limit)]
+
+    @staticmethod
+    def _add_url_path_ending(url: str, url_path_ending: str) -> str:
+        # pylint: disable=protected-access
+        return AssignmentsGradesService._add_url_path_ending(url, url_path_ending)
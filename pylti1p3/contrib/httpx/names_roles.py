@@ -0,0 +1,101 @@
+import typing as t
+from ...exception import LtiException
+from ...names_roles import TMember, TNamesAndRolesData
+from ...utils import add_param_to_url
+from .service_connector import AsyncServiceConnector
+
+
+class AsyncNamesRolesProvisioningService:
+    _service_connector: AsyncServiceConnector
+    _service_data: TNamesAndRolesData
+
+    def __init__(
+        self,
+        service_connector: AsyncServiceConnector,
+        service_data: TNamesAndRolesData,
+    ):
+        self._service_connector = service_connector
+        self._service_data = service_data
+
+    async def get_nrps_data(self, members_url: t.Optional[str] = None):
+        if not members_url:
+            members_url = self._service_data["context_memberships_url"]
+
+        data = await self._service_connector.make_service_request(
+            [
+                "https://purl.imsglobal.org/spec/lti-nrps/scope/contextmembership.readonly"
+            ],
+            members_url,
+            accept="application/vnd.ims.lti-nrps.v2.membershipcontainer+json",
+        )
+        return data
+
+    async def get_members_page(
+        self, members_url: t.Optional[str] = None
+    ) -> t.Tuple[t.List[TMember], t.Optional[str]]:
+        """
+        Get one page with the users.
+
+        :param members_url: LTI platform's URL (optional)
+        :return: tuple in format: (list with users, next page url)
+        """
+        if not members_url:
+            members_url = self._service_data["context_memberships_url"]
+
+        # page is parsed while it is received, so the raw body isn't kept in memory
+        data = await self._service_connector.make_streaming_service_request(
+            [
+                "https://purl.imsglobal.org/spec/lti-nrps/scope/contextmembership.readonly"
+            ],
+            members_url,
+            items_key="members",
+            accept="application/vnd.ims.lti-nrps.v2.membershipcontainer+json",
+        )
+        members = data["items"]
+        try:
+            return [member async for member in members], data["next_page_url"]
+        except ValueError as e:
+            raise LtiException("Unknown response type received for members") from e
+        finally:
+            await members.aclose()
+
+    async def iter_members(
+        self, resource_link_id: t.Optional[str] = None
+    ) -> t.AsyncIterator[TMember]:
+        """
+        Iterate over all users. Pages are requested with get_members_page() one by one while
+        the iteration goes on, so only one page is kept in memory.
+
+        :param resource_link_id: resource link id (optional)
+        :return: async iterator
+        """
+        members_url: t.Optional[str] = self._service_data["context_memberships_url"]
+
+        if members_url and resource_link_id:
+            members_url = add_param_to_url(members_url, "rlid", resource_link_id)
+
+        while members_url:
+            members, members_url = await self.get_members_page(members_url)
+            for member in members:
+                yield member
+
+    async def get_members(
+        self, resource_link_id: t.Optional[str] = None
+    ) -> t.List[TMember]:
+        """
+        Get list with all users.
+
+        :param resource_link_id: resource link id (optional)
+        :return: list
+        """
+        return [member async for member in self.iter_members(resource_link_id)]
+
+    async def get_context(self):
+        """
+        Get context data.
+
+        :return: dict
+        """
+        data = await self.get_nrps_data()
+        data_body = t.cast(t.Any, data.get("body", {}))
+        return data_body.get("context", {})
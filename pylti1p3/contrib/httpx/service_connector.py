@@ -0,0 +1,306 @@
+import asyncio
+import functools
+import typing as t
+import weakref
+
+import httpx
+import typing_extensions as te
+from ...access_token_refresher import AccessTokenRefresher
+from ...access_token_store import AccessTokenStore
+from ...exception import LtiServiceException
+from ...json_stream import JsonArrayStreamParser
+from ...rate_limiter import RateLimiter
+from ...registration import Registration
+from ...retry_policy import RetryPolicy
+from ...requests_session import REQUESTS_USER_AGENT
+from ...service_connector import ServiceConnector, TServiceConnectorResponse
+
+T = t.TypeVar("T")
+
+TAsyncServiceConnectorStreamResponse = te.TypedDict(
+    "TAsyncServiceConnectorStreamResponse",
+    {
+        "headers": t.Union[t.Dict[str, str], t.MutableMapping[str, str]],
+        "items": t.AsyncGenerator[t.Any, None],
+        "next_page_url": t.Optional[str],
+    },
+)
+
+
+class AsyncServiceConnector:
+    """
+    Asyncio version of the ServiceConnector based on httpx. Access tokens are kept in the same
+    store as the tokens of ServiceConnector, concurrent exchanges of the same token are coalesced.
+
+    If client isn't passed, the shared httpx.AsyncClient of the running event loop is used.
+    """
+
+    _service_connector: ServiceConnector
+    _client: t.Optional[httpx.AsyncClient] = None
+    _clients: (
+        "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]"
+    ) = weakref.WeakKeyDictionary()
+    _client_limits: httpx.Limits = httpx.Limits(
+        max_connections=100, max_keepalive_connections=20
+    )
+    _client_timeout: httpx.Timeout = httpx.Timeout(30, connect=5)
+    _access_token_fetches: t.Dict[
+        t.Tuple[asyncio.AbstractEventLoop, str], "asyncio.Future[str]"
+    ] = {}
+
+    def __init__(
+        self,
+        registration: Registration,
+        client: t.Optional[httpx.AsyncClient] = None,
+        access_token_store: t.Optional[AccessTokenStore] = None,
+        access_token_refresher: t.Optional[AccessTokenRefresher] = None,
+    ):
+        # sync connector is used to build token requests and to work with the tokens store
+        self._service_connector = ServiceConnector(
+            registration,
+            access_token_store=access_token_store,
+            access_token_refresher=access_token_refresher,
+        )
+        self._client = client
+
+    @classmethod
+    def get_shared_client(cls) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = cls._clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(
+                headers={"User-Agent": REQUESTS_USER_AGENT},
+                limits=cls._client_limits,
+                timeout=cls._client_timeout,
+                follow_redirects=True,
+            )
+            cls._clients[loop] = client
+        return client
+
+    def get_client(self) -> httpx.AsyncClient:
+        return self._client if self._client else self.get_shared_client()
+
+    def get_service_connector(self) -> ServiceConnector:
+        return self._service_connector
+
+    def set_rate_limiter(
+        self, rate_limiter: t.Optional[RateLimiter]
+    ) -> "AsyncServiceConnector":
+        self._service_connector.set_rate_limiter(rate_limiter)
+        return self
+
+    def set_retry_policy(
+        self, retry_policy: t.Optional[RetryPolicy]
+    ) -> "AsyncServiceConnector":
+        self._service_connector.set_retry_policy(retry_policy)
+        return self
+
+    @staticmethod
+    async def run_sync(func: t.Callable[..., T], *args: t.Any) -> T:
+        """
+        Token store, token refresher and rate limiter may block (i.e. when they use the shared cache),
+        so they are called in the thread pool instead of the event loop.
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(func, *args)
+        )
+
+    async def get_access_token(self, scopes: t.Sequence[str]) -> str:
+        scopes = sorted(scopes)
+        cache_key = self._service_connector.get_access_token_cache_key(scopes)
+        access_token = await self.run_sync(
+            self._service_connector.get_cached_access_token, cache_key
+        )
+        if access_token:
+            return access_token
+
+        # Only one exchange per token is in flight, concurrent callers wait for its result
+        fetch_key = (asyncio.get_running_loop(), cache_key)
+        fetch = self._access_token_fetches.get(fetch_key)
+        if fetch is None:
+            fetch = asyncio.ensure_future(self._fetch_access_token(scopes, cache_key))
+            self._access_token_fetches[fetch_key] = fetch
+            fetch.add_done_callback(
+                lambda _: self._access_token_fetches.pop(fetch_key, None)
+            )
+        # cancellation of one caller shouldn't cancel the exchange for the others
+        return await asyncio.shield(fetch)
+
+    async def _fetch_access_token(self, scopes: t.Sequence[str], cache_key: str) -> str:
+        # the token could be saved by another worker while the previous exchange was in flight
+        access_token = await self.run_sync(
+            self._service_connector.get_cached_access_token, cache_key
+        )
+        if access_token:
+            return access_token
+        return await self._request_access_token(scopes, cache_key)
+
+    async def _request_access_token(
+        self, scopes: t.Sequence[str], cache_key: str
+    ) -> str:
+        auth_url, auth_request = self._service_connector.get_access_token_request(
+            scopes
+        )
+        r = await self.get_client().post(auth_url, data=auth_request)
+        if r.is_error:
+            raise LtiServiceException(r)
+        return await self.run_sync(
+            self._service_connector.save_access_token, scopes, cache_key, r.json()
+        )
+
+    async def _send_service_request(
+        self,
+        url: str,
+        is_post: bool,
+        data: t.Optional[str],
+        headers: t.Dict[str, str],
+        stream: bool = False,
+    ) -> httpx.Response:
+        client = self.get_client()
+        request = client.build_request(
+            "POST" if is_post else "GET",
+            url,
+            content=(data or None) if is_post else None,
+            headers=headers,
+        )
+        r = await client.send(request, stream=stream)
+        if stream and r.is_error:
+            # body of the error response is needed to decide what to do next
+            await r.aread()
+        return r
+
+    async def make_service_request(
+        self,
+        scopes: t.Sequence[str],
+        url: str,
+        *,
+        is_post: bool = False,
+        data: t.Optional[str] = None,
+        content_type: str = "application/json",
+        accept: str = "application/json",
+        case_insensitive_headers: bool = False,
+    ) -> TServiceConnectorResponse:
+        r = await self._get_service_response(
+            scopes,
+            url,
+            is_post=is_post,
+            data=data,
+            content_type=content_type,
+            accept=accept,
+        )
+        return {
+            "headers": r.headers if case_insensitive_headers else dict(r.headers),
+            "body": r.json() if r.content else None,
+            "next_page_url": ServiceConnector.get_next_page_url(
+                r.headers.get("link", "")
+            ),
+        }
+
+    async def make_streaming_service_request(
+        self,
+        scopes: t.Sequence[str],
+        url: str,
+        items_key: t.Optional[str] = None,
+        accept: str = "application/json",
+        case_insensitive_headers: bool = False,
+    ) -> TAsyncServiceConnectorStreamResponse:
+        """
+        Same as ServiceConnector.make_streaming_service_request, items are returned by the async iterator.
+        """
+        r = await self._get_service_response(scopes, url, accept=accept, stream=True)
+        return {
+            "headers": r.headers if case_insensitive_headers else dict(r.headers),
+            "items": self._iter_response_items(r, items_key),
+            "next_page_url": ServiceConnector.get_next_page_url(
+                r.headers.get("link", "")
+            ),
+        }
+
+    @staticmethod
+    async def _iter_response_items(
+        r: httpx.Response, items_key: t.Optional[str]
+    ) -> t.AsyncGenerator[t.Any, None]:
+        parser = JsonArrayStreamParser(items_key)
+        try:
+            async for chunk in r.aiter_bytes():
+                for item in parser.feed(chunk):
+                    yield item
+                if parser.is_done():
+                    return
+            for item in parser.close():
+                yield item
+        finally:
+            await r.aclose()
+
+    async def _get_service_response(
+        self,
+        scopes: t.Sequence[str],
+        url: str,
+        *,
+        is_post: bool = False,
+        data: t.Optional[str] = None,
+        content_type: str = "application/json",
+        accept: str = "application/json",
+        stream: bool = False,
+    ) -> httpx.Response:
+        access_token = await self.get_access_token(scopes)
+        headers = {"Authorization": "Bearer " + access_token, "Accept": accept}
+
+        if is_post:
+            headers["Content-Type"] = content_type
+
+        retry_policy = self._service_connector.get_retry_policy()
+        attempt = 0
+        reauthenticated = False
+        while True:
+            rate_limit_delay = await self.run_sync(
+                self._service_connector.get_rate_limit_delay
+            )
+            if rate_limit_delay > 0:
+                await asyncio.sleep(rate_limit_delay)
+            delay: t.Optional[float]
+            try:
+                r = await self._send_service_request(
+                    url, is_post, data, headers, stream
+                )
+            except httpx.TransportError:
+                delay = (
+                    retry_policy.get_retry_delay(attempt, is_post)
+                    if retry_policy
+                    else None
+                )
+                if delay is None:
+                    raise
+            else:
+                if not r.is_error:
+                    break
+                if not reauthenticated and stream and r.status_code in (400, 403):
+                    # "invalid_token" error may be sent in the body, streamed body isn't read yet
+                    await r.aread()
+                if not reauthenticated and ServiceConnector.is_invalid_token_response(
+                    r.status_code, r.headers, lambda: r.text
+                ):
+                    # token was revoked before it expired: get the new one and replay the request once
+                    await r.aclose()
+                    reauthenticated = True
+                    await self.run_sync(
+                        self._service_connector.invalidate_access_token,
+                        scopes,
+                        access_token,
+                    )
+                    access_token = await self.get_access_token(scopes)
+                    headers["Authorization"] = "Bearer " + access_token
+                    continue
+                delay = (
+                    retry_policy.get_retry_delay(
+                        attempt, is_post, r.status_code, r.headers.get("Retry-After")
+                    )
+                    if retry_policy
+                    else None
+                )
+                if delay is None:
+                    raise LtiServiceException(r)
+                await r.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+        return r
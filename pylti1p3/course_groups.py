@@ -1,5 +1,7 @@
+import copy
 import typing as t
 import typing_extensions as te
+from .pagination import iter_pages
 from .utils import add_param_to_url
 from .service_connector import ServiceConnector
 
@@ -58,6 +60,15 @@ class CourseGroupsService:
         self._service_connector = service_connector
         self._service_data = groups_service_data
 
+    def copy_for_background(self) -> "CourseGroupsService":
+        """
+        Copy which may be used by the background thread (i.e. to prefetch pages) while the current request goes on.
+        """
+        # pylint: disable=protected-access
+        service = copy.copy(self)
+        service._service_connector = self._service_connector.copy_for_background()
+        return service
+
     def get_page(
         self, data_url: str, data_key: str = "groups"
     ) -> t.Tuple[list, t.Optional[str]]:
@@ -76,14 +87,16 @@ class CourseGroupsService:
         data_body = t.cast(t.Any, data.get("body", {}))
         return data_body.get(data_key, []), data["next_page_url"]
 
-    def get_groups(self, user_id=None):
+    def get_groups(self, user_id=None, prefetch=0):
         groups_res_lst = []
         groups_url = self._service_data.get("context_groups_url")
         if user_id:
             groups_url = add_param_to_url(groups_url, "user_id", user_id)
 
-        while groups_url:
-            groups, groups_url = self.get_page(groups_url, data_key="groups")
+        service = self.copy_for_background() if prefetch > 0 else self
+        for groups in iter_pages(
+            lambda url: service.get_page(url, data_key="groups"), groups_url, prefetch
+        ):
             groups_res_lst.extend(groups)
 
         return groups_res_lst
@@ -91,12 +104,14 @@ class CourseGroupsService:
     def has_sets(self):
         return "context_group_sets_url" in self._service_data
 
-    def get_sets(self, include_groups=False):
+    def get_sets(self, include_groups=False, prefetch=0):
         sets_res_lst = []
         sets_url = self._service_data.get("context_group_sets_url")
 
-        while sets_url:
-            sets, sets_url = self.get_page(sets_url, data_key="sets")
+        service = self.copy_for_background() if prefetch > 0 else self
+        for sets in iter_pages(
+            lambda url: service.get_page(url, data_key="sets"), sets_url, prefetch
+        ):
             sets_res_lst.extend(sets)
 
         if include_groups and sets_res_lst:
@@ -105,7 +120,7 @@ class CourseGroupsService:
                 set_id_to_index[s["id"]] = i
                 sets_res_lst[i]["groups"] = []
 
-            groups = self.get_groups()
+            groups = self.get_groups(prefetch=prefetch)
             for group in groups:
                 set_id = group.get("set_id")
                 if set_id and set_id in set_id_to_index:
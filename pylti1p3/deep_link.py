@@ -73,7 +73,7 @@ class DeepLink:
             headers = {"kid": kid}
         encoded_jwt = jwt.encode(
             message,
-            self._registration.get_tool_private_key(),
+            self._registration.get_tool_signing_key(),
             algorithm="RS256",
             headers=headers,
         )
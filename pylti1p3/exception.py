@@ -1,4 +1,4 @@
-import requests
+import typing as t
 
 
 class LtiException(Exception):
@@ -9,8 +9,13 @@ class OIDCException(Exception):
     pass
 
 
+class LtiRateLimitException(LtiException):
+    pass
+
+
 class LtiServiceException(LtiException):
-    def __init__(self, response: requests.Response):
+    def __init__(self, response: t.Any):
+        # requests.Response or httpx.Response (async services)
         msg = f"HTTP response [{response.url}]: {str(response.status_code)} - {response.text}"
         super().__init__(msg)
         self.response = response
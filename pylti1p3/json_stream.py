@@ -0,0 +1,178 @@
+import codecs
+import json
+import re
+import typing as t
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER_CHARS = "0123456789+-.eE"
+
+# parser states
+_START = "start"
+_KEY = "key"
+_COLON = "colon"
+_VALUE = "value"
+_ARRAY = "array"
+_ITEM = "item"
+_AFTER_ITEM = "after_item"
+_DONE = "done"
+
+
+class JsonArrayStreamParser:
+    """
+    Incremental parser of the JSON array from the response body which comes in chunks. Items are returned
+    as soon as they are received, so only the current chunk and the current item are kept in memory.
+
+    If items_key is passed, the body is expected to be an object and the array is taken from the items_key
+    field (i.e. "members" of the NRPS response), otherwise the body itself should be an array.
+    """
+
+    _items_key: t.Optional[str]
+    _state: str
+    _buffer: str
+    _key: t.Optional[str] = None
+
+    def __init__(self, items_key: t.Optional[str] = None):
+        self._items_key = items_key
+        self._state = _START
+        self._buffer = ""
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+
+    def is_done(self) -> bool:
+        return self._state == _DONE
+
+    def feed(self, chunk: bytes) -> t.List[t.Any]:
+        """
+        Add the next chunk of the body.
+
+        :param chunk: bytes
+        :return: list with the items which were completed by this chunk
+        """
+        if self._state == _DONE:
+            return []
+        self._buffer += self._text_decoder.decode(chunk)
+        return self._parse(final=False)
+
+    def close(self) -> t.List[t.Any]:
+        """
+        Finish parsing after the whole body was received.
+
+        :return: list with the rest of items
+        """
+        if self._state == _DONE:
+            return []
+        self._buffer += self._text_decoder.decode(b"", final=True)
+        items = self._parse(final=True)
+        if self._state == _START and not self._buffer.strip():
+            # empty body
+            self._state = _DONE
+        if self._state != _DONE:
+            raise ValueError("Unexpected end of JSON data")
+        return items
+
+    def _decode(self, pos: int, final: bool) -> t.Tuple[t.Any, int]:
+        """
+        Decode the JSON value which starts at pos. Returns (None, -1) if more data is needed.
+        """
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            return None, -1
+        if (
+            not final
+            and isinstance(value, (int, float))
+            and (end == len(self._buffer) or self._buffer[end] in _NUMBER_CHARS)
+        ):
+            # number at the end of the chunk may be continued by the next one
+            return None, -1
+        return value, end
+
+    def _expect(self, pos: int, chars: str) -> str:
+        char = self._buffer[pos]
+        if char not in chars:
+            raise ValueError(
+                f"Unexpected character {char!r} in JSON data, expected one of {chars!r}"
+            )
+        return char
+
+    def _parse(self, final: bool) -> t.List[t.Any]:
+        # pylint: disable=too-many-branches, too-many-statements
+        items = []
+        pos = 0
+        while self._state != _DONE:
+            pos = _WHITESPACE.match(self._buffer, pos).end()  # type: ignore
+            if pos >= len(self._buffer):
+                break
+
+            if self._state == _START:
+                if self._items_key is None:
+                    self._expect(pos, "[")
+                    self._state = _ITEM
+                else:
+                    self._expect(pos, "{")
+                    self._state = _KEY
+                pos += 1
+            elif self._state == _KEY:
+                char = self._expect(pos, '",}')
+                if char == ",":
+                    pos += 1
+                elif char == "}":
+                    # there is no items in the body
+                    self._state = _DONE
+                else:
+                    self._key, end = self._decode(pos, final)
+                    if end < 0:
+                        break
+                    pos = end
+                    self._state = _COLON
+            elif self._state == _COLON:
+                self._expect(pos, ":")
+                pos += 1
+                self._state = _ARRAY if self._key == self._items_key else _VALUE
+            elif self._state == _VALUE:
+                # skip fields which aren't needed
+                _, end = self._decode(pos, final)
+                if end < 0:
+                    break
+                pos = end
+                self._state = _KEY
+            elif self._state == _ARRAY:
+                self._expect(pos, "[")
+                pos += 1
+                self._state = _ITEM
+            elif self._state == _ITEM and self._buffer[pos] == "]":
+                self._state = _DONE
+            elif self._state == _ITEM:
+                item, end = self._decode(pos, final)
+                if end < 0:
+                    break
+                items.append(item)
+                pos = end
+                self._state = _AFTER_ITEM
+            elif self._state == _AFTER_ITEM:
+                char = self._expect(pos, ",]")
+                pos += 1
+                self._state = _ITEM if char == "," else _DONE
+
+        self._buffer = "" if self._state == _DONE else self._buffer[pos:]
+        return items
+
+
+def iter_json_array_items(
+    chunks: t.Iterable[bytes], items_key: t.Optional[str] = None
+) -> t.Iterator[t.Any]:
+    """
+    Iterate over the items of the JSON array from the body which comes in chunks.
+
+    :param chunks: iterable with the body chunks
+    :param items_key: field with the array if the body is an object
+    :return: iterator
+    """
+    parser = JsonArrayStreamParser(items_key)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+        if parser.is_done():
+            return
+    yield from parser.close()
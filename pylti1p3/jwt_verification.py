@@ -0,0 +1,245 @@
+import base64
+import json
+import time
+import typing as t
+from abc import ABCMeta, abstractmethod
+
+import jwt  # type: ignore
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec, padding, rsa
+from cryptography.hazmat.primitives.asymmetric.utils import encode_dss_signature
+from jwt.algorithms import get_default_algorithms  # type: ignore
+
+
+def _b64_to_int(val: str) -> int:
+    return int.from_bytes(base64.urlsafe_b64decode(val + "=" * (-len(val) % 4)), "big")
+
+
+class JwtVerifier:
+    """
+    Backend which converts platform's JWK to the key object and verifies JWT signature with it.
+    Key objects are created only once per key (see PublicKeyCache), so load_public_key should be
+    a static method: the same function object is used as a part of the cache entry.
+    """
+
+    __metaclass__ = ABCMeta
+
+    @staticmethod
+    @abstractmethod
+    def load_public_key(jwk: t.Mapping[str, t.Any], alg: str) -> t.Any:
+        raise NotImplementedError
+
+    @abstractmethod
+    def verify(
+        self, signing_input: bytes, signature: bytes, public_key: t.Any, alg: str
+    ) -> bool:
+        raise NotImplementedError
+
+
+class PyJwtVerifier(JwtVerifier):
+    """
+    Verifies signature with PyJWT algorithm objects (supports all algorithms known to PyJWT).
+    """
+
+    @staticmethod
+    def load_public_key(jwk: t.Mapping[str, t.Any], alg: str) -> t.Any:
+        algorithm = get_default_algorithms().get(alg)
+        if algorithm is None:
+            raise ValueError(f"Unsupported algorithm: {alg}")
+        return algorithm.from_jwk(json.dumps(jwk))
+
+    def verify(
+        self, signing_input: bytes, signature: bytes, public_key: t.Any, alg: str
+    ) -> bool:
+        algorithm = get_default_algorithms().get(alg)
+        if algorithm is None:
+            raise jwt.exceptions.InvalidAlgorithmError("Algorithm not supported")
+        return algorithm.verify(signing_input, public_key, signature)
+
+
+class PyJWKVerifier(JwtVerifier):
+    """
+    Adapter for PyJWT's PyJWK objects (PyJWT >= 2.0).
+    """
+
+    @staticmethod
+    def load_public_key(jwk: t.Mapping[str, t.Any], alg: str) -> t.Any:
+        return jwt.PyJWK(dict(jwk), algorithm=alg)
+
+    def verify(
+        self, signing_input: bytes, signature: bytes, public_key: t.Any, alg: str
+    ) -> bool:
+        return public_key.Algorithm.verify(signing_input, public_key.key, signature)
+
+
+class CryptographyJwtVerifier(PyJwtVerifier):
+    """
+    Default backend: RS256/RS384/RS512 and ES256/ES384/ES512 signatures are verified directly
+    against preloaded cryptography public keys. Other algorithms are passed to PyJWT.
+    """
+
+    _rsa_hashes: t.Dict[str, t.Callable[[], hashes.HashAlgorithm]] = {
+        "RS256": hashes.SHA256,
+        "RS384": hashes.SHA384,
+        "RS512": hashes.SHA512,
+    }
+    # alg: (curve name, curve, hash, size of r and s in bytes)
+    _ec_params: t.Dict[
+        str,
+        t.Tuple[
+            str,
+            t.Callable[[], ec.EllipticCurve],
+            t.Callable[[], hashes.HashAlgorithm],
+            int,
+        ],
+    ] = {
+        "ES256": ("P-256", ec.SECP256R1, hashes.SHA256, 32),
+        "ES384": ("P-384", ec.SECP384R1, hashes.SHA384, 48),
+        "ES512": ("P-521", ec.SECP521R1, hashes.SHA512, 66),
+    }
+
+    @staticmethod
+    def load_public_key(jwk: t.Mapping[str, t.Any], alg: str) -> t.Any:
+        if alg in CryptographyJwtVerifier._rsa_hashes:
+            if jwk.get("kty") != "RSA":
+                raise ValueError("Not an RSA key")
+            return rsa.RSAPublicNumbers(
+                _b64_to_int(jwk["e"]), _b64_to_int(jwk["n"])
+            ).public_key()
+        if alg in CryptographyJwtVerifier._ec_params:
+            crv, curve, _, _ = CryptographyJwtVerifier._ec_params[alg]
+            if jwk.get("kty") != "EC" or jwk.get("crv") != crv:
+                raise ValueError(f"Not an {crv} key")
+            return ec.EllipticCurvePublicNumbers(
+                _b64_to_int(jwk["x"]), _b64_to_int(jwk["y"]), curve()
+            ).public_key()
+        return PyJwtVerifier.load_public_key(jwk, alg)
+
+    def verify(
+        self, signing_input: bytes, signature: bytes, public_key: t.Any, alg: str
+    ) -> bool:
+        try:
+            if alg in self._rsa_hashes:
+                public_key.verify(
+                    signature,
+                    signing_input,
+                    padding.PKCS1v15(),
+                    self._rsa_hashes[alg](),
+                )
+                return True
+            if alg in self._ec_params:
+                _, _, hash_alg, size = self._ec_params[alg]
+                if len(signature) != 2 * size:
+                    return False
+                der_signature = encode_dss_signature(
+                    int.from_bytes(signature[:size], "big"),
+                    int.from_bytes(signature[size:], "big"),
+                )
+                public_key.verify(der_signature, signing_input, ec.ECDSA(hash_alg()))
+                return True
+        except InvalidSignature:
+            return False
+        return super().verify(signing_input, signature, public_key, alg)
+
+
+DEFAULT_JWT_VERIFIER: JwtVerifier = CryptographyJwtVerifier()
+
+
+def verify_jwt_signature(
+    jwt_parts: t.Sequence[str],
+    public_key: t.Any,
+    alg: str,
+    options: t.Optional[t.Mapping[str, t.Any]] = None,
+    verifier: t.Optional[JwtVerifier] = None,
+) -> None:
+    """
+    Verify signature over the segments of the already split JWT. This is the same check as jwt.decode does
+    but the token isn't decoded and parsed again.
+
+    :param jwt_parts: list with the header, body and signature segments
+    :param public_key: public key object created by verifier.load_public_key
+    :param alg: JWT algorithm
+    :param options: jwt.decode options
+    :param verifier: JwtVerifier instance (CryptographyJwtVerifier by default)
+    """
+    # pylint: disable=too-many-arguments
+    if options and not options.get("verify_signature", True):
+        return
+    if verifier is None:
+        verifier = DEFAULT_JWT_VERIFIER
+    try:
+        signature = base64.urlsafe_b64decode(
+            jwt_parts[2] + "=" * (-len(jwt_parts[2]) % 4)
+        )
+    except (TypeError, ValueError) as e:
+        raise jwt.DecodeError("Invalid crypto padding") from e
+    signing_input = (jwt_parts[0] + "." + jwt_parts[1]).encode("utf-8")
+    if not verifier.verify(signing_input, signature, public_key, alg):
+        raise jwt.exceptions.InvalidSignatureError("Signature verification failed")
+
+
+def validate_jwt_claims(
+    payload: t.Mapping[str, t.Any], options: t.Optional[t.Mapping[str, t.Any]] = None
+) -> None:
+    """
+    Validate registered claims the same way as jwt.decode does (with the same error messages).
+
+    :param payload: decoded JWT body
+    :param options: jwt.decode options
+    """
+    # pylint: disable=too-many-branches
+    options = options or {}
+    verify_signature = options.get("verify_signature", True)
+
+    for claim in options.get("require", []):
+        if payload.get(claim) is None:
+            raise jwt.exceptions.MissingRequiredClaimError(claim)
+
+    now = time.time()
+
+    if "iat" in payload and options.get("verify_iat", verify_signature):
+        try:
+            iat = int(payload["iat"])
+        except (ValueError, TypeError, OverflowError):
+            raise jwt.exceptions.InvalidIssuedAtError(
+                "Issued At claim (iat) must be an integer."
+            ) from None
+        if iat > now:
+            raise jwt.exceptions.ImmatureSignatureError(
+                "The token is not yet valid (iat)"
+            )
+
+    if "nbf" in payload and options.get("verify_nbf", verify_signature):
+        try:
+            nbf = int(payload["nbf"])
+        except (ValueError, TypeError, OverflowError):
+            raise jwt.DecodeError(
+                "Not Before claim (nbf) must be an integer."
+            ) from None
+        if nbf > now:
+            raise jwt.exceptions.ImmatureSignatureError(
+                "The token is not yet valid (nbf)"
+            )
+
+    if "exp" in payload and options.get("verify_exp", verify_signature):
+        try:
+            exp = int(payload["exp"])
+        except (ValueError, TypeError, OverflowError):
+            raise jwt.DecodeError(
+                "Expiration Time claim (exp) must be an integer."
+            ) from None
+        if exp <= now:
+            raise jwt.ExpiredSignatureError("Signature has expired")
+
+    if options.get("verify_aud", verify_signature) and payload.get("aud"):
+        # audience isn't passed to the validation, so any "aud" claim is invalid
+        raise jwt.InvalidAudienceError("Invalid audience")
+
+    if options.get("verify_sub", verify_signature):
+        if "sub" in payload and not isinstance(payload["sub"], str):
+            raise jwt.InvalidTokenError("Subject must be a string")
+
+    if options.get("verify_jti", verify_signature):
+        if "jti" in payload and not isinstance(payload["jti"], str):
+            raise jwt.InvalidTokenError("JWT ID must be a string")
@@ -0,0 +1,374 @@
+import copy
+import hashlib
+import re
+import threading
+import time
+import typing as t
+from collections import OrderedDict
+
+import requests
+import typing_extensions as te
+from .exception import LtiException
+from .launch_data_storage.base import DisableSessionId, LaunchDataStorage
+from .registration import TKeySet
+from .requests_session import DEFAULT_REQUESTS_SESSION_REGISTRY, RequestsSessionRegistry
+from .single_flight import SingleFlight
+
+TKeySetCacheEntry = te.TypedDict(
+    "TKeySetCacheEntry",
+    {
+        "key_set": TKeySet,
+        "fetched_at": float,
+        "etag": str,
+        "last_modified": str,
+        "max_age": int,
+    },
+    total=False,
+)
+
+
+class KeySetFetcher:
+    """
+    Downloads platform's JWKS and stores it in the (optional) launch data storage.
+    Only one download per key_set_url is in flight per process: concurrent callers wait for
+    the result of the first one. In case if lock_timeout is set the same is guaranteed across
+    processes which share the same data storage (memcache/redis).
+
+    If refresh_after is set, cached key set becomes stale after refresh_after seconds: it is still returned
+    to the callers but the new one is fetched in the background thread. Only a miss (key set is not cached
+    at all or cache_lifetime is over) blocks the caller. Failed background refresh is retried not earlier
+    than in 30 seconds.
+
+    JWT signed with the unknown kid (i.e. platform has rotated its keys) triggers the extra fetch of the
+    cached key set, but not more often than once per refetch_interval seconds per key_set_url.
+    Kids which are still unknown after that are remembered for unknown_kid_lifetime seconds, so tokens
+    with forged kids don't lead to the new requests to the platform.
+
+    If http_caching is enabled, "Cache-Control: max-age" sent by the platform may extend the time during which
+    the key set is fresh (refresh_after or cache_lifetime), but never shortens it. Stale key set is revalidated
+    with the conditional request (If-None-Match/If-Modified-Since). Response "304 Not Modified" just prolongs
+    the cached key set.
+    """
+
+    _requests_session: t.Optional[requests.Session] = None
+    _requests_session_registry: RequestsSessionRegistry = (
+        DEFAULT_REQUESTS_SESSION_REGISTRY
+    )
+    _data_storage: t.Optional[LaunchDataStorage[t.Any]] = None
+    _cache_lifetime: t.Optional[int] = None
+    _lock_timeout: t.Optional[int] = None
+    _refresh_after: t.Optional[int] = None
+    _refetch_interval: int = 60
+    _unknown_kid_lifetime: int = 300
+    _http_caching: bool = True
+    _lock_poll_interval: float = 0.1
+    _fetches: SingleFlight[TKeySet] = SingleFlight()
+    _unknown_kids_max_size: int = 1024
+    _unknown_kids: "OrderedDict[t.Tuple[str, str, str], float]" = OrderedDict()
+    _refetched_at: t.Dict[str, float] = {}
+    _refresh_retry_interval: int = 30
+    _refreshing: t.Set[str] = set()
+    _refresh_failed_at: t.Dict[str, float] = {}
+    _state_lock = threading.Lock()
+
+    def __init__(
+        self,
+        requests_session: t.Optional[requests.Session] = None,
+        *,
+        data_storage: t.Optional[LaunchDataStorage[t.Any]] = None,
+        cache_lifetime: t.Optional[int] = None,
+        lock_timeout: t.Optional[int] = None,
+        refresh_after: t.Optional[int] = None,
+        refetch_interval: int = 60,
+        unknown_kid_lifetime: int = 300,
+        http_caching: bool = True,
+    ):
+        # pylint: disable=too-many-arguments
+        self._requests_session = requests_session
+        self._data_storage = data_storage
+        self._cache_lifetime = cache_lifetime
+        self._lock_timeout = lock_timeout
+        self._refresh_after = refresh_after
+        self._refetch_interval = refetch_interval
+        self._unknown_kid_lifetime = unknown_kid_lifetime
+        self._http_caching = http_caching
+
+    def set_requests_session_registry(
+        self, requests_session_registry: RequestsSessionRegistry
+    ) -> "KeySetFetcher":
+        self._requests_session_registry = requests_session_registry
+        return self
+
+    def get_requests_session(self, url: str) -> requests.Session:
+        if self._requests_session:
+            return self._requests_session
+        return self._requests_session_registry.get_session(url)
+
+    def set_data_storage(
+        self, data_storage: t.Optional[LaunchDataStorage[t.Any]]
+    ) -> "KeySetFetcher":
+        self._data_storage = data_storage
+        return self
+
+    @staticmethod
+    def get_cache_key(key_set_url: str) -> str:
+        return "key-set-url-" + hashlib.md5(key_set_url.encode("utf-8")).hexdigest()
+
+    def fetch(self, key_set_url: str) -> TKeySet:
+        entry = self._get_cache_entry(key_set_url)
+        if entry and (not self._is_stale(entry) or self._refresh_after is not None):
+            if self._is_stale(entry):
+                self._refresh_in_background(key_set_url)
+            return entry["key_set"]
+        return self._fetches.do(key_set_url, lambda: self._fetch_and_save(key_set_url))
+
+    def _get_cache_entry(self, key_set_url: str) -> t.Optional[TKeySetCacheEntry]:
+        if not self._data_storage:
+            return None
+        with DisableSessionId(self._data_storage):
+            value = self._data_storage.get_value(self.get_cache_key(key_set_url))
+        if not value:
+            return None
+        if "key_set" not in value:
+            # value was saved by the previous version of the library
+            return {"key_set": value, "fetched_at": time.time()}
+        return value
+
+    def _get_fresh_lifetime(self, entry: TKeySetCacheEntry) -> t.Optional[int]:
+        lifetime = (
+            self._refresh_after
+            if self._refresh_after is not None
+            else self._cache_lifetime
+        )
+        if lifetime is None:
+            return None
+        # platform's max-age may only extend the configured lifetime: a lot of platforms
+        # send "max-age=0" by default, which would mean a request per launch otherwise
+        return max(lifetime, entry.get("max_age", 0))
+
+    def _is_stale(self, entry: TKeySetCacheEntry) -> bool:
+        fresh_lifetime = self._get_fresh_lifetime(entry)
+        if fresh_lifetime is None:
+            return False
+        return time.time() - entry["fetched_at"] >= fresh_lifetime
+
+    def _get_cached_key_set(self, key_set_url: str) -> t.Optional[TKeySet]:
+        entry = self._get_cache_entry(key_set_url)
+        if entry and not self._is_stale(entry):
+            return entry["key_set"]
+        return None
+
+    def _save_cache_entry(self, key_set_url: str, entry: TKeySetCacheEntry) -> None:
+        if not self._data_storage:
+            return
+        cache_lifetime = self._cache_lifetime
+        if cache_lifetime is not None:
+            cache_lifetime = max(cache_lifetime, entry.get("max_age", 0))
+        with DisableSessionId(self._data_storage):
+            self._data_storage.set_value(
+                self.get_cache_key(key_set_url), entry, cache_lifetime
+            )
+
+    def _refresh_in_background(self, key_set_url: str) -> None:
+        with self._state_lock:
+            if key_set_url in self._refreshing or self._fetches.is_in_flight(
+                key_set_url
+            ):
+                return
+            failed_at = self._refresh_failed_at.get(key_set_url)
+            if (
+                failed_at is not None
+                and time.time() - failed_at < self._refresh_retry_interval
+            ):
+                # platform is down, don't start a new thread per launch
+                return
+            # marked before the thread is started, so a burst of launches starts only one thread
+            self._refreshing.add(key_set_url)
+        # data storage is bound to the current request, so the background thread works with its own copy
+        fetcher = copy.copy(self).set_data_storage(copy.copy(self._data_storage))
+        # pylint: disable=protected-access
+        thread = threading.Thread(
+            target=fetcher._refresh_and_release,
+            args=(key_set_url,),
+            daemon=True,
+        )
+        try:
+            thread.start()
+        except RuntimeError:
+            # can't start new thread
+            with self._state_lock:
+                self._refreshing.discard(key_set_url)
+            raise
+
+    def _refresh_and_release(self, key_set_url: str) -> None:
+        is_refreshed = False
+        try:
+            is_refreshed = self.refresh(key_set_url)
+        finally:
+            with self._state_lock:
+                self._refreshing.discard(key_set_url)
+                if is_refreshed:
+                    self._refresh_failed_at.pop(key_set_url, None)
+                else:
+                    self._refresh_failed_at[key_set_url] = time.time()
+
+    def refresh(self, key_set_url: str) -> bool:
+        try:
+            self._fetches.do(key_set_url, lambda: self._fetch_and_save(key_set_url))
+        except Exception:  # pylint: disable=broad-except
+            # stale key set is still served, the next attempt will be made after refresh_retry_interval
+            return False
+        return True
+
+    def refetch_for_unknown_kid(
+        self, key_set_url: str, kid: str, alg: str
+    ) -> t.Optional[TKeySet]:
+        """
+        Fetch the new version of the cached key set because JWT kid wasn't found in it.
+        Returns None in case if fetch isn't allowed at the moment (kid is known as absent
+        or the key set was already refetched less than refetch_interval seconds ago).
+        """
+        if not self._data_storage:
+            # key set isn't cached, so it is already up to date
+            return None
+        now = time.time()
+        with self._state_lock:
+            unknown_kid_expires_at = self._unknown_kids.get((key_set_url, kid, alg))
+            if unknown_kid_expires_at is not None:
+                if unknown_kid_expires_at > now:
+                    return None
+                del self._unknown_kids[(key_set_url, kid, alg)]
+            refetched_at = self._refetched_at.get(key_set_url)
+            if refetched_at is not None and now - refetched_at < self._refetch_interval:
+                return None
+            self._refetched_at[key_set_url] = now
+        entry = self._get_cache_entry(key_set_url)
+        # own single-flight key: joining an in-flight regular fetch (e.g. the background refresh
+        # of the stale key set) could return the key set downloaded before the rotation
+        return self._fetches.do(
+            (key_set_url, "refetch"),
+            lambda: self._download_and_save(key_set_url, entry),
+        )
+
+    def add_unknown_kid(self, key_set_url: str, kid: str, alg: str) -> None:
+        with self._state_lock:
+            self._unknown_kids[(key_set_url, kid, alg)] = (
+                time.time() + self._unknown_kid_lifetime
+            )
+            self._unknown_kids.move_to_end((key_set_url, kid, alg))
+            while len(self._unknown_kids) > self._unknown_kids_max_size:
+                self._unknown_kids.popitem(last=False)
+
+    def is_unknown_kid(self, key_set_url: str, kid: str, alg: str) -> bool:
+        with self._state_lock:
+            expires_at = self._unknown_kids.get((key_set_url, kid, alg))
+        return expires_at is not None and expires_at > time.time()
+
+    def _download_and_save(
+        self, key_set_url: str, entry: t.Optional[TKeySetCacheEntry] = None
+    ) -> TKeySet:
+        entry = self._download(key_set_url, entry)
+        self._save_cache_entry(key_set_url, entry)
+        return entry["key_set"]
+
+    def _fetch_and_save(self, key_set_url: str) -> TKeySet:
+        # the key set could be saved by another thread while we waited for our turn
+        entry = self._get_cache_entry(key_set_url)
+        if entry and not self._is_stale(entry):
+            return entry["key_set"]
+
+        if not self._data_storage or not self._lock_timeout:
+            return self._download_and_save(key_set_url, entry)
+
+        lock_key = self.get_cache_key(key_set_url) + "-lock"
+        with DisableSessionId(self._data_storage):
+            is_locked = self._data_storage.add_value(lock_key, True, self._lock_timeout)
+        if not is_locked:
+            # another process is fetching the same key set, wait until it is saved
+            public_key_set = self._wait_for_key_set(key_set_url)
+            if public_key_set:
+                return public_key_set
+
+        try:
+            return self._download_and_save(key_set_url, entry)
+        finally:
+            if is_locked:
+                with DisableSessionId(self._data_storage):
+                    self._data_storage.remove_value(lock_key)
+
+    def _wait_for_key_set(self, key_set_url: str) -> t.Optional[TKeySet]:
+        assert self._lock_timeout is not None
+        deadline = time.monotonic() + self._lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self._lock_poll_interval)
+            public_key_set = self._get_cached_key_set(key_set_url)
+            if public_key_set:
+                return public_key_set
+        return None
+
+    def download(self, key_set_url: str) -> TKeySet:
+        return self._download(key_set_url)["key_set"]
+
+    def _download(
+        self, key_set_url: str, entry: t.Optional[TKeySetCacheEntry] = None
+    ) -> TKeySetCacheEntry:
+        headers = {}
+        if entry and self._http_caching:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            resp = self.get_requests_session(key_set_url).get(
+                key_set_url, headers=headers
+            )
+        except requests.exceptions.RequestException as e:
+            raise LtiException(f"Error during fetch URL {key_set_url}: {str(e)}") from e
+
+        if entry and headers and resp.status_code == 304:
+            # key set wasn't changed, there is no need to parse it again
+            new_entry: TKeySetCacheEntry = {
+                "key_set": entry["key_set"],
+                "fetched_at": time.time(),
+            }
+            for key in ("etag", "last_modified", "max_age"):
+                if key in entry:
+                    new_entry[key] = entry[key]  # type: ignore
+            self._set_http_cache_params(new_entry, resp)
+            return new_entry
+
+        try:
+            public_key_set = resp.json()
+        except ValueError as e:
+            raise LtiException(
+                f"Invalid response from {key_set_url}. Must be JSON: {resp.text}"
+            ) from e
+        new_entry = {"key_set": public_key_set, "fetched_at": time.time()}
+        self._set_http_cache_params(new_entry, resp)
+        return new_entry
+
+    def _set_http_cache_params(
+        self, entry: TKeySetCacheEntry, resp: requests.Response
+    ) -> None:
+        if not self._http_caching:
+            return
+        etag = resp.headers.get("ETag")
+        if etag:
+            entry["etag"] = etag
+        last_modified = resp.headers.get("Last-Modified")
+        if last_modified:
+            entry["last_modified"] = last_modified
+        max_age = self.get_max_age(resp.headers)
+        if max_age is not None:
+            entry["max_age"] = max_age
+
+    @staticmethod
+    def get_max_age(headers: t.Mapping[str, str]) -> t.Optional[int]:
+        match = re.search(
+            r"(?:^|[,\s])max-age\s*=\s*\"?(\d+)", headers.get("Cache-Control", "")
+        )
+        if not match:
+            return None
+        age = headers.get("Age", "0")
+        return max(int(match.group(1)) - (int(age) if age.isdigit() else 0), 0)
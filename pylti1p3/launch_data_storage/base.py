@@ -55,6 +55,30 @@ class LaunchDataStorage(t.Generic[T]):
     def check_value(self, key: str) -> bool:
         raise NotImplementedError
 
+    def add_value(self, key: str, value: T, exp: t.Optional[int] = None) -> bool:
+        """
+        Set value only if the key doesn't exist yet. Returns True if the value was set.
+        This default implementation isn't atomic, storages which support atomic "add"
+        operation should override it.
+        """
+        if self.check_value(key):
+            return False
+        self.set_value(key, value, exp)
+        return True
+
+    def incr_value(self, key: str, exp: t.Optional[int] = None) -> int:
+        """
+        Increment the counter (key which doesn't exist yet is counted from 0). Returns the new value.
+        This default implementation isn't atomic, storages which support atomic "incr"
+        operation should override it.
+        """
+        value = int(t.cast(t.Any, self.get_value(key)) or 0) + 1
+        self.set_value(key, t.cast(T, value), exp)
+        return value
+
+    def remove_value(self, key: str) -> None:
+        raise NotImplementedError
+
 
 class DisableSessionId:
     _session_id: t.Optional[str] = None
@@ -39,5 +39,26 @@ class CacheDataStorage(LaunchDataStorage[T], t.Generic[T]):
         key = self._prepare_key(key)
         return self._get_cache().get(key) is not None
 
+    def add_value(self, key: str, value: T, exp: t.Optional[int] = None) -> bool:
+        cache = self._get_cache()
+        if not hasattr(cache, "add"):
+            return super().add_value(key, value, exp)
+        key = self._prepare_key(key)
+        return bool(cache.add(key, value, exp))
+
+    def incr_value(self, key: str, exp: t.Optional[int] = None) -> int:
+        cache = self._get_cache()
+        # Django cache has "incr", Flask-Caching has "inc"
+        incr_name = "incr" if hasattr(cache, "incr") else "inc"
+        if not hasattr(cache, incr_name) or not hasattr(cache, "add"):
+            return super().incr_value(key, exp)
+        key = self._prepare_key(key)
+        cache.add(key, 0, exp)
+        return int(getattr(cache, incr_name)(key) or 0)
+
+    def remove_value(self, key: str) -> None:
+        key = self._prepare_key(key)
+        self._get_cache().delete(key)
+
     def can_set_keys_expiration(self) -> bool:
         return True
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+import threading
+import time
+import typing as t
+import uuid
+from collections import OrderedDict
+
+from .base import LaunchDataStorage
+
+T = t.TypeVar("T")
+
+
+class MmapFileDataStorage(LaunchDataStorage[T], t.Generic[T]):
+    """
+    Storage which keeps every value in its own file inside the directory shared by all workers
+    on the host (tmpfs like /dev/shm is the best choice). Files are read through the memory map
+    and written to the temporary file first which then atomically replaces the old one, so readers
+    never see partially written values. It is intended for the data shared by all workers, i.e.
+    platform key sets:
+
+        message_launch.set_public_key_caching(MmapFileDataStorage("/dev/shm/lti1p3"), cache_lifetime=7200)
+
+    Values must be JSON-serializable. Parsed values are cached until the file is replaced,
+    so the returned values are shared between readers and shouldn't be modified.
+    """
+
+    _path: str
+    _max_cache_size: int = 256
+    _parsed: "OrderedDict[str, t.Tuple[t.Tuple[int, int, int], t.Dict[str, t.Any]]]"
+
+    def __init__(self, path: str, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._path = path
+        self._parsed = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+    def get_session_cookie_name(self) -> None:
+        return None
+
+    def get_path(self) -> str:
+        return self._path
+
+    def _get_file_path(self, key: str) -> str:
+        key = self._prepare_key(key)
+        return os.path.join(
+            self._path, hashlib.md5(key.encode("utf-8")).hexdigest() + ".json"
+        )
+
+    def _read_file(self, file_path: str) -> t.Optional[t.Dict[str, t.Any]]:
+        try:
+            with open(file_path, "rb") as f:
+                stat = os.fstat(f.fileno())
+                if stat.st_size == 0:
+                    return None
+                # file is never changed in place, it is replaced with the new one
+                version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+                with self._lock:
+                    cached = self._parsed.get(file_path)
+                if cached is not None and cached[0] == version:
+                    data = cached[1]
+                else:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        # decode the mapped memory without copying it to bytes first
+                        data = json.loads(str(mm, "utf-8"))
+                    self._cache_parsed(file_path, version, data)
+        except (OSError, ValueError):
+            return None
+        exp = data.get("exp")
+        if exp is not None and exp <= time.time():
+            return None
+        return data
+
+    def _cache_parsed(
+        self, file_path: str, version: t.Tuple[int, int, int], data: t.Dict[str, t.Any]
+    ) -> None:
+        with self._lock:
+            self._parsed[file_path] = (version, data)
+            self._parsed.move_to_end(file_path)
+            while len(self._parsed) > self._max_cache_size:
+                self._parsed.popitem(last=False)
+
+    def _write_file(
+        self, file_path: str, value: T, exp: t.Optional[int], replace: bool = True
+    ) -> bool:
+        data = json.dumps(
+            {"value": value, "exp": time.time() + exp if exp else None}
+        ).encode("utf-8")
+        fd, tmp_path = tempfile.mkstemp(dir=self._path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            if replace:
+                os.replace(tmp_path, file_path)
+                return True
+            try:
+                # unlike os.replace, os.link fails if the file already exists
+                os.link(tmp_path, file_path)
+                return True
+            except FileExistsError:
+                return False
+        finally:
+            self._remove_file(tmp_path)
+
+    def get_value(self, key: str) -> T:
+        data = self._read_file(self._get_file_path(key))
+        return data["value"] if data else None  # type: ignore
+
+    def set_value(self, key: str, value: T, exp: t.Optional[int] = None) -> None:
+        self._write_file(self._get_file_path(key), value, exp)
+
+    def check_value(self, key: str) -> bool:
+        return self._read_file(self._get_file_path(key)) is not None
+
+    def add_value(self, key: str, value: T, exp: t.Optional[int] = None) -> bool:
+        file_path = self._get_file_path(key)
+        if (
+            os.path.exists(file_path)
+            and self._read_file(file_path) is None
+            and not self._remove_expired_file(file_path)
+        ):
+            return False
+        return self._write_file(file_path, value, exp, replace=False)
+
+    def _remove_expired_file(self, file_path: str) -> bool:
+        """
+        Another worker may replace the expired file at the same moment, so the file is moved away
+        atomically and checked again: the fresh value which was moved by mistake is put back.
+
+        :return: False if the file holds the fresh value
+        """
+        stale_path = file_path + "." + uuid.uuid4().hex + ".stale"
+        try:
+            os.rename(file_path, stale_path)
+        except FileNotFoundError:
+            # removed by another worker
+            return True
+        try:
+            if self._read_file(stale_path) is None:
+                return True
+            try:
+                os.link(stale_path, file_path)
+            except FileExistsError:
+                pass
+            return False
+        finally:
+            self._remove_file(stale_path)
+
+    def remove_value(self, key: str) -> None:
+        self._remove_file(self._get_file_path(key))
+
+    def _remove_file(self, file_path: str) -> None:
+        with self._lock:
+            self._parsed.pop(file_path, None)
+        try:
+            os.unlink(file_path)
+        except FileNotFoundError:
+            pass
+
+    def can_set_keys_expiration(self) -> bool:
+        return True
@@ -0,0 +1,179 @@
+import hashlib
+import threading
+import time
+import typing as t
+from abc import ABCMeta, abstractmethod
+from collections import OrderedDict
+
+from .launch_data_storage.base import DisableSessionId, LaunchDataStorage
+from .lineitem import TLineItem
+
+# property name -> property value -> line item
+TLineItemsIndex = t.Dict[str, t.Dict[str, TLineItem]]
+
+
+class LineItemIndex:
+    """
+    Cache of the context's line items (per tool registration and "lineitems" URL) indexed by id, tag, resourceId
+    and resourceLinkId,
+    so line items are found without walking through all pages of the line items container on every lookup.
+    Index is built with one sweep over all pages and expires after ttl seconds.
+    """
+
+    __metaclass__ = ABCMeta
+    _ttl: int = 300
+    _props: t.Tuple[str, ...] = ("id", "tag", "resourceId", "resourceLinkId")
+
+    def __init__(self, ttl: int = 300):
+        """
+        :param ttl: number of seconds during which the index is used
+        """
+        self._ttl = ttl
+
+    @staticmethod
+    def get_key(
+        issuer: t.Optional[str], client_id: t.Optional[str], lineitems_url: str
+    ) -> str:
+        """
+        Line items of one registration must never be found by another one sharing the same platform URL.
+        """
+        key = str(issuer) + "|" + str(client_id) + "|" + lineitems_url
+        return "lineitems-index-" + hashlib.md5(key.encode("utf-8")).hexdigest()
+
+    def is_indexed(self, prop_name: str) -> bool:
+        return prop_name in self._props
+
+    def build_index(self, lineitems: t.Iterable[TLineItem]) -> TLineItemsIndex:
+        index: TLineItemsIndex = {prop_name: {} for prop_name in self._props}
+        for lineitem in lineitems:
+            self._add_to_index(index, lineitem)
+        return index
+
+    def _add_to_index(self, index: TLineItemsIndex, lineitem: TLineItem) -> None:
+        for prop_name in self._props:
+            prop_value = lineitem.get(prop_name)
+            if prop_value is not None:
+                # first line item wins as it would be when searching page by page
+                index[prop_name].setdefault(str(prop_value), lineitem)
+
+    @staticmethod
+    def find(
+        index: TLineItemsIndex, prop_name: str, prop_value: t.Any
+    ) -> t.Optional[TLineItem]:
+        return index.get(prop_name, {}).get(str(prop_value))
+
+    def get_index(self, key: str) -> t.Optional[TLineItemsIndex]:
+        value = self.load_index(key)
+        # storage may not support keys expiration
+        if value is None or value[1] <= time.time():
+            return None
+        return value[0]
+
+    def set_lineitems(
+        self, key: str, lineitems: t.Iterable[TLineItem]
+    ) -> TLineItemsIndex:
+        """
+        Save the index built from all line items of the context.
+
+        :param key: index key (see get_key)
+        :param lineitems: all line items
+        :return: index
+        """
+        index = self.build_index(lineitems)
+        self.save_index(key, index, time.time() + self._ttl)
+        return index
+
+    def add_lineitem(self, key: str, lineitem: TLineItem) -> None:
+        """
+        Add the created line item to the existing index (its expiration isn't changed).
+        """
+        value = self.load_index(key)
+        if value is None or value[1] <= time.time():
+            return
+        index, expires_at = value
+        self._add_to_index(index, lineitem)
+        self.save_index(key, index, expires_at)
+
+    def remove_index(self, key: str) -> None:
+        self.delete_index(key)
+
+    @abstractmethod
+    def load_index(self, key: str) -> t.Optional[t.Tuple[TLineItemsIndex, float]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def save_index(self, key: str, index: TLineItemsIndex, expires_at: float) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_index(self, key: str) -> None:
+        raise NotImplementedError
+
+
+class MemoryLineItemIndex(LineItemIndex):
+    """
+    Process-wide bounded cache.
+    """
+
+    _max_size: int
+    _indexes: "OrderedDict[str, t.Tuple[TLineItemsIndex, float]]"
+
+    def __init__(self, ttl: int = 300, max_size: int = 256):
+        super().__init__(ttl)
+        self._max_size = max_size
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load_index(self, key: str) -> t.Optional[t.Tuple[TLineItemsIndex, float]]:
+        with self._lock:
+            value = self._indexes.get(key)
+            if value is None:
+                return None
+            self._indexes.move_to_end(key)
+            return value
+
+    def save_index(self, key: str, index: TLineItemsIndex, expires_at: float) -> None:
+        with self._lock:
+            self._indexes[key] = (index, expires_at)
+            self._indexes.move_to_end(key)
+            while len(self._indexes) > self._max_size:
+                self._indexes.popitem(last=False)
+
+    def delete_index(self, key: str) -> None:
+        with self._lock:
+            self._indexes.pop(key, None)
+
+
+class LaunchDataStorageLineItemIndex(LineItemIndex):
+    """
+    Cache which is kept in the launch data storage (i.e. Django cache, Flask-Caching, ...),
+    so the index built by one worker is used by all workers which share the same cache.
+    """
+
+    _data_storage: LaunchDataStorage[t.Any]
+
+    def __init__(self, data_storage: LaunchDataStorage[t.Any], ttl: int = 300):
+        super().__init__(ttl)
+        self._data_storage = data_storage
+
+    def load_index(self, key: str) -> t.Optional[t.Tuple[TLineItemsIndex, float]]:
+        with DisableSessionId(self._data_storage):
+            value = self._data_storage.get_value(key)
+        if not value:
+            return None
+        return value["index"], value["expires_at"]
+
+    def save_index(self, key: str, index: TLineItemsIndex, expires_at: float) -> None:
+        with DisableSessionId(self._data_storage):
+            self._data_storage.set_value(
+                key,
+                {"index": index, "expires_at": expires_at},
+                exp=max(int(expires_at - time.time()), 1),
+            )
+
+    def delete_index(self, key: str) -> None:
+        with DisableSessionId(self._data_storage):
+            try:
+                self._data_storage.remove_value(key)
+            except NotImplementedError:
+                self._data_storage.set_value(key, None)
@@ -6,17 +6,27 @@ import uuid
 from abc import ABCMeta, abstractmethod
 
 import jwt  # type: ignore
+from jwt.exceptions import InvalidKeyError  # type: ignore
 import requests
 import typing_extensions as te
 from jwcrypto.jwk import JWK  # type: ignore
 
+from .access_token_refresher import AccessTokenRefresher
+from .access_token_store import AccessTokenStore
 from .actions import Action
 from .assignments_grades import AssignmentsGradesService, TAssignmentsGradersData
 from .cookie import CookieService
 from .course_groups import CourseGroupsService, TGroupsServiceData
 from .deep_link import DeepLink, TDeepLinkData
 from .exception import LtiException
-from .launch_data_storage.base import DisableSessionId, LaunchDataStorage
+from .jwt_verification import (
+    DEFAULT_JWT_VERIFIER,
+    JwtVerifier,
+    validate_jwt_claims,
+    verify_jwt_signature,
+)
+from .key_set_fetcher import KeySetFetcher
+from .launch_data_storage.base import LaunchDataStorage
 from .message_validators import get_validators
 from .message_validators.deep_link import DeepLinkMessageValidator
 from .message_validators.privacy_launch import PrivacyLaunchValidator
@@ -32,10 +42,13 @@ from .roles import (
     ObserverRole,
     TransientRole,
 )
-from .registration import Registration, TKeySet
+from .public_key_cache import PublicKeyCache
+from .registration import Registration, TKey, TKeySet
 from .request import Request
 from .session import SessionService
-from .service_connector import ServiceConnector, REQUESTS_USER_AGENT
+from .retry_policy import RetryPolicy
+from .requests_session import DEFAULT_REQUESTS_SESSION_REGISTRY, RequestsSessionRegistry
+from .service_connector import ServiceConnector
 from .tool_config import ToolConfAbstract
 
 
@@ -177,6 +190,8 @@ TJwtData = te.TypedDict(
     total=False,
 )
 
+_URLSAFE_B64_TRANSLATION = str.maketrans("-_", "+/")
+
 REQ = t.TypeVar("REQ", bound=Request)
 TCONF = t.TypeVar("TCONF", bound=ToolConfAbstract)
 SES = t.TypeVar("SES", bound=SessionService)
@@ -190,6 +205,7 @@ class MessageLaunch(t.Generic[REQ, TCONF, SES, COOK]):
     _session_service: SES
     _cookie_service: COOK
     _jwt: TJwtData
+    _jwt_parts: t.Optional[t.List[str]] = None
     _jwt_verify_options: t.Dict[str, bool]
     _registration: t.Optional[Registration]
     _launch_id: str
@@ -199,6 +215,20 @@ class MessageLaunch(t.Generic[REQ, TCONF, SES, COOK]):
     _id_token_hash: t.Optional[str]
     _public_key_cache_data_storage: t.Optional[LaunchDataStorage[t.Any]] = None
     _public_key_cache_lifetime: t.Optional[int] = None
+    _public_key_fetch_lock_timeout: t.Optional[int] = None
+    _public_key_refresh_after: t.Optional[int] = None
+    _public_key_refetch_interval: int = 60
+    _public_key_unknown_kid_lifetime: int = 300
+    _public_key_http_caching: bool = True
+    _parsed_public_key_cache: PublicKeyCache = PublicKeyCache()
+    _jwt_verifier: JwtVerifier = DEFAULT_JWT_VERIFIER
+    _access_token_store: t.Optional[AccessTokenStore] = None
+    _access_token_refresher: t.Optional[AccessTokenRefresher] = None
+    _requests_session: t.Optional[requests.Session] = None
+    _retry_policy: t.Optional[RetryPolicy] = None
+    _requests_session_registry: RequestsSessionRegistry = (
+        DEFAULT_REQUESTS_SESSION_REGISTRY
+    )
 
     def __init__(
         self,
@@ -226,11 +256,9 @@ class MessageLaunch(t.Generic[REQ, TCONF, SES, COOK]):
         self._restored = False
         self._public_key_cache_data_storage = None
         self._public_key_cache_lifetime = None
-        if requests_session:
-            self._requests_session = requests_session
-        else:
-            self._requests_session = requests.Session()
-            self._requests_session.headers["User-Agent"] = REQUESTS_USER_AGENT
+        self._public_key_fetch_lock_timeout = None
+        self._public_key_refresh_after = None
+        self._requests_session = requests_session
 
         if launch_data_storage:
             self.set_launch_data_storage(launch_data_storage)
@@ -359,7 +387,52 @@ class MessageLaunch(t.Generic[REQ, TCONF, SES, COOK]):
 
     def get_service_connector(self) -> ServiceConnector:
         assert self._registration is not None, "Registration not yet set"
-        return ServiceConnector(self._registration, self._requests_session)
+        return (
+            ServiceConnector(
+                self._registration,
+                self._requests_session,
+                access_token_store=self._access_token_store,
+                access_token_refresher=self._access_token_refresher,
+            )
+            .set_requests_session_registry(self._requests_session_registry)
+            .set_retry_policy(self._retry_policy)
+        )
+
+    def set_access_token_store(
+        self, access_token_store: AccessTokenStore
+    ) -> "MessageLaunch":
+        """
+        Set storage of the access tokens for LTI services (process-wide memory store by default).
+        I.e. LaunchDataStorageAccessTokenStore allows to share tokens between all workers.
+        """
+        self._access_token_store = access_token_store
+        return self
+
+    def set_access_token_refresher(
+        self, access_token_refresher: AccessTokenRefresher
+    ) -> "MessageLaunch":
+        """
+        Renew access tokens for LTI services in the background before they expire.
+        """
+        self._access_token_refresher = access_token_refresher
+        return self
+
+    def set_retry_policy(self, retry_policy: RetryPolicy) -> "MessageLaunch":
+        """
+        Retry requests to LTI services after the transient errors (429/502/503/504, connection errors).
+        """
+        self._retry_policy = retry_policy
+        return self
+
+    def set_requests_session_registry(
+        self, requests_session_registry: RequestsSessionRegistry
+    ) -> "MessageLaunch":
+        """
+        Set registry of the pooled sessions which are used for the requests to the platform
+        (if requests_session wasn't passed to the constructor).
+        """
+        self._requests_session_registry = requests_session_registry
+        return self
 
     def has_nrps(self) -> bool:
         """
@@ -545,45 +618,63 @@ class MessageLaunch(t.Generic[REQ, TCONF, SES, COOK]):
         if remainder > 0:
             padlen = 4 - remainder
             val = val + ("=" * padlen)
-        tmp = val.translate(str.maketrans("-_", "+/"))  # type: ignore
-        return base64.b64decode(tmp).decode("utf-8")  # type: ignore
+        tmp = val.translate(_URLSAFE_B64_TRANSLATION)
+        return base64.b64decode(tmp).decode("utf-8")
 
     def set_public_key_caching(
-        self, data_storage: LaunchDataStorage[t.Any], cache_lifetime: int = 7200
+        self,
+        data_storage: LaunchDataStorage[t.Any],
+        cache_lifetime: int = 7200,
+        *,
+        lock_timeout: t.Optional[int] = None,
+        refresh_after: t.Optional[int] = None,
+        refetch_interval: int = 60,
+        unknown_kid_lifetime: int = 300,
+        http_caching: bool = True,
     ):
+        """
+        Store platform's public key set in the data storage.
+
+        :param data_storage: launch data storage (memcache/redis/...)
+        :param cache_lifetime: lifetime of the cached key set (in seconds)
+        :param lock_timeout: if set, only one process at a time will fetch the key set, other processes
+                             wait for the result up to lock_timeout seconds
+        :param refresh_after: if set, the key set which is older than refresh_after seconds is still used
+                              but refreshed in the background (should be less than cache_lifetime)
+        :param refetch_interval: JWT with the unknown kid leads to the new fetch of the key set but not
+                                 more often than once per refetch_interval seconds
+        :param unknown_kid_lifetime: how long (in seconds) kid is remembered as absent after the refetch
+        :param http_caching: respect platform's Cache-Control max-age and revalidate stale key set
+                             with the conditional request (ETag/Last-Modified)
+        """
+        # pylint: disable=too-many-arguments
         self._public_key_cache_data_storage = data_storage
         self._public_key_cache_lifetime = cache_lifetime
-
-    def fetch_public_key(self, key_set_url: str) -> TKeySet:
-        cache_key = (
-            "key-set-url-" + hashlib.md5(key_set_url.encode("utf-8")).hexdigest()
+        self._public_key_fetch_lock_timeout = lock_timeout
+        self._public_key_refresh_after = refresh_after
+        self._public_key_refetch_interval = refetch_interval
+        self._public_key_unknown_kid_lifetime = unknown_kid_lifetime
+        self._public_key_http_caching = http_caching
+
+    def get_key_set_fetcher(self) -> KeySetFetcher:
+        key_set_fetcher = KeySetFetcher(
+            self._requests_session,
+            data_storage=self._public_key_cache_data_storage,
+            cache_lifetime=self._public_key_cache_lifetime,
+            lock_timeout=self._public_key_fetch_lock_timeout,
+            refresh_after=self._public_key_refresh_after,
+            refetch_interval=self._public_key_refetch_interval,
+            unknown_kid_lifetime=self._public_key_unknown_kid_lifetime,
+            http_caching=self._public_key_http_caching,
+        )
+        return key_set_fetcher.set_requests_session_registry(
+            self._requests_session_registry
         )
 
-        with DisableSessionId(self._public_key_cache_data_storage):
-            if self._public_key_cache_data_storage:
-                public_key = self._public_key_cache_data_storage.get_value(cache_key)
-                if public_key:
-                    return public_key
-
-            try:
-                resp = self._requests_session.get(key_set_url)
-            except requests.exceptions.RequestException as e:
-                raise LtiException(
-                    f"Error during fetch URL {key_set_url}: {str(e)}"
-                ) from e
-            try:
-                public_key = resp.json()
-                if self._public_key_cache_data_storage:
-                    self._public_key_cache_data_storage.set_value(
-                        cache_key, public_key, self._public_key_cache_lifetime
-                    )
-                return public_key
-            except ValueError as e:
-                raise LtiException(
-                    f"Invalid response from {key_set_url}. Must be JSON: {resp.text}"
-                ) from e
+    def fetch_public_key(self, key_set_url: str) -> TKeySet:
+        return self.get_key_set_fetcher().fetch(key_set_url)
 
-    def get_public_key(self) -> t.Tuple[str, str]:
+    def _get_public_key_set(self) -> TKeySet:
         assert self._registration is not None, "Registration not yet set"
         public_key_set = self._registration.get_key_set()
         key_set_url = self._registration.get_key_set_url()
@@ -597,8 +688,9 @@ class MessageLaunch(t.Generic[REQ, TCONF, SES, COOK]):
                 self._registration.set_key_set(public_key_set)
             else:
                 raise LtiException("Invalid URL: " + key_set_url)
+        return public_key_set
 
-        # Find key used to sign the JWT (matches the KID in the header)
+    def _get_jwt_kid_and_alg(self) -> t.Tuple[str, str]:
         kid = self._jwt.get("header", {}).get("kid", None)
         alg = self._jwt.get("header", {}).get("alg", None)
 
@@ -606,21 +698,94 @@ class MessageLaunch(t.Generic[REQ, TCONF, SES, COOK]):
             raise LtiException("JWT KID not found")
         if not alg:
             raise LtiException("JWT ALG not found")
+        return kid, alg
 
+    @staticmethod
+    def _find_public_jwk(
+        public_key_set: TKeySet, kid: str, alg: str
+    ) -> t.Optional[TKey]:
         for key in public_key_set["keys"]:
             key_kid = key.get("kid")
             key_alg = key.get("alg", "RS256")
             if key_kid and key_kid == kid and key_alg == alg:
-                try:
-                    key_json = json.dumps(key)
-                    jwk_obj = JWK.from_json(key_json)
-                    public_key = jwk_obj.export_to_pem()
-                    return public_key, key_alg
-                except (ValueError, TypeError) as e:
-                    raise LtiException("Can't convert JWT key to PEM format") from e
+                return key
+        return None
+
+    def _get_public_jwk(self) -> t.Tuple[TKey, str]:
+        assert self._registration is not None, "Registration not yet set"
+        is_key_set_fetched = not self._registration.get_key_set()
+        public_key_set = self._get_public_key_set()
+
+        # Find key used to sign the JWT (matches the KID in the header)
+        kid, alg = self._get_jwt_kid_and_alg()
+        key = self._find_public_jwk(public_key_set, kid, alg)
+
+        if key is None and is_key_set_fetched:
+            # Platform could rotate its keys since the key set was cached
+            key_set_url = t.cast(str, self._registration.get_key_set_url())
+            fetcher = self.get_key_set_fetcher()
+            new_public_key_set = fetcher.refetch_for_unknown_kid(key_set_url, kid, alg)
+            if new_public_key_set:
+                self._registration.set_key_set(new_public_key_set)
+                key = self._find_public_jwk(new_public_key_set, kid, alg)
+                if key is None:
+                    fetcher.add_unknown_kid(key_set_url, kid, alg)
+
+        if key is None:
+            # Could not find public key with a matching kid and alg.
+            raise LtiException("Unable to find public key")
+        return key, alg
 
-        # Could not find public key with a matching kid and alg.
-        raise LtiException("Unable to find public key")
+    def get_public_key(self) -> t.Tuple[str, str]:
+        key, key_alg = self._get_public_jwk()
+        try:
+            key_json = json.dumps(key)
+            jwk_obj = JWK.from_json(key_json)
+            public_key = jwk_obj.export_to_pem()
+            return public_key, key_alg
+        except (ValueError, TypeError) as e:
+            raise LtiException("Can't convert JWT key to PEM format") from e
+
+    @classmethod
+    def get_parsed_public_key_cache(cls) -> PublicKeyCache:
+        return cls._parsed_public_key_cache
+
+    def set_parsed_public_key_cache(
+        self, parsed_public_key_cache: PublicKeyCache
+    ) -> "MessageLaunch":
+        self._parsed_public_key_cache = parsed_public_key_cache
+        return self
+
+    def get_jwt_verifier(self) -> JwtVerifier:
+        return self._jwt_verifier
+
+    def set_jwt_verifier(self, jwt_verifier: JwtVerifier) -> "MessageLaunch":
+        """
+        Set backend which verifies id_token signature (CryptographyJwtVerifier by default).
+
+        :param jwt_verifier: JwtVerifier instance (i.e. PyJwtVerifier or PyJWKVerifier)
+        :return: MessageLaunch
+        """
+        self._jwt_verifier = jwt_verifier
+        return self
+
+    def get_public_key_object(self) -> t.Tuple[t.Any, str]:
+        """
+        Same as get_public_key but returns key object which is ready for the signature verification.
+        Converted keys are stored in the process-wide cache, so JWK is parsed only once per key.
+
+        :return: tuple in format: (public key object, algorithm)
+        """
+        assert self._registration is not None, "Registration not yet set"
+        key, key_alg = self._get_public_jwk()
+        key_set_url = self._registration.get_key_set_url() or ""
+        try:
+            public_key = self._parsed_public_key_cache.get_public_key(
+                key_set_url, key, key_alg, self._jwt_verifier.load_public_key
+            )
+        except (ValueError, TypeError, KeyError, InvalidKeyError) as e:
+            raise LtiException("Can't convert JWT key to PEM format") from e
+        return public_key, key_alg
 
     def validate_state(self) -> "MessageLaunch":
         # Check State for OIDC.
@@ -658,6 +823,8 @@ class MessageLaunch(t.Generic[REQ, TCONF, SES, COOK]):
         except Exception as e:
             raise LtiException("Invalid JWT format, can't be decoded") from e
 
+        # keep segments to verify signature without parsing the token again
+        self._jwt_parts = jwt_parts
         return self
 
     def validate_nonce(self) -> "MessageLaunch":
@@ -706,18 +873,23 @@ class MessageLaunch(t.Generic[REQ, TCONF, SES, COOK]):
         return self
 
     def validate_jwt_signature(self) -> "MessageLaunch":
-        id_token = self._get_id_token()
+        jwt_parts = self._jwt_parts
+        if jwt_parts is None:
+            self.validate_jwt_format()
+            jwt_parts = t.cast(t.List[str], self._jwt_parts)
 
         # Fetch public key object
-        public_key, key_alg = self.get_public_key()
+        public_key, key_alg = self.get_public_key_object()
 
         try:
-            jwt.decode(
-                id_token,
+            verify_jwt_signature(
+                jwt_parts,
                 public_key,
-                algorithms=[key_alg],
-                options=self._jwt_verify_options,
+                key_alg,
+                self._jwt_verify_options,
+                self._jwt_verifier,
             )
+            validate_jwt_claims(self._jwt["body"], self._jwt_verify_options)
         except jwt.InvalidTokenError as e:
             raise LtiException(f"Can't decode id_token: {str(e)}") from e
 
@@ -1,5 +1,8 @@
+import copy
 import typing as t
 import typing_extensions as te
+from .exception import LtiException
+from .pagination import iter_pages
 from .utils import add_param_to_url
 from .service_connector import ServiceConnector
 
@@ -41,6 +44,15 @@ class NamesRolesProvisioningService:
         self._service_connector = service_connector
         self._service_data = service_data
 
+    def copy_for_background(self) -> "NamesRolesProvisioningService":
+        """
+        Copy which may be used by the background thread (i.e. to prefetch pages) while the current request goes on.
+        """
+        # pylint: disable=protected-access
+        service = copy.copy(self)
+        service._service_connector = self._service_connector.copy_for_background()
+        return service
+
     def get_nrps_data(self, members_url: t.Optional[str] = None):
         if not members_url:
             members_url = self._service_data["context_memberships_url"]
@@ -63,28 +75,56 @@ class NamesRolesProvisioningService:
         :param members_url: LTI platform's URL (optional)
         :return: tuple in format: (list with users, next page url)
         """
-        data = self.get_nrps_data(members_url=members_url)
-        data_body = t.cast(t.Any, data.get("body", {}))
-        return data_body.get("members", []), data["next_page_url"]
+        if not members_url:
+            members_url = self._service_data["context_memberships_url"]
 
-    def get_members(self, resource_link_id: t.Optional[str] = None) -> t.List[TMember]:
+        # page is parsed while it is received, so the raw body isn't kept in memory
+        data = self._service_connector.make_streaming_service_request(
+            [
+                "https://purl.imsglobal.org/spec/lti-nrps/scope/contextmembership.readonly"
+            ],
+            members_url,
+            items_key="members",
+            accept="application/vnd.ims.lti-nrps.v2.membershipcontainer+json",
+        )
+        try:
+            return list(data["items"]), data["next_page_url"]
+        except ValueError as e:
+            raise LtiException("Unknown response type received for members") from e
+
+    def iter_members(
+        self, resource_link_id: t.Optional[str] = None, prefetch: int = 0
+    ) -> t.Iterator[TMember]:
         """
-        Get list with all users.
+        Iterate over all users. Pages are requested with get_members_page() one by one while
+        the iteration goes on, so only one page is kept in memory and the iteration may be stopped
+        at any moment.
 
         :param resource_link_id: resource link id (optional)
-        :return: list
+        :param prefetch: number of pages requested ahead in the background (they are kept in memory too)
+        :return: iterator
         """
-        members_res_lst: t.List[TMember] = []
         members_url: t.Optional[str] = self._service_data["context_memberships_url"]
 
         if members_url and resource_link_id:
             members_url = add_param_to_url(members_url, "rlid", resource_link_id)
 
-        while members_url:
-            members, members_url = self.get_members_page(members_url)
-            members_res_lst.extend(members)
+        # connector is bound to the current request, background thread requests pages with its copy
+        service = self.copy_for_background() if prefetch > 0 else self
+        for members in iter_pages(service.get_members_page, members_url, prefetch):
+            yield from members
+
+    def get_members(
+        self, resource_link_id: t.Optional[str] = None, prefetch: int = 0
+    ) -> t.List[TMember]:
+        """
+        Get list with all users.
 
-        return members_res_lst
+        :param resource_link_id: resource link id (optional)
+        :param prefetch: number of pages requested ahead in the background
+        :return: list
+        """
+        return list(self.iter_members(resource_link_id, prefetch))
 
     def get_context(self):
         """
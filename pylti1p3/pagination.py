@@ -0,0 +1,95 @@
+import queue
+import threading
+import typing as t
+
+T = t.TypeVar("T")
+TGetPage = t.Callable[[str], t.Tuple[t.List[T], t.Optional[str]]]
+
+
+class PagePrefetcher(t.Generic[T]):
+    """
+    Requests pages of the LTI service in the background thread, so the next page is already
+    on its way while the current one is processed. Not more than "depth" pages are received
+    ahead of the consumer.
+    """
+
+    _get_page: TGetPage[T]
+    _url: t.Optional[str]
+    _depth: int
+    _thread: t.Optional[threading.Thread] = None
+
+    def __init__(self, get_page: TGetPage[T], url: t.Optional[str], depth: int = 1):
+        """
+        :param get_page: function which returns the page and the next page url
+        :param url: first page url
+        :param depth: max number of pages received ahead of the consumer
+        """
+        self._get_page = get_page
+        self._url = url
+        self._depth = max(depth, 1)
+        self._pages: "queue.Queue[t.Tuple[str, t.Any]]" = queue.Queue()
+        self._slots = threading.Semaphore(self._depth)
+        self._stop_event = threading.Event()
+
+    def start(self) -> "PagePrefetcher[T]":
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="lti-page-prefetcher", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        # unblock the thread if it waits for the free slot
+        self._slots.release()
+
+    def __iter__(self) -> t.Iterator[t.List[T]]:
+        self.start()
+        try:
+            while True:
+                kind, value = self._pages.get()
+                if kind == "error":
+                    raise value
+                if kind == "done":
+                    return
+                self._slots.release()
+                yield value
+        finally:
+            self.stop()
+
+    def _run(self) -> None:
+        url = self._url
+        # consumer must be woken up whatever happens in the thread
+        result: t.Tuple[str, t.Any] = ("error", RuntimeError("Page prefetcher failed"))
+        try:
+            while url:
+                self._slots.acquire()  # pylint: disable=consider-using-with
+                if self._stop_event.is_set():
+                    break
+                page, url = self._get_page(url)
+                self._pages.put(("page", page))
+            result = ("done", None)
+        except Exception as e:  # pylint: disable=broad-except
+            result = ("error", e)
+        finally:
+            self._pages.put(result)
+
+
+def iter_pages(
+    get_page: TGetPage[T], url: t.Optional[str], prefetch: int = 0
+) -> t.Iterator[t.List[T]]:
+    """
+    Iterate over the pages of the LTI service.
+
+    :param get_page: function which returns the page and the next page url
+    :param url: first page url
+    :param prefetch: number of pages requested ahead in the background (0 - pages are requested one by one)
+    :return: iterator
+    """
+    if prefetch > 0:
+        yield from PagePrefetcher(get_page, url, prefetch)
+        return
+    while url:
+        page, url = get_page(url)
+        yield page
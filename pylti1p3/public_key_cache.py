@@ -0,0 +1,85 @@
+import threading
+import typing as t
+from collections import OrderedDict
+
+from .jwt_verification import DEFAULT_JWT_VERIFIER
+
+TPublicKeyCacheKey = t.Tuple[str, str, str]
+TPublicKeyLoader = t.Callable[[t.Mapping[str, t.Any], str], t.Any]
+
+
+class PublicKeyCache:
+    """
+    Process-wide bounded cache of the platform's public keys which are already converted from JWK
+    to the key objects that could be passed to the signature verification as is.
+    Keys are indexed by (key_set_url, kid, alg). Every entry also remembers the JWK it was built from,
+    so the platform may rotate key material under the same kid without serving an outdated key.
+    """
+
+    _max_size: int
+    _keys: "OrderedDict[TPublicKeyCacheKey, t.Tuple[t.Mapping[str, t.Any], TPublicKeyLoader, t.Any]]"
+
+    def __init__(self, max_size: int = 256):
+        self._max_size = max_size
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_max_size(self) -> int:
+        return self._max_size
+
+    def set_max_size(self, max_size: int) -> "PublicKeyCache":
+        with self._lock:
+            self._max_size = max_size
+            self._shrink()
+        return self
+
+    def get_public_key(
+        self,
+        key_set_url: str,
+        jwk: t.Mapping[str, t.Any],
+        alg: str,
+        load_public_key: t.Optional[TPublicKeyLoader] = None,
+    ) -> t.Any:
+        """
+        Return ready-to-verify public key. JWK is converted only on the first request
+        (or in case if key material or loader were changed since the last request).
+
+        :param key_set_url: platform's JWKS endpoint (or any other unique key set id)
+        :param jwk: dict with JWK data
+        :param alg: JWT algorithm
+        :param load_public_key: function which converts JWK to the key object (see JwtVerifier)
+        :return: public key object
+        """
+        if load_public_key is None:
+            load_public_key = DEFAULT_JWT_VERIFIER.load_public_key
+        cache_key = (key_set_url, str(jwk.get("kid")), alg)
+        with self._lock:
+            item = self._keys.get(cache_key)
+            if item is not None and item[0] == jwk and item[1] is load_public_key:
+                self._keys.move_to_end(cache_key)
+                return item[2]
+
+        public_key = load_public_key(jwk, alg)
+
+        with self._lock:
+            self._keys[cache_key] = (jwk, load_public_key, public_key)
+            self._keys.move_to_end(cache_key)
+            self._shrink()
+        return public_key
+
+    def has_public_key(self, key_set_url: str, kid: str, alg: str) -> bool:
+        with self._lock:
+            return (key_set_url, kid, alg) in self._keys
+
+    def remove_key_set(self, key_set_url: str) -> None:
+        with self._lock:
+            for cache_key in [k for k in self._keys if k[0] == key_set_url]:
+                del self._keys[cache_key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._keys.clear()
+
+    def _shrink(self) -> None:
+        while len(self._keys) > self._max_size:
+            self._keys.popitem(last=False)
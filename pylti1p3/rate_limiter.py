@@ -0,0 +1,161 @@
+import hashlib
+import math
+import threading
+import time
+import typing as t
+from abc import ABCMeta, abstractmethod
+
+from .exception import LtiRateLimitException
+from .launch_data_storage.base import DisableSessionId, LaunchDataStorage
+
+
+class RateLimiter:
+    """
+    Client-side limit of the requests to LTI services per platform (issuer + client_id): token bucket
+    with "rate" requests per second and up to "burst" requests at once. Requests over the limit wait
+    for their turn, so throughput stays close to the limit without bursts and stalls.
+    """
+
+    __metaclass__ = ABCMeta
+    _rate: float
+    _burst: int
+    _rates: t.Dict[t.Tuple[str, t.Optional[str]], t.Tuple[float, int]]
+
+    def __init__(self, rate: float = 10, burst: t.Optional[int] = None):
+        """
+        :param rate: requests per second
+        :param burst: max number of requests which may be sent at once (equals rate by default)
+        """
+        self._rate = rate
+        self._burst = burst if burst else max(int(rate), 1)
+        self._rates = {}
+
+    def set_rate(
+        self,
+        issuer: str,
+        rate: float,
+        burst: t.Optional[int] = None,
+        client_id: t.Optional[str] = None,
+    ) -> "RateLimiter":
+        """
+        Set limit for the specific platform (for all its client_ids if client_id isn't passed).
+        """
+        self._rates[(issuer, client_id)] = (rate, burst if burst else max(int(rate), 1))
+        return self
+
+    def get_rate(
+        self, issuer: t.Optional[str], client_id: t.Optional[str]
+    ) -> t.Tuple[float, int]:
+        if issuer:
+            for rate_key in ((issuer, client_id), (issuer, None)):
+                if rate_key in self._rates:
+                    return self._rates[rate_key]
+        return self._rate, self._burst
+
+    @staticmethod
+    def get_key(issuer: t.Optional[str], client_id: t.Optional[str]) -> str:
+        key = str(issuer) + "|" + str(client_id)
+        return "rate-limit-" + hashlib.md5(key.encode("utf-8")).hexdigest()
+
+    @abstractmethod
+    def reserve(self, issuer: t.Optional[str], client_id: t.Optional[str]) -> float:
+        """
+        Take the turn for one request.
+
+        :param issuer: platform's issuer
+        :param client_id: client_id
+        :return: number of seconds to wait before the request may be sent
+        """
+        raise NotImplementedError
+
+    def acquire(self, issuer: t.Optional[str], client_id: t.Optional[str]) -> float:
+        delay = self.reserve(issuer, client_id)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+class MemoryRateLimiter(RateLimiter):
+    """
+    Limit is applied per process.
+    """
+
+    _buckets: t.Dict[str, t.Tuple[float, float]]
+
+    def __init__(self, rate: float = 10, burst: t.Optional[int] = None):
+        super().__init__(rate, burst)
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, issuer: t.Optional[str], client_id: t.Optional[str]) -> float:
+        rate, burst = self.get_rate(issuer, client_id)
+        key = self.get_key(issuer, client_id)
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (float(burst), now))
+            tokens = min(float(burst), tokens + (now - updated_at) * rate)
+            # tokens may become negative: next requests are queued after this one
+            tokens -= 1
+            self._buckets[key] = (tokens, now)
+        return -tokens / rate if tokens < 0 else 0.0
+
+
+class LaunchDataStorageRateLimiter(RateLimiter):
+    """
+    Limit is shared by all workers which use the same launch data storage (i.e. Django cache, Flask-Caching).
+    Time is divided into windows of burst/rate seconds with up to "burst" requests each. Every request increments
+    the atomic counter of the window and waits for its turn inside the window, if the window is full the request
+    goes to the next one.
+    """
+
+    _data_storage: LaunchDataStorage[t.Any]
+    _max_delay: float
+    _next_windows: t.Dict[str, int]
+
+    def __init__(
+        self,
+        data_storage: LaunchDataStorage[t.Any],
+        rate: float = 10,
+        burst: t.Optional[int] = None,
+        max_delay: float = 60,
+    ):
+        """
+        :param data_storage: launch data storage (should support atomic incr_value)
+        :param rate: requests per second
+        :param burst: max number of requests which may be sent at once
+        :param max_delay: max time to wait for the turn
+        """
+        super().__init__(rate, burst)
+        self._data_storage = data_storage
+        self._max_delay = max_delay
+        self._next_windows = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, issuer: t.Optional[str], client_id: t.Optional[str]) -> float:
+        rate, burst = self.get_rate(issuer, client_id)
+        key = self.get_key(issuer, client_id)
+        now = time.time()
+        window_size = burst / rate
+        with self._lock:
+            # windows before the one used by this worker last time are known to be full
+            window = max(int(now / window_size), self._next_windows.get(key, 0))
+        last_window = int((now + self._max_delay) / window_size)
+
+        with DisableSessionId(self._data_storage):
+            while window <= last_window:
+                # counter lives until the window is over
+                exp = int(math.ceil((window + 1) * window_size - now)) + 1
+                position = self._data_storage.incr_value(key + "-" + str(window), exp)
+                if position <= burst:
+                    break
+                window += 1
+            else:
+                raise LtiRateLimitException(
+                    "Rate limit of the platform is exceeded for more than "
+                    + str(self._max_delay)
+                    + " seconds"
+                )
+
+        with self._lock:
+            self._next_windows[key] = max(self._next_windows.get(key, 0), window)
+        return max(window * window_size + (position - 1) / rate - now, 0.0)
@@ -1,6 +1,9 @@
 import json
 import typing as t
+from functools import lru_cache
+
 import typing_extensions as te
+from cryptography.hazmat.primitives.serialization import load_pem_private_key
 from jwcrypto.jwk import JWK  # type: ignore
 
 
@@ -8,6 +11,21 @@ TKey = te.TypedDict("TKey", {"kid": str, "alg": str}, total=True)
 TKeySet = te.TypedDict("TKeySet", {"keys": t.List[TKey]}, total=True)
 
 
+# registrations are built again on every lookup, so the parsed keys are cached per process by the PEM itself
+@lru_cache(maxsize=128)
+def _load_private_key(private_key: str) -> t.Any:
+    return load_pem_private_key(private_key.encode("utf-8"), password=None)
+
+
+@lru_cache(maxsize=128)
+def _get_public_jwk(public_key: str) -> t.Mapping[str, t.Any]:
+    jwk_obj = JWK.from_pem(public_key.encode("utf-8"))
+    public_jwk = json.loads(jwk_obj.export_public())
+    public_jwk["alg"] = "RS256"
+    public_jwk["use"] = "sig"
+    return public_jwk
+
+
 class Registration:
     _issuer: t.Optional[str] = None
     _client_id: t.Optional[str] = None
@@ -18,6 +36,7 @@ class Registration:
     _tool_private_key: t.Optional[str] = None
     _auth_audience: t.Optional[str] = None
     _tool_public_key = None
+    _tool_signing_key: t.Any = None
 
     def get_issuer(self) -> t.Optional[str]:
         return self._issuer
@@ -73,8 +92,17 @@ class Registration:
 
     def set_tool_private_key(self, tool_private_key: str) -> "Registration":
         self._tool_private_key = tool_private_key
+        self._tool_signing_key = None
         return self
 
+    def get_tool_signing_key(self) -> t.Any:
+        """
+        Private key loaded from the PEM, so it may be passed to jwt.encode without parsing it again.
+        """
+        if self._tool_signing_key is None and self._tool_private_key:
+            self._tool_signing_key = _load_private_key(self._tool_private_key)
+        return self._tool_signing_key
+
     def get_tool_public_key(self):
         return self._tool_public_key
 
@@ -84,11 +112,8 @@ class Registration:
 
     @classmethod
     def get_jwk(cls, public_key: str) -> t.Mapping[str, t.Any]:
-        jwk_obj = JWK.from_pem(public_key.encode("utf-8"))
-        public_jwk = json.loads(jwk_obj.export_public())
-        public_jwk["alg"] = "RS256"
-        public_jwk["use"] = "sig"
-        return public_jwk
+        # copy, so the cached JWK can't be changed by the caller
+        return dict(_get_public_jwk(public_key))
 
     def get_jwks(self) -> t.List[t.Mapping[str, t.Any]]:
         keys = []
@@ -100,6 +125,5 @@ class Registration:
     def get_kid(self) -> t.Optional[str]:
         key = self.get_tool_public_key()
         if key:
-            jwk = Registration.get_jwk(key)
-            return jwk.get("kid") if jwk else None
+            return _get_public_jwk(key).get("kid")
         return None
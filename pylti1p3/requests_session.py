@@ -0,0 +1,109 @@
+import threading
+import typing as t
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+REQUESTS_USER_AGENT = "PyLTI1p3-client"
+
+TTimeout = t.Union[None, float, t.Tuple[float, float]]
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """
+    Adapter which applies the default timeout to the requests sent without the explicit one.
+    """
+
+    _timeout: TTimeout = None
+
+    def __init__(self, timeout: TTimeout = None, **kwargs):
+        self._timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):  # pylint: disable=arguments-differ
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self._timeout
+        return super().send(request, **kwargs)
+
+
+class RequestsSessionRegistry:
+    """
+    Process-wide registry of the keep-alive requests sessions: one session (with its own connection pool)
+    per platform host, so JWKS fetches, token exchanges and service calls reuse opened connections instead
+    of making the new TCP+TLS handshake on every request.
+
+    pool_maxsize is the number of connections to the host which are kept alive. If pool_block is enabled,
+    it is also the max number of simultaneous connections (other threads wait for the free connection).
+    Sessions don't store cookies, as they are shared by the requests of all users.
+    """
+
+    _pool_connections: int
+    _pool_maxsize: int
+    _pool_block: bool
+    _timeout: TTimeout
+    _user_agent: str
+    _sessions: t.Dict[str, requests.Session]
+
+    def __init__(
+        self,
+        pool_maxsize: int = 10,
+        pool_block: bool = False,
+        timeout: TTimeout = (5, 30),
+        pool_connections: int = 2,
+        user_agent: str = REQUESTS_USER_AGENT,
+    ):
+        """
+        :param pool_maxsize: number of the kept alive connections per host
+        :param pool_block: don't open more than pool_maxsize connections per host
+        :param timeout: default (connect, read) timeout in seconds
+        :param pool_connections: number of connection pools per session (i.e. http and https)
+        :param user_agent: User-Agent header
+        """
+        # pylint: disable=too-many-arguments
+        self._pool_maxsize = pool_maxsize
+        self._pool_block = pool_block
+        self._timeout = timeout
+        self._pool_connections = pool_connections
+        self._user_agent = user_agent
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_session_key(url: str) -> str:
+        parts = urlsplit(url)
+        return parts.scheme.lower() + "://" + parts.netloc.lower()
+
+    def create_session(self) -> requests.Session:
+        session = requests.Session()
+        session.headers["User-Agent"] = self._user_agent
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = TimeoutHTTPAdapter(
+            timeout=self._timeout,
+            pool_connections=self._pool_connections,
+            pool_maxsize=self._pool_maxsize,
+            pool_block=self._pool_block,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def get_session(self, url: str) -> requests.Session:
+        key = self.get_session_key(url)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = self.create_session()
+                self._sessions[key] = session
+            return session
+
+    def close(self) -> None:
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+
+DEFAULT_REQUESTS_SESSION_REGISTRY = RequestsSessionRegistry()
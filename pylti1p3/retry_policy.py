@@ -0,0 +1,136 @@
+import random
+import threading
+import time
+import typing as t
+from email.utils import parsedate_to_datetime
+
+import typing_extensions as te
+
+TRetryStats = te.TypedDict(
+    "TRetryStats",
+    {
+        "retries": int,
+        "retries_by_reason": t.Dict[str, int],
+        "gave_up": int,
+    },
+    total=True,
+)
+
+
+class RetryPolicy:
+    """
+    Retries of the LTI service requests after the transient errors (429/502/503/504 responses and
+    connection errors) with exponential backoff and full jitter. "Retry-After" header sent by the platform
+    is used instead of the backoff (no more retries if it asks to wait longer than max_retry_after seconds).
+
+    GET requests are always safe to retry, POST requests (i.e. scores) are retried only if retry_post
+    is enabled.
+    """
+
+    _max_retries: int = 3
+    _backoff_factor: float = 0.5
+    _max_backoff: float = 30
+    _max_retry_after: float = 60
+    _retry_statuses: t.FrozenSet[int] = frozenset([429, 502, 503, 504])
+    _retry_post: bool = False
+    _stats: TRetryStats
+
+    def __init__(
+        self,
+        *,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        max_backoff: float = 30,
+        max_retry_after: float = 60,
+        retry_statuses: t.Iterable[int] = (429, 502, 503, 504),
+        retry_post: bool = False,
+    ):
+        """
+        :param max_retries: max number of retries of one request
+        :param backoff_factor: delay before the first retry (doubled on every next one)
+        :param max_backoff: max delay between retries
+        :param max_retry_after: max delay which may be requested by the "Retry-After" header
+        :param retry_statuses: HTTP statuses which are considered as transient errors
+        :param retry_post: retry POST requests too
+        """
+        self._max_retries = max_retries
+        self._backoff_factor = backoff_factor
+        self._max_backoff = max_backoff
+        self._max_retry_after = max_retry_after
+        self._retry_statuses = frozenset(retry_statuses)
+        self._retry_post = retry_post
+        self._stats = {"retries": 0, "retries_by_reason": {}, "gave_up": 0}
+        self._lock = threading.Lock()
+
+    def get_retry_delay(
+        self,
+        attempt: int,
+        is_post: bool = False,
+        status_code: t.Optional[int] = None,
+        retry_after: t.Optional[str] = None,
+    ) -> t.Optional[float]:
+        """
+        Decide whether the failed request should be retried.
+
+        :param attempt: number of the retries which were already made
+        :param is_post: request is POST
+        :param status_code: response status (None in case of the connection error)
+        :param retry_after: value of the "Retry-After" response header
+        :return: delay in seconds or None if the request shouldn't be retried
+        """
+        if is_post and not self._retry_post:
+            return None
+        if status_code is not None and status_code not in self._retry_statuses:
+            return None
+        if attempt >= self._max_retries:
+            self._record(None)
+            return None
+
+        delay = self.parse_retry_after(retry_after) if retry_after else None
+        if delay is None:
+            delay = random.uniform(
+                0, min(self._max_backoff, self._backoff_factor * (2**attempt))
+            )
+        elif delay > self._max_retry_after:
+            self._record(None)
+            return None
+
+        self._record(str(status_code) if status_code else "connection_error")
+        return delay
+
+    @staticmethod
+    def parse_retry_after(retry_after: str) -> t.Optional[float]:
+        """
+        "Retry-After" may contain either the number of seconds or the HTTP date.
+        """
+        retry_after = retry_after.strip()
+        if retry_after.isdigit():
+            return float(retry_after)
+        try:
+            retry_at = parsedate_to_datetime(retry_after)
+        except (TypeError, ValueError, IndexError):
+            return None
+        if retry_at is None:
+            return None
+        return max(retry_at.timestamp() - time.time(), 0)
+
+    def get_stats(self) -> TRetryStats:
+        with self._lock:
+            return {
+                "retries": self._stats["retries"],
+                "retries_by_reason": dict(self._stats["retries_by_reason"]),
+                "gave_up": self._stats["gave_up"],
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._stats = {"retries": 0, "retries_by_reason": {}, "gave_up": 0}
+
+    def _record(self, reason: t.Optional[str]) -> None:
+        with self._lock:
+            if reason is None:
+                self._stats["gave_up"] += 1
+                return
+            self._stats["retries"] += 1
+            by_reason = self._stats["retries_by_reason"]
+            by_reason[reason] = by_reason.get(reason, 0) + 1
@@ -1,3 +1,4 @@
+import copy
 import hashlib
 import re
 import time
@@ -7,8 +8,20 @@ import uuid
 import jwt  # type: ignore
 import requests
 import typing_extensions as te
+from .access_token_refresher import AccessTokenRefresher
+from .access_token_store import AccessTokenStore, MemoryAccessTokenStore
 from .exception import LtiServiceException
+from .json_stream import iter_json_array_items
 from .registration import Registration
+from .rate_limiter import RateLimiter
+from .retry_policy import RetryPolicy
+from .requests_session import DEFAULT_REQUESTS_SESSION_REGISTRY, RequestsSessionRegistry
+
+# kept for backward compatibility
+from .requests_session import (  # noqa: F401 pylint: disable=unused-import
+    REQUESTS_USER_AGENT,
+)
+from .single_flight import SingleFlight
 
 TServiceConnectorResponse = te.TypedDict(
     "TServiceConnectorResponse",
@@ -19,38 +32,204 @@ TServiceConnectorResponse = te.TypedDict(
     },
 )
 
-
-REQUESTS_USER_AGENT = "PyLTI1p3-client"
+TServiceConnectorStreamResponse = te.TypedDict(
+    "TServiceConnectorStreamResponse",
+    {
+        "headers": t.Union[t.Dict[str, str], t.MutableMapping[str, str]],
+        "items": t.Iterator[t.Any],
+        "next_page_url": t.Optional[str],
+    },
+)
 
 
 class ServiceConnector:
     _registration: Registration
-    _access_tokens: t.Dict[str, str]
+    _access_token_store: AccessTokenStore = MemoryAccessTokenStore()
+    _access_token_fetches: SingleFlight[str] = SingleFlight()
+    _access_token_refresher: t.Optional[AccessTokenRefresher] = None
+    _requests_session: t.Optional[requests.Session] = None
+    _retry_policy: t.Optional[RetryPolicy] = None
+    _rate_limiter: t.Optional[RateLimiter] = None
+    _requests_session_registry: RequestsSessionRegistry = (
+        DEFAULT_REQUESTS_SESSION_REGISTRY
+    )
+    _stream_chunk_size: int = 8192
 
     def __init__(
         self,
         registration: Registration,
         requests_session: t.Optional[requests.Session] = None,
+        access_token_store: t.Optional[AccessTokenStore] = None,
+        access_token_refresher: t.Optional[AccessTokenRefresher] = None,
     ):
         self._registration = registration
-        self._access_tokens = {}
-        if requests_session:
-            self._requests_session = requests_session
-        else:
-            self._requests_session = requests.Session()
-            self._requests_session.headers["User-Agent"] = REQUESTS_USER_AGENT
+        if access_token_store:
+            self._access_token_store = access_token_store
+        if access_token_refresher:
+            self._access_token_refresher = access_token_refresher
+        self._requests_session = requests_session
+
+    def get_registration(self) -> Registration:
+        return self._registration
+
+    @classmethod
+    def get_access_token_store(cls) -> AccessTokenStore:
+        return cls._access_token_store
+
+    def set_access_token_store(
+        self, access_token_store: AccessTokenStore
+    ) -> "ServiceConnector":
+        self._access_token_store = access_token_store
+        return self
+
+    def set_requests_session_registry(
+        self, requests_session_registry: RequestsSessionRegistry
+    ) -> "ServiceConnector":
+        self._requests_session_registry = requests_session_registry
+        return self
+
+    def get_requests_session(self, url: str) -> requests.Session:
+        """
+        Session passed to the constructor or the pooled session of the URL's host.
+        """
+        if self._requests_session:
+            return self._requests_session
+        return self._requests_session_registry.get_session(url)
+
+    def set_retry_policy(
+        self, retry_policy: t.Optional[RetryPolicy]
+    ) -> "ServiceConnector":
+        self._retry_policy = retry_policy
+        return self
+
+    def get_retry_policy(self) -> t.Optional[RetryPolicy]:
+        return self._retry_policy
+
+    @classmethod
+    def set_default_rate_limiter(cls, rate_limiter: t.Optional[RateLimiter]) -> None:
+        """
+        Set rate limiter which is used by all connectors in the process.
+        """
+        cls._rate_limiter = rate_limiter
+
+    def set_rate_limiter(
+        self, rate_limiter: t.Optional[RateLimiter]
+    ) -> "ServiceConnector":
+        self._rate_limiter = rate_limiter
+        return self
+
+    def get_rate_limit_delay(self) -> float:
+        """
+        Take the turn for the request to LTI service.
+
+        :return: number of seconds to wait before the request may be sent
+        """
+        if not self._rate_limiter:
+            return 0.0
+        return self._rate_limiter.reserve(
+            self._registration.get_issuer(), self._registration.get_client_id()
+        )
+
+    def copy_for_background(self) -> "ServiceConnector":
+        """
+        Copy which may be used by the background thread while the current request goes on.
+        """
+        connector = copy.copy(self)
+        connector.set_access_token_store(self._access_token_store.copy_for_background())
+        return connector
+
+    def set_access_token_refresher(
+        self, access_token_refresher: t.Optional[AccessTokenRefresher]
+    ) -> "ServiceConnector":
+        self._access_token_refresher = access_token_refresher
+        return self
+
+    def get_access_token_cache_key(self, scopes: t.Sequence[str]) -> str:
+        """
+        Tokens are shared by all connectors with the same platform, client_id, token URL and scopes.
+        """
+        key_parts = [
+            str(self._registration.get_issuer()),
+            str(self._registration.get_client_id()),
+            str(self._registration.get_auth_token_url()),
+        ] + sorted(scopes)
+        return (
+            "access-token-"
+            + hashlib.md5("|".join(key_parts).encode("utf-8")).hexdigest()
+        )
+
+    def get_cached_access_token(self, cache_key: str) -> t.Optional[str]:
+        if self._access_token_refresher:
+            self._access_token_refresher.touch(cache_key)
+        return self._access_token_store.get_access_token(cache_key)
 
     def get_access_token(self, scopes: t.Sequence[str]) -> str:
         # Don't fetch the same key more than once
         scopes = sorted(scopes)
-        scopes_str: str = "|".join(scopes)
-        scopes_bytes = scopes_str.encode("utf-8")
+        cache_key = self.get_access_token_cache_key(scopes)
+        access_token = self.get_cached_access_token(cache_key)
+        if access_token:
+            return access_token
+
+        # Only one exchange per token is in flight, concurrent callers wait for its result
+        return self._access_token_fetches.do(
+            cache_key, lambda: self._fetch_access_token(scopes, cache_key)
+        )
+
+    def refresh_access_token(self, scopes: t.Sequence[str]) -> str:
+        """
+        Exchange the new token even if the current one is still valid.
+        """
+        scopes = sorted(scopes)
+        cache_key = self.get_access_token_cache_key(scopes)
+        return self._access_token_fetches.do(
+            cache_key, lambda: self._request_access_token(scopes, cache_key)
+        )
+
+    def invalidate_access_token(
+        self, scopes: t.Sequence[str], access_token: str
+    ) -> None:
+        """
+        Remove token rejected by the platform from the store (if it wasn't replaced by the new one yet).
+        """
+        cache_key = self.get_access_token_cache_key(scopes)
+        if self._access_token_store.get_access_token(cache_key) == access_token:
+            self._access_token_store.remove_access_token(cache_key)
+
+    @staticmethod
+    def is_invalid_token_response(
+        status_code: int,
+        headers: t.Mapping[str, str],
+        get_body: t.Callable[[], str],
+    ) -> bool:
+        """
+        Platforms answer 401 or "invalid_token" error (RFC 6750) if the access token was revoked.
+        Body is read only if it is the last chance to find the error (400/403 without WWW-Authenticate header).
+        """
+        if status_code == 401:
+            return True
+        if status_code not in (400, 403):
+            return False
+        if "invalid_token" in headers.get("WWW-Authenticate", ""):
+            return True
+        return "invalid_token" in get_body()
 
-        scope_key = hashlib.md5(scopes_bytes).hexdigest()
+    def _fetch_access_token(self, scopes: t.Sequence[str], cache_key: str) -> str:
+        # the token could be saved by another thread while we waited for our turn
+        access_token = self._access_token_store.get_access_token(cache_key)
+        if access_token:
+            return access_token
+        return self._request_access_token(scopes, cache_key)
 
-        if scope_key in self._access_tokens:
-            return self._access_tokens[scope_key]
+    def get_access_token_request(
+        self, scopes: t.Sequence[str]
+    ) -> t.Tuple[str, t.Dict[str, str]]:
+        """
+        Build request to exchange the signed JWT for an access token.
 
+        :param scopes: token scopes
+        :return: tuple in format: (token URL, form data)
+        """
         # Build up JWT to exchange for an auth token
         client_id = self._registration.get_client_id()
         assert client_id is not None, "client_id should be set at this point"
@@ -73,7 +252,7 @@ class ServiceConnector:
             headers = {"kid": kid}
 
         # Sign the JWT with our private key (given by the platform on registration)
-        private_key = self._registration.get_tool_private_key()
+        private_key = self._registration.get_tool_signing_key()
         assert private_key is not None, "Private key should be set at this point"
         jwt_val = self.encode_jwt(jwt_claim, private_key, headers)
 
@@ -83,20 +262,48 @@ class ServiceConnector:
             "client_assertion": jwt_val,
             "scope": " ".join(scopes),
         }
+        return auth_url, auth_request
+
+    def save_access_token(
+        self, scopes: t.Sequence[str], cache_key: str, response: t.Dict[str, t.Any]
+    ) -> str:
+        """
+        Save the token from the platform's response to the store.
+
+        :param scopes: token scopes
+        :param cache_key: token cache key
+        :param response: decoded body of the token response
+        :return: access token
+        """
+        access_token = response["access_token"]
+        try:
+            expires_in: t.Optional[int] = int(response["expires_in"])
+        except (KeyError, TypeError, ValueError):
+            expires_in = None
+        self._access_token_store.set_access_token(cache_key, access_token, expires_in)
+        if self._access_token_refresher:
+            self._access_token_refresher.track(
+                cache_key,
+                self,
+                scopes,
+                expires_in,
+                self._access_token_store.get_expires_at(expires_in),
+            )
+        return access_token
+
+    def _request_access_token(self, scopes: t.Sequence[str], cache_key: str) -> str:
+        auth_url, auth_request = self.get_access_token_request(scopes)
 
         # Make request to get auth token
-        r = self._requests_session.post(auth_url, data=auth_request)
+        r = self.get_requests_session(auth_url).post(auth_url, data=auth_request)
         if not r.ok:
             raise LtiServiceException(r)
-        response = r.json()
-
-        self._access_tokens[scope_key] = response["access_token"]
-        return self._access_tokens[scope_key]
+        return self.save_access_token(scopes, cache_key, r.json())
 
     def encode_jwt(
         self,
         message: t.Dict[str, t.Union[str, int]],
-        private_key: str,
+        private_key: t.Any,
         headers: t.Dict[str, str],
     ) -> str:
         jwt_val = jwt.encode(message, private_key, algorithm="RS256", headers=headers)
@@ -114,31 +321,140 @@ class ServiceConnector:
         accept: str = "application/json",
         case_insensitive_headers: bool = False,
     ) -> TServiceConnectorResponse:
+        r = self._get_service_response(
+            scopes,
+            url,
+            is_post=is_post,
+            data=data,
+            content_type=content_type,
+            accept=accept,
+        )
+        return {
+            "headers": r.headers if case_insensitive_headers else dict(r.headers),
+            "body": r.json() if r.content else None,
+            "next_page_url": self.get_next_page_url(r.headers.get("link", "")),
+        }
+
+    def make_streaming_service_request(
+        self,
+        scopes: t.Sequence[str],
+        url: str,
+        items_key: t.Optional[str] = None,
+        accept: str = "application/json",
+        case_insensitive_headers: bool = False,
+    ) -> TServiceConnectorStreamResponse:
+        """
+        GET request which body is parsed while it is received: items of the JSON array are returned
+        one by one, so the whole page is never kept in memory.
+
+        :param scopes: token scopes
+        :param url: service URL
+        :param items_key: field with the array if the body is an object (i.e. "members")
+        :param accept: Accept header
+        :param case_insensitive_headers: return headers as is
+        :return: dict with HTTP response headers, iterator over the items and next page url
+        """
+        r = self._get_service_response(scopes, url, accept=accept, stream=True)
+        return {
+            "headers": r.headers if case_insensitive_headers else dict(r.headers),
+            "items": self._iter_response_items(r, items_key),
+            "next_page_url": self.get_next_page_url(r.headers.get("link", "")),
+        }
+
+    def _iter_response_items(
+        self, r: requests.Response, items_key: t.Optional[str]
+    ) -> t.Iterator[t.Any]:
+        with r:
+            yield from iter_json_array_items(
+                r.iter_content(chunk_size=self._stream_chunk_size), items_key
+            )
+
+    def _get_service_response(
+        self,
+        scopes: t.Sequence[str],
+        url: str,
+        *,
+        is_post: bool = False,
+        data: t.Optional[str] = None,
+        content_type: str = "application/json",
+        accept: str = "application/json",
+        stream: bool = False,
+    ) -> requests.Response:
         access_token = self.get_access_token(scopes)
         headers = {"Authorization": "Bearer " + access_token, "Accept": accept}
 
         if is_post:
             headers["Content-Type"] = content_type
-            post_data = data or None
-            r = self._requests_session.post(url, data=post_data, headers=headers)
-        else:
-            r = self._requests_session.get(url, headers=headers)
 
-        if not r.ok:
-            raise LtiServiceException(r)
+        attempt = 0
+        reauthenticated = False
+        while True:
+            rate_limit_delay = self.get_rate_limit_delay()
+            if rate_limit_delay > 0:
+                time.sleep(rate_limit_delay)
+            try:
+                r = self._send_service_request(url, is_post, data, headers, stream)
+            except (requests.ConnectionError, requests.Timeout):
+                delay = self._get_retry_delay(attempt, is_post)
+                if delay is None:
+                    raise
+            else:
+                if r.ok:
+                    break
+                if not reauthenticated and self.is_invalid_token_response(
+                    r.status_code, r.headers, lambda: r.text
+                ):
+                    # token was revoked before it expired: get the new one and replay the request once
+                    r.close()
+                    reauthenticated = True
+                    self.invalidate_access_token(scopes, access_token)
+                    access_token = self.get_access_token(scopes)
+                    headers["Authorization"] = "Bearer " + access_token
+                    continue
+                delay = self._get_retry_delay(
+                    attempt, is_post, r.status_code, r.headers.get("Retry-After")
+                )
+                if delay is None:
+                    raise LtiServiceException(r)
+                r.close()
+            time.sleep(delay)
+            attempt += 1
+        return r
+
+    def _send_service_request(
+        self,
+        url: str,
+        is_post: bool,
+        data: t.Optional[str],
+        headers: t.Dict[str, str],
+        stream: bool = False,
+    ) -> requests.Response:
+        if is_post:
+            return self.get_requests_session(url).post(
+                url, data=data or None, headers=headers
+            )
+        return self.get_requests_session(url).get(url, headers=headers, stream=stream)
 
-        next_page_url = None
-        link_header = r.headers.get("link", "")
+    def _get_retry_delay(
+        self,
+        attempt: int,
+        is_post: bool,
+        status_code: t.Optional[int] = None,
+        retry_after: t.Optional[str] = None,
+    ) -> t.Optional[float]:
+        if not self._retry_policy:
+            return None
+        return self._retry_policy.get_retry_delay(
+            attempt, is_post, status_code, retry_after
+        )
+
+    @staticmethod
+    def get_next_page_url(link_header: str) -> t.Optional[str]:
         if link_header:
             match = re.search(
                 r'<([^>]*)>;\s*rel="next"',
                 link_header.replace("\n", " ").lower().strip(),
             )
-            if match:
-                next_page_url = match.group(1)
-
-        return {
-            "headers": r.headers if case_insensitive_headers else dict(r.headers),
-            "body": r.json() if r.content else None,
-            "next_page_url": next_page_url if next_page_url else None,
-        }
+            if match and match.group(1):
+                return match.group(1)
+        return None
@@ -0,0 +1,51 @@
+import threading
+import typing as t
+
+T = t.TypeVar("T")
+
+
+class _Call(t.Generic[T]):
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.result: t.Optional[T] = None
+        self.error: t.Optional[BaseException] = None
+
+
+class SingleFlight(t.Generic[T]):
+    """
+    Coalesces concurrent calls with the same key: only the first caller executes the function,
+    all other callers which come while it is in flight wait for the same result (or exception).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: t.Dict[t.Hashable, _Call[T]] = {}
+
+    def is_in_flight(self, key: t.Hashable) -> bool:
+        with self._lock:
+            return key in self._calls
+
+    def do(self, key: t.Hashable, fn: t.Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+
+        if not is_leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return t.cast(T, call.result)
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
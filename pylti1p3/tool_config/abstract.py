@@ -100,6 +100,13 @@ class ToolConfAbstract(t.Generic[REQ]):
         """
         raise NotImplementedError
 
+    def find_registrations(self, *args, **kwargs) -> t.List[Registration]:
+        """
+        Find all registrations. Is used to fill the caches before the tool starts to receive launches
+        (see pylti1p3.warmup). You may skip implementation of this method in case if you don't need it.
+        """
+        raise NotImplementedError
+
     def get_jwks(
         self, iss: t.Optional[str] = None, client_id: t.Optional[str] = None, **kwargs
     ):
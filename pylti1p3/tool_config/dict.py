@@ -159,6 +159,17 @@ class ToolConfDict(ToolConfAbstract[Request]):
         iss_conf = self.get_iss_config(iss, client_id)
         return self._get_registration(iss, iss_conf)
 
+    def find_registrations(self, *args, **kwargs):
+        # pylint: disable=unused-argument
+        if not self._config:
+            raise Exception("Config is not set")
+        registrations = []
+        for iss, iss_conf in self._config.items():
+            iss_conf_lst = iss_conf if isinstance(iss_conf, list) else [iss_conf]
+            for iss_conf_item in iss_conf_lst:
+                registrations.append(self._get_registration(iss, iss_conf_item))
+        return registrations
+
     def find_deployment(self, iss: str, deployment_id: str):
         iss_conf = self.get_iss_config(iss)
         return self._get_deployment(iss_conf, deployment_id)
@@ -0,0 +1,165 @@
+"""
+Fill the caches before the worker starts to receive launches, i.e. fetch and parse key sets
+of all configured platforms. Could be called from the worker startup hook (for example gunicorn's
+post_fork). The command line version runs in its own process, so it only checks that key sets
+can be fetched and parsed:
+
+    python -m pylti1p3.warmup /path/to/config.json
+"""
+
+import argparse
+import time
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import typing_extensions as te
+from jwt.exceptions import InvalidKeyError  # type: ignore
+from .exception import LtiException
+from .jwt_verification import DEFAULT_JWT_VERIFIER, JwtVerifier
+from .key_set_fetcher import KeySetFetcher
+from .launch_data_storage.base import LaunchDataStorage
+from .message_launch import MessageLaunch
+from .public_key_cache import PublicKeyCache
+from .registration import Registration
+from .tool_config import ToolConfAbstract, ToolConfJsonFile
+
+TWarmupResult = te.TypedDict(
+    "TWarmupResult",
+    {
+        "issuer": t.Optional[str],
+        "client_id": t.Optional[str],
+        "key_set_url": t.Optional[str],
+        "keys": int,
+        "elapsed": float,
+        "error": t.Optional[str],
+    },
+)
+
+
+def warmup_registration(
+    registration: Registration,
+    key_set_fetcher: KeySetFetcher,
+    public_key_cache: PublicKeyCache,
+    jwt_verifier: JwtVerifier = DEFAULT_JWT_VERIFIER,
+) -> TWarmupResult:
+    """
+    Fetch key set of the registration and parse all its keys.
+
+    :param registration: Registration instance
+    :param key_set_fetcher: KeySetFetcher instance
+    :param public_key_cache: cache of the parsed public keys
+    :param jwt_verifier: JwtVerifier which will be used to verify launches
+    :return: dict with the warmup result
+    """
+    start = time.monotonic()
+    key_set_url = registration.get_key_set_url()
+    result: TWarmupResult = {
+        "issuer": registration.get_issuer(),
+        "client_id": registration.get_client_id(),
+        "key_set_url": key_set_url,
+        "keys": 0,
+        "elapsed": 0.0,
+        "error": None,
+    }
+    try:
+        public_key_set = registration.get_key_set()
+        if not public_key_set:
+            if not key_set_url or not key_set_url.startswith(("http://", "https://")):
+                raise LtiException("Invalid URL: " + str(key_set_url))
+            public_key_set = key_set_fetcher.fetch(key_set_url)
+        for key in public_key_set["keys"]:
+            try:
+                public_key_cache.get_public_key(
+                    key_set_url or "",
+                    key,
+                    key.get("alg", "RS256"),
+                    jwt_verifier.load_public_key,
+                )
+                result["keys"] += 1
+            except (ValueError, TypeError, KeyError, InvalidKeyError):
+                # key can't be used to sign launches (i.e. encryption key)
+                pass
+    except Exception as e:  # pylint: disable=broad-except
+        result["error"] = str(e)
+    result["elapsed"] = time.monotonic() - start
+    return result
+
+
+def warmup(
+    tool_conf: ToolConfAbstract,
+    *,
+    data_storage: t.Optional[LaunchDataStorage[t.Any]] = None,
+    cache_lifetime: int = 7200,
+    lock_timeout: t.Optional[int] = None,
+    refresh_after: t.Optional[int] = None,
+    requests_session: t.Optional[requests.Session] = None,
+    max_workers: int = 8,
+    jwt_verifier: JwtVerifier = DEFAULT_JWT_VERIFIER,
+) -> t.List[TWarmupResult]:
+    """
+    Walk all registrations of the tool config, fetch and parse their key sets concurrently.
+    Parsed keys are stored in the process-wide cache which is used by MessageLaunch.
+
+    Launches download the key set on every request unless it is cached in the launch data storage,
+    so pass the same data_storage and options as to MessageLaunch.set_public_key_caching: key sets
+    are saved in it and the first launches don't request the platforms. Without data_storage
+    only the parsed keys are warmed up.
+
+    :param tool_conf: ToolConf instance (should implement find_registrations)
+    :param data_storage: launch data storage to save key sets (optional)
+    :param cache_lifetime: lifetime of the saved key sets
+    :param lock_timeout: only one process at a time fetches the key set (see KeySetFetcher)
+    :param refresh_after: key set which is older than refresh_after seconds is refreshed (see KeySetFetcher)
+    :param requests_session: requests.Session instance (optional, pooled sessions are used by default)
+    :param max_workers: max number of concurrent requests
+    :param jwt_verifier: JwtVerifier which will be used to verify launches
+    :return: list with warmup results (one per registration)
+    """
+    # pylint: disable=too-many-arguments
+    key_set_fetcher = KeySetFetcher(
+        requests_session,
+        data_storage=data_storage,
+        cache_lifetime=cache_lifetime,
+        lock_timeout=lock_timeout,
+        refresh_after=refresh_after,
+    )
+    public_key_cache = MessageLaunch.get_parsed_public_key_cache()
+    registrations = tool_conf.find_registrations()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(
+            executor.map(
+                lambda reg: warmup_registration(
+                    reg, key_set_fetcher, public_key_cache, jwt_verifier
+                ),
+                registrations,
+            )
+        )
+
+
+def format_warmup_results(results: t.Sequence[TWarmupResult]) -> str:
+    lines = []
+    for res in results:
+        status = f"ERROR: {res['error']}" if res["error"] else f"{res['keys']} key(s)"
+        lines.append(
+            f"{res['issuer']} [client_id={res['client_id']}]: {status} in {res['elapsed']:.3f}s"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: t.Optional[t.Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Fetch and parse key sets of all platforms from the JSON config"
+    )
+    parser.add_argument("config_file", help="path to the JSON tool config")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent requests")
+    args = parser.parse_args(argv)
+
+    results = warmup(ToolConfJsonFile(args.config_file), max_workers=args.workers)
+    print(format_warmup_results(results))
+    return 1 if any(res["error"] for res in results) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -13,6 +13,7 @@ if sys.version_info < (3, 6):
 
 
 install_requires = [
+    "cryptography",
     "jwcrypto",
     "pyjwt>=1.5",
     "requests",
@@ -22,7 +23,7 @@ install_requires = [
 with open("README.rst", "rt") as readme:
     long_description = readme.read().strip()
 
-packages = find_packages(exclude=["examples", "tests"])
+packages = find_packages(exclude=["benchmarks", "examples", "tests"])
 
 setup(
     name="PyLTI1p3",
@@ -1,13 +1,31 @@
 # flake8: noqa
+import importlib.util
+import sys
+from .test_access_token_store import TestAccessTokenStore
 from .test_course_groups import TestCourseGroups
 from .test_deep_link import TestDjangoDeepLink, TestFlaskDeepLink
 from .test_grades import TestGrades
+from .test_json_stream import TestJsonStream
+from .test_jwt_verification import TestJwtVerification
+from .test_key_set_fetcher import TestKeySetFetcher
+from .test_lineitem_index import TestLineItemIndex
+from .test_mmap_file_storage import TestMmapFileDataStorage
 from .test_names_roles import TestNamesRolesProvisioningService
+from .test_rate_limiter import TestRateLimiter
+from .test_requests_session import TestRequestsSessionRegistry
 from .test_resource_link import TestDjangoResourceLink, TestFlaskResourceLink
+from .test_retry_policy import TestRetryPolicy
 from .test_tool_conf import TestToolConf
+from .test_public_key_cache import TestPublicKeyCache
+from .test_pagination import TestPagination
 from .test_privacy_launch import TestDjangoPrivacyLaunch, TestFlaskPrivacyLaunch
 from .test_submission_review_launch import (
     TestDjangoSubmissionReviewLaunch,
     TestFlaskSubmissionReviewLaunch,
 )
 from .test_utils import TestUtils
+from .test_warmup import TestWarmup
+
+# async services need httpx, their tests need IsolatedAsyncioTestCase (Python 3.8+)
+if sys.version_info >= (3, 8) and importlib.util.find_spec("httpx"):
+    from .test_async_services import TestAsyncServices
@@ -0,0 +1,275 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+import requests_mock
+from pylti1p3.access_token_refresher import AccessTokenRefresher
+from pylti1p3.exception import LtiServiceException
+from pylti1p3.access_token_store import (
+    LaunchDataStorageAccessTokenStore,
+    MemoryAccessTokenStore,
+)
+from pylti1p3.service_connector import ServiceConnector
+from .cache import FakeCacheDataStorage
+from .tool_config import get_test_tool_conf
+
+
+class TestAccessTokenStore(unittest.TestCase):
+    iss = "https://canvas.instructure.com"
+    auth_token_url = "http://canvas.docker/login/oauth2/token"
+    scopes = ["https://purl.imsglobal.org/spec/lti-ags/scope/score"]
+
+    def setUp(self):
+        patcher = patch.object(
+            ServiceConnector, "_access_token_store", MemoryAccessTokenStore()
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.registration = get_test_tool_conf().find_registration(self.iss)
+
+    def test_token_is_shared_between_connectors(self):
+        with requests_mock.Mocker() as m:
+            m.post(
+                self.auth_token_url,
+                json={"access_token": "token1", "expires_in": 3600},
+            )
+            connector1 = ServiceConnector(self.registration)
+            connector2 = ServiceConnector(self.registration)
+            self.assertEqual(connector1.get_access_token(self.scopes), "token1")
+            self.assertEqual(connector2.get_access_token(self.scopes), "token1")
+            self.assertEqual(m.call_count, 1)
+
+            # different scopes need their own token
+            connector2.get_access_token(
+                ["https://purl.imsglobal.org/spec/lti-ags/scope/lineitem"]
+            )
+            self.assertEqual(m.call_count, 2)
+
+    def test_concurrent_exchanges_are_coalesced(self):
+        def slow_response(request, context):  # pylint: disable=unused-argument
+            time.sleep(0.2)
+            return {"access_token": "token1", "expires_in": 3600}
+
+        results = []
+
+        def get_access_token():
+            connector = ServiceConnector(self.registration)
+            results.append(connector.get_access_token(self.scopes))
+
+        with requests_mock.Mocker() as m:
+            m.post(self.auth_token_url, json=slow_response)
+            threads = [threading.Thread(target=get_access_token) for _ in range(5)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(m.call_count, 1)
+        self.assertEqual(results, ["token1"] * 5)
+
+    def test_token_expiration(self):
+        with requests_mock.Mocker() as m:
+            m.post(
+                self.auth_token_url,
+                [
+                    {"json": {"access_token": "token1", "expires_in": 3600}},
+                    {"json": {"access_token": "token2", "expires_in": 3600}},
+                ],
+            )
+            connector = ServiceConnector(self.registration)
+            self.assertEqual(connector.get_access_token(self.scopes), "token1")
+
+            # token is renewed a bit before it expires
+            with patch("time.time", return_value=time.time() + 3600 - 30):
+                self.assertEqual(connector.get_access_token(self.scopes), "token2")
+            self.assertEqual(m.call_count, 2)
+
+    def test_token_is_shared_between_workers(self):
+        data_storage = FakeCacheDataStorage()
+        with requests_mock.Mocker() as m:
+            m.post(
+                self.auth_token_url,
+                json={"access_token": "token1", "expires_in": 3600},
+            )
+            # every worker has its own memory store, but they share the same cache
+            for _ in range(3):
+                connector = ServiceConnector(
+                    self.registration,
+                    access_token_store=LaunchDataStorageAccessTokenStore(data_storage),
+                )
+                self.assertEqual(connector.get_access_token(self.scopes), "token1")
+            self.assertEqual(m.call_count, 1)
+
+        store = LaunchDataStorageAccessTokenStore(data_storage)
+        cache_key = connector.get_access_token_cache_key(self.scopes)
+        with patch("time.time", return_value=time.time() + 3600):
+            self.assertIsNone(store.get_access_token(cache_key))
+        store.remove_access_token(cache_key)
+        self.assertIsNone(store.get_access_token(cache_key))
+
+    def test_expires_at(self):
+        store = MemoryAccessTokenStore(safety_margin=60, default_expires_in=300)
+        now = time.time()
+        self.assertAlmostEqual(store.get_expires_at(3600), now + 3540, delta=1)
+        self.assertAlmostEqual(store.get_expires_at(None), now + 240, delta=1)
+        # short-living token: margin is limited by a half of its lifetime
+        self.assertAlmostEqual(store.get_expires_at(20), now + 10, delta=1)
+        self.assertIsNone(store.get_expires_at(0))
+
+    def test_background_refresh(self):
+        refresher = AccessTokenRefresher(refresh_ratio=0.8, idle_timeout=600)
+        self.addCleanup(refresher.stop)
+        now = time.time()
+        with requests_mock.Mocker() as m:
+            m.post(
+                self.auth_token_url,
+                [
+                    {"json": {"access_token": "token1", "expires_in": 3600}},
+                    {"json": {"access_token": "token2", "expires_in": 3600}},
+                ],
+            )
+            connector = ServiceConnector(
+                self.registration, access_token_refresher=refresher
+            )
+            cache_key = connector.get_access_token_cache_key(self.scopes)
+            self.assertEqual(connector.get_access_token(self.scopes), "token1")
+            self.assertTrue(refresher.is_tracked(cache_key))
+
+            # nothing to refresh yet
+            self.assertEqual(refresher.refresh_due(), 0)
+
+            # token is renewed after 80% of its lifetime, the caller doesn't wait for the exchange
+            with patch("time.time", return_value=now + 3600 * 0.8 + 1):
+                connector.get_access_token(self.scopes)
+                self.assertEqual(refresher.refresh_due(), 1)
+                self.assertEqual(connector.get_access_token(self.scopes), "token2")
+            self.assertEqual(m.call_count, 2)
+
+    def test_short_living_token_is_refreshed_before_store_expiration(self):
+        refresher = AccessTokenRefresher(
+            refresh_ratio=0.8, idle_timeout=600, check_interval=5
+        )
+        self.addCleanup(refresher.stop)
+        now = time.time()
+        with requests_mock.Mocker() as m:
+            m.post(
+                self.auth_token_url,
+                [
+                    {"json": {"access_token": "token1", "expires_in": 120}},
+                    {"json": {"access_token": "token2", "expires_in": 120}},
+                ],
+            )
+            connector = ServiceConnector(
+                self.registration, access_token_refresher=refresher
+            )
+            self.assertEqual(connector.get_access_token(self.scopes), "token1")
+
+            # store forgets the token after 60s (safety margin), 80% of expires_in would be too late
+            with patch("time.time", return_value=now + 56):
+                self.assertEqual(connector.get_access_token(self.scopes), "token1")
+                self.assertEqual(refresher.refresh_due(), 1)
+                self.assertEqual(connector.get_access_token(self.scopes), "token2")
+            self.assertEqual(m.call_count, 2)
+
+    def test_background_copy_of_data_storage(self):
+        data_storage = FakeCacheDataStorage()
+        store = LaunchDataStorageAccessTokenStore(data_storage)
+        connector = ServiceConnector(self.registration).set_access_token_store(store)
+        background_connector = connector.copy_for_background()
+        background_store = (
+            background_connector._access_token_store  # pylint: disable=protected-access
+        )
+        self.assertIsNot(background_store, store)
+        self.assertIsNot(
+            background_store._data_storage,  # pylint: disable=protected-access
+            data_storage,
+        )
+
+        memory_store = MemoryAccessTokenStore()
+        self.assertIs(memory_store.copy_for_background(), memory_store)
+
+    def test_idle_tokens_are_not_refreshed(self):
+        refresher = AccessTokenRefresher(refresh_ratio=0.8, idle_timeout=600)
+        self.addCleanup(refresher.stop)
+        now = time.time()
+        with requests_mock.Mocker() as m:
+            m.post(
+                self.auth_token_url,
+                json={"access_token": "token1", "expires_in": 3600},
+            )
+            connector = ServiceConnector(
+                self.registration, access_token_refresher=refresher
+            )
+            cache_key = connector.get_access_token_cache_key(self.scopes)
+            connector.get_access_token(self.scopes)
+
+            with patch("time.time", return_value=now + 3600 * 0.8 + 1):
+                self.assertEqual(refresher.refresh_due(), 0)
+            self.assertFalse(refresher.is_tracked(cache_key))
+            self.assertEqual(m.call_count, 1)
+
+    def test_reauthentication_on_revoked_token(self):
+        service_url = "http://canvas.docker/api/lti/courses/1/line_items"
+        with requests_mock.Mocker() as m:
+            m.post(
+                self.auth_token_url,
+                [
+                    {"json": {"access_token": "token1", "expires_in": 3600}},
+                    {"json": {"access_token": "token2", "expires_in": 3600}},
+                    {"json": {"access_token": "token3", "expires_in": 3600}},
+                ],
+            )
+            m.get(
+                service_url,
+                [
+                    {"status_code": 401, "text": "Unauthorized"},
+                    {"json": []},
+                    {
+                        "status_code": 403,
+                        "headers": {"WWW-Authenticate": 'Bearer error="invalid_token"'},
+                    },
+                    {"status_code": 401, "text": "Unauthorized"},
+                ],
+            )
+            connector = ServiceConnector(self.registration)
+            resp = connector.make_service_request(self.scopes, service_url)
+            self.assertEqual(resp["body"], [])
+            self.assertEqual(
+                m.request_history[3].headers["Authorization"], "Bearer token2"
+            )
+            self.assertEqual(connector.get_access_token(self.scopes), "token2")
+
+            # request is replayed only once
+            with self.assertRaises(LtiServiceException):
+                connector.make_service_request(self.scopes, service_url)
+            self.assertEqual(m.call_count, 7)
+            self.assertEqual(connector.get_access_token(self.scopes), "token3")
+
+    def test_invalid_token_response_body_is_read_only_if_needed(self):
+        def get_body():
+            body_reads.append(True)
+            return '{"error": "invalid_token"}'
+
+        body_reads = []
+        is_invalid = ServiceConnector.is_invalid_token_response
+        self.assertTrue(is_invalid(401, {}, get_body))
+        self.assertFalse(is_invalid(500, {}, get_body))
+        self.assertTrue(
+            is_invalid(
+                403, {"WWW-Authenticate": 'Bearer error="invalid_token"'}, get_body
+            )
+        )
+        self.assertEqual(body_reads, [])
+        self.assertTrue(is_invalid(400, {}, get_body))
+        self.assertEqual(body_reads, [True])
+
+    def test_only_rejected_token_is_invalidated(self):
+        connector = ServiceConnector(self.registration)
+        cache_key = connector.get_access_token_cache_key(self.scopes)
+        store = ServiceConnector.get_access_token_store()
+        store.set_access_token(cache_key, "token2", 3600)
+
+        # token was already renewed by another request
+        connector.invalidate_access_token(self.scopes, "token1")
+        self.assertEqual(store.get_access_token(cache_key), "token2")
+        connector.invalidate_access_token(self.scopes, "token2")
+        self.assertIsNone(store.get_access_token(cache_key))
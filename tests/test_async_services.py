@@ -0,0 +1,312 @@
+import asyncio
+import json
+import threading
+import unittest
+from unittest.mock import patch
+import httpx
+from pylti1p3.access_token_store import MemoryAccessTokenStore
+from pylti1p3.contrib.httpx import (
+    AsyncAssignmentsGradesService,
+    AsyncCourseGroupsService,
+    AsyncNamesRolesProvisioningService,
+    AsyncServiceConnector,
+)
+from pylti1p3.exception import LtiException, LtiServiceException
+from pylti1p3.grade import Grade
+from pylti1p3.lineitem_index import MemoryLineItemIndex
+from pylti1p3.retry_policy import RetryPolicy
+from pylti1p3.service_connector import ServiceConnector
+from .tool_config import get_test_tool_conf
+
+
+class FakePlatformTransport(httpx.AsyncBaseTransport):
+    auth_token_url = "http://canvas.docker/login/oauth2/token"
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.requests = []
+
+    async def handle_async_request(self, request):
+        self.requests.append(request)
+        if str(request.url) == self.auth_token_url:
+            # let concurrent callers meet while the token is being exchanged
+            await asyncio.sleep(0.05)
+            return httpx.Response(
+                200, json={"access_token": "token1", "expires_in": 3600}
+            )
+        route = self.routes.get((request.method, str(request.url)))
+        if route is None:
+            return httpx.Response(404, text="Not Found")
+        if isinstance(route, list):
+            route = route.pop(0) if len(route) > 1 else route[0]
+        status, body, headers = route
+        return httpx.Response(status, json=body, headers=headers)
+
+    def get_requests(self, url):
+        return [r for r in self.requests if str(r.url) == url]
+
+
+class TestAsyncServices(unittest.IsolatedAsyncioTestCase):
+    iss = "https://canvas.instructure.com"
+    members_url = "http://canvas.docker/api/lti/courses/1/names_and_roles"
+    lineitem_url = "http://canvas.docker/api/lti/courses/1/line_items/1"
+    groups_url = "http://canvas.docker/api/lti/courses/1/groups"
+
+    def setUp(self):
+        patcher = patch.object(
+            ServiceConnector, "_access_token_store", MemoryAccessTokenStore()
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.registration = get_test_tool_conf().find_registration(self.iss)
+
+    async def _get_connector(self, routes):
+        transport = FakePlatformTransport(routes)
+        client = httpx.AsyncClient(transport=transport)
+        self.addAsyncCleanup(client.aclose)
+        return AsyncServiceConnector(self.registration, client=client), transport
+
+    async def test_get_members_with_pagination(self):
+        page2_url = self.members_url + "?page=2"
+        connector, transport = await self._get_connector(
+            {
+                ("GET", self.members_url): (
+                    200,
+                    {"members": [{"user_id": "1"}], "context": {"id": "c1"}},
+                    {"Link": f'<{page2_url}>; rel="next"'},
+                ),
+                ("GET", page2_url): (200, {"members": [{"user_id": "2"}]}, {}),
+            }
+        )
+        nrps = AsyncNamesRolesProvisioningService(
+            connector, {"context_memberships_url": self.members_url}
+        )
+        members = await nrps.get_members()
+        self.assertEqual([m["user_id"] for m in members], ["1", "2"])
+        self.assertEqual(await nrps.get_context(), {"id": "c1"})
+
+        request = transport.get_requests(self.members_url)[0]
+        self.assertEqual(request.headers["Authorization"], "Bearer token1")
+        self.assertEqual(
+            request.headers["Accept"],
+            "application/vnd.ims.lti-nrps.v2.membershipcontainer+json",
+        )
+        # token is exchanged once and shared with the sync connector
+        self.assertEqual(len(transport.get_requests(transport.auth_token_url)), 1)
+        self.assertEqual(
+            ServiceConnector(self.registration).get_access_token(
+                [
+                    "https://purl.imsglobal.org/spec/lti-nrps/scope/contextmembership.readonly"
+                ]
+            ),
+            "token1",
+        )
+
+    async def test_concurrent_token_exchanges_are_coalesced(self):
+        connector, transport = await self._get_connector(
+            {("GET", self.members_url): (200, {"members": []}, {})}
+        )
+        nrps = AsyncNamesRolesProvisioningService(
+            connector, {"context_memberships_url": self.members_url}
+        )
+        await asyncio.gather(*[nrps.get_members() for _ in range(20)])
+        self.assertEqual(len(transport.get_requests(transport.auth_token_url)), 1)
+        self.assertEqual(len(transport.get_requests(self.members_url)), 20)
+
+    async def test_token_saved_by_another_worker_isnt_exchanged(self):
+        connector, transport = await self._get_connector({})
+        service_connector = connector.get_service_connector()
+        threads = []
+
+        def get_cached_access_token(_cache_key):
+            threads.append(threading.get_ident())
+            # the first lookup misses, the token is saved before the exchange starts
+            return "token2" if len(threads) > 1 else None
+
+        with patch.object(
+            service_connector,
+            "get_cached_access_token",
+            side_effect=get_cached_access_token,
+        ):
+            self.assertEqual(await connector.get_access_token(["scope"]), "token2")
+        self.assertEqual(len(transport.get_requests(transport.auth_token_url)), 0)
+        # store isn't used in the event loop thread
+        self.assertNotIn(threading.get_ident(), threads)
+
+    async def test_shared_client_follows_redirects(self):
+        client = AsyncServiceConnector.get_shared_client()
+        self.addAsyncCleanup(client.aclose)
+        self.assertTrue(client.follow_redirects)
+
+    async def test_put_grade_and_get_grades(self):
+        scores_url = self.lineitem_url + "/scores"
+        results_url = self.lineitem_url + "/results"
+        connector, transport = await self._get_connector(
+            {
+                ("POST", scores_url): (200, {"resultUrl": "url"}, {}),
+                ("GET", results_url): (200, [{"userId": "1", "resultScore": 5}], {}),
+            }
+        )
+        ags = AsyncAssignmentsGradesService(
+            connector,
+            {
+                "scope": [
+                    "https://purl.imsglobal.org/spec/lti-ags/scope/score",
+                    "https://purl.imsglobal.org/spec/lti-ags/scope/result.readonly",
+                ],
+                "lineitem": self.lineitem_url,
+            },
+        )
+        grade = Grade().set_score_given(5).set_score_maximum(10).set_user_id("1")
+        resp = await ags.put_grade(grade)
+        self.assertEqual(resp["body"], {"resultUrl": "url"})
+        request = transport.get_requests(scores_url)[0]
+        self.assertEqual(
+            request.headers["Content-Type"], "application/vnd.ims.lis.v1.score+json"
+        )
+        self.assertEqual(json.loads(request.content)["scoreGiven"], 5)
+
+        grades = await ags.get_grades()
+        self.assertEqual(grades, [{"userId": "1", "resultScore": 5}])
+
+    async def test_find_lineitem_uses_index(self):
+        lineitems_url = "http://canvas.docker/api/lti/courses/1/line_items"
+        connector, transport = await self._get_connector(
+            {
+                ("GET", lineitems_url): (
+                    200,
+                    [{"id": self.lineitem_url, "tag": "quiz"}],
+                    {},
+                ),
+            }
+        )
+        lineitem_index = MemoryLineItemIndex()
+        ags = AsyncAssignmentsGradesService(
+            connector,
+            {
+                "scope": [
+                    "https://purl.imsglobal.org/spec/lti-ags/scope/lineitem.readonly"
+                ],
+                "lineitems": lineitems_url,
+            },
+        ).set_lineitem_index(lineitem_index)
+        threads = []
+        load_index = lineitem_index.load_index
+
+        def load_index_in_thread(key):
+            threads.append(threading.get_ident())
+            return load_index(key)
+
+        with patch.object(
+            lineitem_index, "load_index", side_effect=load_index_in_thread
+        ):
+            for _ in range(3):
+                lineitem = await ags.find_lineitem_by_tag("quiz")
+                self.assertEqual(lineitem.get_id(), self.lineitem_url)
+        self.assertEqual(len(transport.get_requests(lineitems_url)), 1)
+        # index isn't used in the event loop thread
+        self.assertEqual(len(threads), 3)
+        self.assertNotIn(threading.get_ident(), threads)
+
+    async def test_get_sets_with_groups(self):
+        sets_url = "http://canvas.docker/api/lti/courses/1/group_sets"
+        connector, _ = await self._get_connector(
+            {
+                ("GET", sets_url): (200, {"sets": [{"id": "s1", "name": "Set"}]}, {}),
+                ("GET", self.groups_url): (
+                    200,
+                    {"groups": [{"id": "g1", "name": "Group", "set_id": "s1"}]},
+                    {},
+                ),
+            }
+        )
+        cgs = AsyncCourseGroupsService(
+            connector,
+            {
+                "scope": [
+                    "https://purl.imsglobal.org/spec/lti-gs/scope/contextgroup.readonly"
+                ],
+                "context_groups_url": self.groups_url,
+                "context_group_sets_url": sets_url,
+            },
+        )
+        self.assertTrue(cgs.has_sets())
+        sets = await cgs.get_sets(include_groups=True)
+        self.assertEqual(sets[0]["groups"][0]["id"], "g1")
+
+    async def test_error_response(self):
+        connector, _ = await self._get_connector({})
+        nrps = AsyncNamesRolesProvisioningService(
+            connector, {"context_memberships_url": self.members_url}
+        )
+        with self.assertRaises(LtiServiceException) as cm:
+            await nrps.get_members()
+        self.assertEqual(cm.exception.response.status_code, 404)
+
+    async def test_retry(self):
+        connector, transport = await self._get_connector(
+            {
+                ("GET", self.members_url): [
+                    (503, {}, {"Retry-After": "0"}),
+                    (200, {"members": [{"user_id": "1"}]}, {}),
+                ]
+            }
+        )
+        retry_policy = RetryPolicy()
+        connector.set_retry_policy(retry_policy)
+        nrps = AsyncNamesRolesProvisioningService(
+            connector, {"context_memberships_url": self.members_url}
+        )
+        members = await nrps.get_members()
+        self.assertEqual(len(members), 1)
+        self.assertEqual(len(transport.get_requests(self.members_url)), 2)
+        self.assertEqual(retry_policy.get_stats()["retries"], 1)
+
+    async def test_reauthentication_on_revoked_token(self):
+        connector, transport = await self._get_connector(
+            {
+                ("GET", self.members_url): [
+                    (401, {"error": "invalid_token"}, {}),
+                    (200, {"members": []}, {}),
+                ]
+            }
+        )
+        nrps = AsyncNamesRolesProvisioningService(
+            connector, {"context_memberships_url": self.members_url}
+        )
+        await nrps.get_members()
+        self.assertEqual(len(transport.get_requests(transport.auth_token_url)), 2)
+        self.assertEqual(len(transport.get_requests(self.members_url)), 2)
+
+    async def test_iter_members(self):
+        page2_url = self.members_url + "?page=2"
+        connector, transport = await self._get_connector(
+            {
+                ("GET", self.members_url): (
+                    200,
+                    {"members": [{"user_id": "1"}]},
+                    {"Link": f'<{page2_url}>; rel="next"'},
+                ),
+                ("GET", page2_url): (200, {"members": [{"user_id": "2"}]}, {}),
+            }
+        )
+        nrps = AsyncNamesRolesProvisioningService(
+            connector, {"context_memberships_url": self.members_url}
+        )
+        async for member in nrps.iter_members():
+            self.assertEqual(member["user_id"], "1")
+            break
+        self.assertEqual(len(transport.get_requests(page2_url)), 0)
+
+    async def test_iter_members_invalid_response(self):
+        connector, _ = await self._get_connector(
+            {("GET", self.members_url): (200, [{"user_id": "1"}], {})}
+        )
+        nrps = AsyncNamesRolesProvisioningService(
+            connector, {"context_memberships_url": self.members_url}
+        )
+        with self.assertRaisesRegex(
+            LtiException, "Unknown response type received for members"
+        ):
+            async for _ in nrps.iter_members():
+                pass
@@ -163,3 +163,60 @@ class TestGrades(TestServicesBase):
 
                     resp = ags.put_grade(sc, sc_line_item)
                     self.assertEqual(expected_result, resp["body"])
+
+    def test_iter_grades(self):
+        from pylti1p3.assignments_grades import AssignmentsGradesService
+        from pylti1p3.service_connector import ServiceConnector
+
+        lineitem_url = "http://canvas.docker/api/lti/courses/1/line_items/1"
+        results_url = lineitem_url + "/results"
+        registration = get_test_tool_conf().find_registration(
+            "https://canvas.instructure.com"
+        )
+        ags = AssignmentsGradesService(
+            ServiceConnector(registration),
+            {
+                "scope": [
+                    "https://purl.imsglobal.org/spec/lti-ags/scope/result.readonly"
+                ],
+                "lineitem": lineitem_url,
+            },
+        )
+        with requests_mock.Mocker() as m:
+            m.post(
+                self._get_auth_token_url(),
+                text=json.dumps(self._get_auth_token_response()),
+            )
+            m.get(
+                results_url + "?limit=2",
+                complete_qs=True,
+                json=[{"userId": "1"}, {"userId": "2"}],
+                headers={"Link": f'<{results_url}?limit=2&page=2>; rel="next"'},
+            )
+            m.get(
+                results_url + "?limit=2&page=2",
+                complete_qs=True,
+                json=[{"userId": "3"}],
+            )
+            m.get(
+                results_url + "?user_id=3",
+                complete_qs=True,
+                json=[{"userId": "3"}],
+            )
+
+            # all pages are returned
+            grades = ags.get_grades(limit=2)
+            self.assertEqual([g["userId"] for g in grades], ["1", "2", "3"])
+
+            # next page isn't requested if the iteration is stopped
+            m.reset_mock()
+            for grade in ags.iter_grades(limit=2):
+                if grade["userId"] == "1":
+                    break
+            self.assertEqual(
+                [r.url for r in m.request_history if r.method == "GET"],
+                [results_url + "?limit=2"],
+            )
+
+            grades = ags.get_grades(user_id="3")
+            self.assertEqual(grades, [{"userId": "3"}])
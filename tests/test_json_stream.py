@@ -0,0 +1,114 @@
+import io
+import json
+import unittest
+from unittest.mock import patch
+import requests_mock
+from pylti1p3.access_token_store import MemoryAccessTokenStore
+from pylti1p3.json_stream import JsonArrayStreamParser, iter_json_array_items
+from pylti1p3.service_connector import ServiceConnector
+from .tool_config import get_test_tool_conf
+
+
+def split_chunks(body, size):
+    return [body[i : i + size] for i in range(0, len(body), size)]
+
+
+class TestJsonStream(unittest.TestCase):
+    members_body = {
+        "id": "http://canvas.docker/api/lti/courses/1/names_and_roles",
+        "context": {"id": "4dde05e8", "title": "Course [1]", "ids": [1, 2]},
+        "total": 12345,
+        "members": [
+            {"user_id": "1", "name": "Jürgen", "roles": ["Learner"]},
+            {"user_id": "2", "name": "Zoë", "roles": []},
+            12345,
+            1.5e-7,
+            "]",
+            None,
+            True,
+            [1, [2]],
+        ],
+        "members_count": 8,
+    }
+
+    def test_items_from_any_chunks(self):
+        body = json.dumps(self.members_body).encode("utf-8")
+        for size in (1, 2, 3, 7, 64, len(body)):
+            self.assertEqual(
+                list(iter_json_array_items(split_chunks(body, size), "members")),
+                self.members_body["members"],
+            )
+
+        body = json.dumps([{"id": "1"}, 100, {"id": "2"}]).encode("utf-8")
+        for size in (1, 3, len(body)):
+            self.assertEqual(
+                list(iter_json_array_items(split_chunks(body, size))),
+                [{"id": "1"}, 100, {"id": "2"}],
+            )
+
+    def test_items_are_returned_as_soon_as_received(self):
+        parser = JsonArrayStreamParser("members")
+        self.assertEqual(
+            parser.feed(b'{"members": [{"user_id": "1"}, {"us'), [{"user_id": "1"}]
+        )
+        self.assertEqual(parser.feed(b'er_id": "2"}, 3'), [{"user_id": "2"}])
+        self.assertEqual(parser.feed(b"4, 5"), [34])
+        self.assertEqual(parser.feed(b"]"), [5])
+        self.assertTrue(parser.is_done())
+        self.assertEqual(parser.close(), [])
+
+    def test_missing_and_empty_body(self):
+        self.assertEqual(list(iter_json_array_items([b""], "members")), [])
+        self.assertEqual(list(iter_json_array_items([b'{"id": "1"}'], "members")), [])
+        self.assertEqual(list(iter_json_array_items([b"[]"])), [])
+
+    def test_invalid_body(self):
+        with self.assertRaises(ValueError):
+            list(iter_json_array_items([b'{"id": "1"}']))
+        with self.assertRaises(ValueError):
+            list(iter_json_array_items([b'{"members": [1, 2'], "members"))
+        with self.assertRaises(ValueError):
+            list(iter_json_array_items([b'{"members": [1 2]}'], "members"))
+
+    def test_streaming_service_request(self):
+        patcher = patch.object(
+            ServiceConnector, "_access_token_store", MemoryAccessTokenStore()
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        members_url = "http://canvas.docker/api/lti/courses/1/names_and_roles"
+        next_url = members_url + "?page=2"
+        body = io.BytesIO(
+            json.dumps({"members": [{"user_id": str(i)} for i in range(1000)]}).encode(
+                "utf-8"
+            )
+        )
+        registration = get_test_tool_conf().find_registration(
+            "https://canvas.instructure.com"
+        )
+        connector = ServiceConnector(registration)
+
+        with patch.object(ServiceConnector, "_stream_chunk_size", 64):
+            with requests_mock.Mocker() as m:
+                m.post(
+                    "http://canvas.docker/login/oauth2/token",
+                    json={"access_token": "token1", "expires_in": 3600},
+                )
+                m.get(
+                    members_url,
+                    body=body,
+                    headers={"Link": f'<{next_url}>; rel="next"'},
+                )
+                response = connector.make_streaming_service_request(
+                    [
+                        "https://purl.imsglobal.org/spec/lti-nrps/scope/contextmembership.readonly"
+                    ],
+                    members_url,
+                    items_key="members",
+                )
+                self.assertEqual(response["next_page_url"], next_url)
+                self.assertEqual(next(response["items"]), {"user_id": "0"})
+                # only the beginning of the body was read
+                self.assertLess(body.tell(), 200)
+                self.assertEqual(len(list(response["items"])), 999)
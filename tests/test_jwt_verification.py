@@ -0,0 +1,88 @@
+import json
+import time
+import unittest
+import jwt
+from jwt.algorithms import get_default_algorithms
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from parameterized import parameterized
+from pylti1p3.jwt_verification import (
+    CryptographyJwtVerifier,
+    PyJWKVerifier,
+    PyJwtVerifier,
+    validate_jwt_claims,
+    verify_jwt_signature,
+)
+
+
+class TestJwtVerification(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        cls.public_key = cls.private_key.public_key()
+
+    def _check(self, payload, options=None, token=None):
+        """
+        Check that fused verification gives the same result as jwt.decode.
+        """
+        options = options or {"verify_aud": False}
+        token = token or jwt.encode(payload, self.private_key, algorithm="RS256")
+        expected_error = None
+        try:
+            jwt.decode(token, self.public_key, algorithms=["RS256"], options=options)
+        except jwt.InvalidTokenError as e:
+            expected_error = str(e)
+
+        error = None
+        try:
+            verify_jwt_signature(token.split("."), self.public_key, "RS256", options)
+            validate_jwt_claims(payload, options)
+        except jwt.InvalidTokenError as e:
+            error = str(e)
+        self.assertEqual(error, expected_error)
+
+    def test_same_result_as_jwt_decode(self):
+        now = int(time.time())
+        self._check({"sub": "user", "iat": now, "exp": now + 60})
+        self._check({"exp": now - 60})
+        self._check({"exp": now - 60}, {"verify_aud": False, "verify_exp": False})
+        self._check({"nbf": now + 60})
+        self._check({"iat": now + 60})
+        self._check({"iat": "now"})
+        self._check({"aud": "client-id"}, {})
+        self._check({"aud": "client-id"})
+
+    def test_invalid_signature(self):
+        token = jwt.encode({"sub": "user"}, self.private_key, algorithm="RS256")
+        header, body, signature = token.split(".")
+        signature = signature[:-4] + ("AAAA" if signature[-4:] != "AAAA" else "BBBB")
+        self._check({"sub": "user"}, token=".".join([header, body, signature]))
+
+    @parameterized.expand(
+        [
+            (verifier, alg)
+            for verifier in (CryptographyJwtVerifier, PyJwtVerifier, PyJWKVerifier)
+            for alg in ("RS256", "RS384", "RS512", "ES256", "PS256")
+        ]
+    )
+    def test_verifiers(self, verifier_cls, alg):
+        if alg.startswith("ES"):
+            private_key = ec.generate_private_key(ec.SECP256R1())
+        else:
+            private_key = self.private_key
+        jwk = json.loads(get_default_algorithms()[alg].to_jwk(private_key.public_key()))
+        token = jwt.encode({"sub": "user"}, private_key, algorithm=alg)
+        header, _, signature = token.split(".")
+
+        verifier = verifier_cls()
+        public_key = verifier.load_public_key(jwk, alg)
+        verify_jwt_signature(
+            token.split("."), public_key, alg, {"verify_aud": False}, verifier
+        )
+
+        forged_body = jwt.utils.base64url_encode(b'{"sub":"admin"}').decode()
+        with self.assertRaisesRegex(
+            jwt.InvalidSignatureError, "Signature verification failed"
+        ):
+            verify_jwt_signature(
+                [header, forged_body, signature], public_key, alg, {}, verifier
+            )
@@ -0,0 +1,277 @@
+import json
+import threading
+import time
+import unittest
+import requests
+import requests_mock
+from pylti1p3.key_set_fetcher import KeySetFetcher
+from .cache import FakeCacheDataStorage
+
+
+class TestKeySetFetcher(unittest.TestCase):
+    key_set_url = "https://canvas.instructure.com/api/lti/security/jwks"
+    key_set = {"keys": [{"kty": "RSA", "e": "AQAB", "n": "uX1M", "kid": "1"}]}
+
+    def test_concurrent_fetches_are_coalesced(self):
+        def slow_response(request, context):  # pylint: disable=unused-argument
+            time.sleep(0.2)
+            return json.dumps(self.key_set)
+
+        results = []
+
+        def fetch():
+            fetcher = KeySetFetcher(requests.Session())
+            results.append(fetcher.fetch(self.key_set_url))
+
+        with requests_mock.Mocker() as m:
+            m.get(self.key_set_url, text=slow_response)
+            threads = [threading.Thread(target=fetch) for _ in range(5)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(m.call_count, 1)
+
+        self.assertEqual(results, [self.key_set] * 5)
+
+    def test_cross_process_lock(self):
+        data_storage = FakeCacheDataStorage()
+        fetcher = KeySetFetcher(
+            requests.Session(), data_storage=data_storage, lock_timeout=5
+        )
+        cache_key = KeySetFetcher.get_cache_key(self.key_set_url)
+
+        # lock is held by another process which saves key set a bit later
+        data_storage.add_value(cache_key + "-lock", True)
+        timer = threading.Timer(
+            0.2,
+            lambda: data_storage.set_value(
+                cache_key, {"key_set": self.key_set, "fetched_at": time.time()}
+            ),
+        )
+        timer.start()
+
+        with requests_mock.Mocker() as m:
+            m.get(self.key_set_url, text=json.dumps(self.key_set))
+            self.assertEqual(fetcher.fetch(self.key_set_url), self.key_set)
+            self.assertEqual(m.call_count, 0)
+        timer.join()
+
+    def test_lock_is_released(self):
+        data_storage = FakeCacheDataStorage()
+        fetcher = KeySetFetcher(
+            requests.Session(), data_storage=data_storage, lock_timeout=5
+        )
+        cache_key = KeySetFetcher.get_cache_key(self.key_set_url)
+
+        with requests_mock.Mocker() as m:
+            m.get(self.key_set_url, text=json.dumps(self.key_set))
+            self.assertEqual(fetcher.fetch(self.key_set_url), self.key_set)
+            self.assertEqual(m.call_count, 1)
+        self.assertEqual(data_storage.get_value(cache_key)["key_set"], self.key_set)
+        self.assertFalse(data_storage.check_value(cache_key + "-lock"))
+
+    def test_stale_key_set_is_refreshed_in_background(self):
+        data_storage = FakeCacheDataStorage()
+        fetcher = KeySetFetcher(
+            requests.Session(), data_storage=data_storage, refresh_after=60
+        )
+        cache_key = KeySetFetcher.get_cache_key(self.key_set_url)
+        stale_key_set = {"keys": []}
+        data_storage.set_value(
+            cache_key, {"key_set": stale_key_set, "fetched_at": time.time() - 120}
+        )
+
+        with requests_mock.Mocker() as m:
+            m.get(self.key_set_url, text=json.dumps(self.key_set))
+            # stale key set is served without waiting for the platform
+            self.assertEqual(fetcher.fetch(self.key_set_url), stale_key_set)
+
+            deadline = time.monotonic() + 5
+            while m.call_count == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            while (
+                data_storage.get_value(cache_key)["key_set"] != self.key_set
+                and time.monotonic() < deadline
+            ):
+                time.sleep(0.01)
+            self.assertEqual(m.call_count, 1)
+            self.assertEqual(fetcher.fetch(self.key_set_url), self.key_set)
+            self.assertEqual(m.call_count, 1)
+
+    def test_failed_background_refresh_is_not_repeated_per_launch(self):
+        key_set_url = self.key_set_url + "?down"
+        data_storage = FakeCacheDataStorage()
+        fetcher = KeySetFetcher(
+            requests.Session(), data_storage=data_storage, refresh_after=60
+        )
+        data_storage.set_value(
+            KeySetFetcher.get_cache_key(key_set_url),
+            {"key_set": self.key_set, "fetched_at": time.time() - 120},
+        )
+
+        def slow_error(request, context):  # pylint: disable=unused-argument
+            time.sleep(0.2)
+            context.status_code = 503
+            return "Service Unavailable"
+
+        def fetch():
+            self.assertEqual(fetcher.fetch(key_set_url), self.key_set)
+
+        with requests_mock.Mocker() as m:
+            m.get(key_set_url, text=slow_error)
+            # burst of launches with the stale key set starts only one refresh
+            threads = [threading.Thread(target=fetch) for _ in range(10)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            deadline = time.monotonic() + 5
+            # pylint: disable=protected-access
+            while (
+                m.call_count == 0 or key_set_url in fetcher._refreshing
+            ) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(m.call_count, 1)
+
+            # platform has failed, the next launches don't retry it right away
+            for _ in range(5):
+                fetch()
+            time.sleep(0.1)
+            self.assertEqual(m.call_count, 1)
+
+    def test_refetch_for_unknown_kid(self):
+        key_set_url = self.key_set_url + "?rotated"
+        data_storage = FakeCacheDataStorage()
+        fetcher = KeySetFetcher(
+            requests.Session(),
+            data_storage=data_storage,
+            refetch_interval=60,
+            unknown_kid_lifetime=300,
+        )
+        rotated_key_set = {"keys": [dict(self.key_set["keys"][0], kid="2")]}
+
+        with requests_mock.Mocker() as m:
+            m.get(key_set_url, text=json.dumps(self.key_set))
+            self.assertEqual(fetcher.fetch(key_set_url), self.key_set)
+
+            m.get(key_set_url, text=json.dumps(rotated_key_set))
+            self.assertEqual(fetcher.fetch(key_set_url), self.key_set)
+            self.assertEqual(
+                fetcher.refetch_for_unknown_kid(key_set_url, "2", "RS256"),
+                rotated_key_set,
+            )
+            self.assertEqual(fetcher.fetch(key_set_url), rotated_key_set)
+            self.assertEqual(m.call_count, 2)
+
+            # the next refetch is rate limited
+            self.assertIsNone(
+                fetcher.refetch_for_unknown_kid(key_set_url, "3", "RS256")
+            )
+            self.assertEqual(m.call_count, 2)
+
+        fetcher.add_unknown_kid(key_set_url, "3", "RS256")
+        self.assertTrue(fetcher.is_unknown_kid(key_set_url, "3", "RS256"))
+        self.assertFalse(fetcher.is_unknown_kid(key_set_url, "2", "RS256"))
+
+    def test_refetch_for_unknown_kid_during_background_refresh(self):
+        key_set_url = self.key_set_url + "?refreshing"
+        data_storage = FakeCacheDataStorage()
+        fetcher = KeySetFetcher(
+            requests.Session(), data_storage=data_storage, refresh_after=60
+        )
+        data_storage.set_value(
+            KeySetFetcher.get_cache_key(key_set_url),
+            {"key_set": self.key_set, "fetched_at": time.time() - 120},
+        )
+        rotated_key_set = {"keys": [dict(self.key_set["keys"][0], kid="2")]}
+        responses = [self.key_set, rotated_key_set]
+
+        def response(request, context):  # pylint: disable=unused-argument
+            key_set = responses.pop(0)
+            if key_set is self.key_set:
+                # background refresh got the response before the platform has rotated its keys
+                time.sleep(0.3)
+            return json.dumps(key_set)
+
+        with requests_mock.Mocker() as m:
+            m.get(key_set_url, text=response)
+            self.assertEqual(fetcher.fetch(key_set_url), self.key_set)
+            deadline = time.monotonic() + 5
+            while m.call_count == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            # forced refetch doesn't join the background refresh which is in flight
+            self.assertEqual(
+                fetcher.refetch_for_unknown_kid(key_set_url, "2", "RS256"),
+                rotated_key_set,
+            )
+            self.assertEqual(m.call_count, 2)
+
+            # let the background refresh finish while the platform is still mocked
+            # pylint: disable=protected-access
+            while (
+                fetcher._fetches.is_in_flight(key_set_url)
+                and time.monotonic() < deadline
+            ):
+                time.sleep(0.01)
+
+    def test_http_caching(self):
+        key_set_url = self.key_set_url + "?http-caching"
+        data_storage = FakeCacheDataStorage()
+        fetcher = KeySetFetcher(
+            requests.Session(), data_storage=data_storage, cache_lifetime=300
+        )
+        cache_key = KeySetFetcher.get_cache_key(key_set_url)
+
+        with requests_mock.Mocker() as m:
+            m.get(
+                key_set_url,
+                text=json.dumps(self.key_set),
+                headers={"Cache-Control": "public, max-age=600", "ETag": '"v1"'},
+            )
+            self.assertEqual(fetcher.fetch(key_set_url), self.key_set)
+            entry = data_storage.get_value(cache_key)
+            self.assertEqual(entry["max_age"], 600)
+            self.assertEqual(entry["etag"], '"v1"')
+
+            # fresh key set is served from the cache
+            self.assertEqual(fetcher.fetch(key_set_url), self.key_set)
+            self.assertEqual(m.call_count, 1)
+
+            # stale key set is revalidated with the conditional request
+            entry["fetched_at"] -= 601
+            data_storage.set_value(cache_key, entry)
+            m.get(key_set_url, status_code=304, headers={"Cache-Control": "max-age=60"})
+            self.assertIs(fetcher.fetch(key_set_url), entry["key_set"])
+            self.assertEqual(m.call_count, 2)
+            self.assertEqual(m.last_request.headers["If-None-Match"], '"v1"')
+            entry = data_storage.get_value(cache_key)
+            self.assertEqual(entry["max_age"], 60)
+            self.assertEqual(entry["etag"], '"v1"')
+
+    def test_max_age_doesnt_shorten_cache_lifetime(self):
+        key_set_url = self.key_set_url + "?max-age-0"
+        fetcher = KeySetFetcher(
+            requests.Session(),
+            data_storage=FakeCacheDataStorage(),
+            cache_lifetime=7200,
+        )
+        with requests_mock.Mocker() as m:
+            m.get(
+                key_set_url,
+                text=json.dumps(self.key_set),
+                headers={"Cache-Control": "max-age=0, private, must-revalidate"},
+            )
+            for _ in range(5):
+                self.assertEqual(fetcher.fetch(key_set_url), self.key_set)
+            self.assertEqual(m.call_count, 1)
+
+    def test_get_max_age(self):
+        self.assertEqual(KeySetFetcher.get_max_age({"Cache-Control": "max-age=60"}), 60)
+        self.assertEqual(
+            KeySetFetcher.get_max_age({"Cache-Control": "max-age=60", "Age": "20"}), 40
+        )
+        self.assertIsNone(KeySetFetcher.get_max_age({"Cache-Control": "s-maxage=60"}))
+        self.assertIsNone(KeySetFetcher.get_max_age({}))
@@ -0,0 +1,184 @@
+import copy
+import importlib.util
+import json
+import unittest
+from unittest.mock import patch
+import requests_mock
+from pylti1p3.access_token_store import MemoryAccessTokenStore
+from pylti1p3.assignments_grades import AssignmentsGradesService
+from pylti1p3.lineitem import LineItem
+from pylti1p3.lineitem_index import (
+    LaunchDataStorageLineItemIndex,
+    MemoryLineItemIndex,
+)
+from pylti1p3.service_connector import ServiceConnector
+from .cache import FakeCacheDataStorage
+from .tool_config import get_test_tool_conf
+
+
+class TestLineItemIndex(unittest.TestCase):
+    lineitems_url = "http://canvas.docker/api/lti/courses/1/line_items"
+
+    def setUp(self):
+        patcher = patch.object(
+            ServiceConnector, "_access_token_store", MemoryAccessTokenStore()
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _get_ags(self, lineitem_index, client_id=None):
+        registration = get_test_tool_conf().find_registration(
+            "https://canvas.instructure.com"
+        )
+        if client_id:
+            registration = copy.copy(registration).set_client_id(client_id)
+        return AssignmentsGradesService(
+            ServiceConnector(registration),
+            {
+                "scope": ["https://purl.imsglobal.org/spec/lti-ags/scope/lineitem"],
+                "lineitems": self.lineitems_url,
+            },
+        ).set_lineitem_index(lineitem_index)
+
+    def _mock_platform(self, m, lineitems_pages):
+        m.post(
+            "http://canvas.docker/login/oauth2/token",
+            json={"access_token": "token1", "expires_in": 3600},
+        )
+        for page, lineitems in enumerate(lineitems_pages, start=1):
+            is_last = page == len(lineitems_pages)
+            m.get(
+                self.lineitems_url + ("?page=" + str(page) if page > 1 else ""),
+                complete_qs=True,
+                json=lineitems,
+                headers=(
+                    {}
+                    if is_last
+                    else {"Link": f'<{self.lineitems_url}?page={page + 1}>; rel="next"'}
+                ),
+            )
+
+    @staticmethod
+    def _get_requests_count(m, method="GET"):
+        return len([r for r in m.request_history if r.method == method])
+
+    def test_lookups_use_index(self):
+        ags = self._get_ags(MemoryLineItemIndex())
+        with requests_mock.Mocker() as m:
+            self._mock_platform(
+                m,
+                [
+                    [{"id": self.lineitems_url + "/1", "tag": "quiz"}],
+                    [
+                        {
+                            "id": self.lineitems_url + "/2",
+                            "tag": "exam",
+                            "resourceId": "r2",
+                            "resourceLinkId": "rl2",
+                        }
+                    ],
+                ],
+            )
+
+            # index is built with one sweep over all pages
+            self.assertEqual(
+                ags.find_lineitem_by_tag("exam").get_id(), self.lineitems_url + "/2"
+            )
+            self.assertEqual(self._get_requests_count(m), 2)
+            for _ in range(10):
+                self.assertEqual(
+                    ags.find_lineitem_by_tag("quiz").get_id(),
+                    self.lineitems_url + "/1",
+                )
+            self.assertIsNotNone(ags.find_lineitem_by_id(self.lineitems_url + "/2"))
+            self.assertIsNotNone(ags.find_lineitem_by_resource_id("r2"))
+            self.assertIsNotNone(ags.find_lineitem_by_resource_link_id("rl2"))
+            self.assertEqual(self._get_requests_count(m), 2)
+
+            # miss refreshes the index
+            self.assertIsNone(ags.find_lineitem_by_tag("unknown"))
+            self.assertEqual(self._get_requests_count(m), 4)
+
+    def test_created_lineitem_is_added_to_index(self):
+        ags = self._get_ags(MemoryLineItemIndex())
+        with requests_mock.Mocker() as m:
+            self._mock_platform(m, [[{"id": self.lineitems_url + "/1", "tag": "quiz"}]])
+            m.post(
+                self.lineitems_url,
+                text=json.dumps(
+                    {
+                        "id": self.lineitems_url + "/2",
+                        "tag": "score",
+                        "scoreMaximum": 100,
+                    }
+                ),
+            )
+            new_lineitem = LineItem().set_tag("score").set_score_maximum(100)
+
+            lineitem = ags.find_or_create_lineitem(new_lineitem)
+            self.assertEqual(lineitem.get_id(), self.lineitems_url + "/2")
+            lineitem = ags.find_or_create_lineitem(new_lineitem)
+            self.assertEqual(lineitem.get_id(), self.lineitems_url + "/2")
+
+            self.assertEqual(self._get_requests_count(m), 1)
+            # token exchange + line item creation
+            self.assertEqual(self._get_requests_count(m, "POST"), 2)
+
+    def test_index_expiration(self):
+        lineitem_index = MemoryLineItemIndex(ttl=60)
+        ags = self._get_ags(lineitem_index)
+        with requests_mock.Mocker() as m:
+            self._mock_platform(m, [[{"id": self.lineitems_url + "/1", "tag": "quiz"}]])
+            with patch("time.time", return_value=1000):
+                ags.find_lineitem_by_tag("quiz")
+                ags.find_lineitem_by_tag("quiz")
+            self.assertEqual(self._get_requests_count(m), 1)
+            with patch("time.time", return_value=1061):
+                self.assertIsNone(
+                    lineitem_index.get_index(ags.get_lineitem_index_key())
+                )
+                ags.find_lineitem_by_tag("quiz")
+            self.assertEqual(self._get_requests_count(m), 2)
+
+    def test_index_is_shared_between_workers(self):
+        data_storage = FakeCacheDataStorage()
+        with requests_mock.Mocker() as m:
+            self._mock_platform(m, [[{"id": self.lineitems_url + "/1", "tag": "quiz"}]])
+            for _ in range(3):
+                # every worker has its own service and index object
+                ags = self._get_ags(LaunchDataStorageLineItemIndex(data_storage))
+                self.assertIsNotNone(ags.find_lineitem_by_tag("quiz"))
+            self.assertEqual(self._get_requests_count(m), 1)
+
+    def test_index_is_separated_by_registration(self):
+        lineitem_index = MemoryLineItemIndex()
+        ags = self._get_ags(lineitem_index)
+        other_ags = self._get_ags(lineitem_index, client_id="10000000000000")
+        self.assertNotEqual(
+            ags.get_lineitem_index_key(), other_ags.get_lineitem_index_key()
+        )
+        with requests_mock.Mocker() as m:
+            self._mock_platform(m, [[{"id": self.lineitems_url + "/1", "tag": "quiz"}]])
+            self.assertIsNotNone(ags.find_lineitem_by_tag("quiz"))
+            self.assertEqual(self._get_requests_count(m), 1)
+
+            # another tool builds its own index
+            self.assertIsNotNone(other_ags.find_lineitem_by_tag("quiz"))
+            self.assertEqual(self._get_requests_count(m), 2)
+
+    @unittest.skipUnless(importlib.util.find_spec("httpx"), "httpx is not installed")
+    def test_async_service_lineitem_index(self):
+        # pylint: disable=import-outside-toplevel
+        from pylti1p3.contrib.httpx import (
+            AsyncAssignmentsGradesService,
+            AsyncServiceConnector,
+        )
+
+        registration = get_test_tool_conf().find_registration(
+            "https://canvas.instructure.com"
+        )
+        lineitem_index = MemoryLineItemIndex()
+        ags = AsyncAssignmentsGradesService(
+            AsyncServiceConnector(registration), {"lineitems": self.lineitems_url}
+        ).set_lineitem_index(lineitem_index)
+        self.assertIs(ags.get_lineitem_index(), lineitem_index)
@@ -0,0 +1,87 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+import requests
+import requests_mock
+from pylti1p3.key_set_fetcher import KeySetFetcher
+from pylti1p3.launch_data_storage.mmap_file import MmapFileDataStorage
+
+
+class TestMmapFileDataStorage(unittest.TestCase):
+    key_set_url = "https://canvas.instructure.com/api/lti/security/mmap-jwks"
+    key_set = {"keys": [{"kty": "RSA", "e": "AQAB", "n": "uX1M", "kid": "1"}]}
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+
+    def test_values(self):
+        storage = MmapFileDataStorage(self.path)
+        self.assertIsNone(storage.get_value("key"))
+        self.assertFalse(storage.check_value("key"))
+
+        storage.set_value("key", {"a": 1})
+        storage.set_value("key", {"a": 2})
+        self.assertEqual(storage.get_value("key"), {"a": 2})
+        self.assertTrue(storage.check_value("key"))
+        # temporary files are not left behind
+        self.assertEqual(len(os.listdir(self.path)), 1)
+
+        self.assertFalse(storage.add_value("key", {"a": 3}))
+        storage.remove_value("key")
+        self.assertTrue(storage.add_value("key", {"a": 3}))
+        self.assertEqual(storage.get_value("key"), {"a": 3})
+
+    def test_expiration(self):
+        storage = MmapFileDataStorage(self.path)
+        storage.set_value("key", "value", exp=10)
+        self.assertEqual(storage.get_value("key"), "value")
+        with patch("time.time", return_value=time.time() + 11):
+            self.assertIsNone(storage.get_value("key"))
+            self.assertTrue(storage.add_value("key", "new-value", exp=10))
+
+    def test_parsed_value_is_cached_until_file_is_replaced(self):
+        storage = MmapFileDataStorage(self.path)
+        storage.set_value("key", {"a": 1})
+        with patch("json.loads", wraps=json.loads) as loads:
+            for _ in range(5):
+                self.assertEqual(storage.get_value("key"), {"a": 1})
+            self.assertEqual(loads.call_count, 1)
+
+            # value written by another worker is read again
+            MmapFileDataStorage(self.path).set_value("key", {"a": 2})
+            self.assertEqual(storage.get_value("key"), {"a": 2})
+            self.assertEqual(loads.call_count, 2)
+
+    def test_fresh_value_isnt_removed_as_expired(self):
+        storage = MmapFileDataStorage(self.path)
+        file_path = storage._get_file_path("key")  # pylint: disable=protected-access
+        storage.set_value("key", "old", exp=10)
+        with patch("time.time", return_value=time.time() + 11):
+            # another worker has replaced the expired value after it was checked by this one
+            with patch.object(
+                storage, "_read_file", side_effect=[None, {"value": "new"}]
+            ):
+                self.assertFalse(storage.add_value("key", "value", exp=10))
+            self.assertEqual(os.listdir(self.path), [os.path.basename(file_path)])
+            self.assertTrue(storage.add_value("key", "value", exp=10))
+        self.assertEqual(storage.get_value("key"), "value")
+        # moved away files are not left behind
+        self.assertEqual(os.listdir(self.path), [os.path.basename(file_path)])
+
+    def test_key_set_is_shared_between_workers(self):
+        worker1 = KeySetFetcher(
+            requests.Session(), data_storage=MmapFileDataStorage(self.path)
+        )
+        worker2 = KeySetFetcher(
+            requests.Session(), data_storage=MmapFileDataStorage(self.path)
+        )
+        with requests_mock.Mocker() as m:
+            m.get(self.key_set_url, text=json.dumps(self.key_set))
+            self.assertEqual(worker1.fetch(self.key_set_url), self.key_set)
+            self.assertEqual(worker2.fetch(self.key_set_url), self.key_set)
+            self.assertEqual(m.call_count, 1)
@@ -1,6 +1,9 @@
 import json
 from unittest.mock import patch
 import requests_mock
+from pylti1p3.exception import LtiException
+from pylti1p3.names_roles import NamesRolesProvisioningService
+from pylti1p3.service_connector import ServiceConnector
 from .request import FakeRequest
 from .tool_config import get_test_tool_conf
 from .base import TestServicesBase
@@ -87,3 +90,113 @@ class TestNamesRolesProvisioningService(TestServicesBase):
                             ],
                         },
                     )
+
+    def test_iter_members(self):
+        members_url = "http://canvas.docker/api/lti/courses/1/names_and_roles"
+        registration = get_test_tool_conf().find_registration(
+            "https://canvas.instructure.com"
+        )
+        nrps = NamesRolesProvisioningService(
+            ServiceConnector(registration),
+            {"context_memberships_url": members_url},
+        )
+        with requests_mock.Mocker() as m:
+            m.post(
+                self._get_auth_token_url(),
+                text=json.dumps(self._get_auth_token_response()),
+            )
+            for page in range(1, 4):
+                m.get(
+                    f"{members_url}?page={page}",
+                    json={"members": [{"user_id": str(page)}]},
+                    headers=(
+                        {"Link": f'<{members_url}?page={page + 1}>; rel="next"'}
+                        if page < 3
+                        else {}
+                    ),
+                )
+            m.get(
+                members_url,
+                complete_qs=True,
+                json={"members": [{"user_id": "0"}]},
+                headers={"Link": f'<{members_url}?page=1>; rel="next"'},
+            )
+
+            # pages are requested only when they are needed
+            for member in nrps.iter_members():
+                if member["user_id"] == "1":
+                    break
+            self.assertEqual(
+                [r.url for r in m.request_history if r.method == "GET"],
+                [members_url, members_url + "?page=1"],
+            )
+
+            members = nrps.get_members()
+            # background thread doesn't use the connector bound to the current request
+            with patch.object(
+                ServiceConnector,
+                "copy_for_background",
+                autospec=True,
+                side_effect=ServiceConnector.copy_for_background,
+            ) as copy_for_background:
+                prefetched_members = nrps.get_members(prefetch=2)
+            copy_for_background.assert_called_once()
+        self.assertEqual([m["user_id"] for m in members], ["0", "1", "2", "3"])
+        self.assertEqual(members, prefetched_members)
+
+    def test_iter_members_invalid_response(self):
+        members_url = "http://canvas.docker/api/lti/courses/1/names_and_roles"
+        registration = get_test_tool_conf().find_registration(
+            "https://canvas.instructure.com"
+        )
+        nrps = NamesRolesProvisioningService(
+            ServiceConnector(registration),
+            {"context_memberships_url": members_url},
+        )
+        with requests_mock.Mocker() as m:
+            m.post(
+                self._get_auth_token_url(),
+                text=json.dumps(self._get_auth_token_response()),
+            )
+            m.get(members_url, text='{"members": [{"user_id": "1"}')
+            with self.assertRaisesRegex(
+                LtiException, "Unknown response type received for members"
+            ):
+                list(nrps.iter_members())
+
+    def test_iter_members_uses_overridden_page(self):
+        class FilteredNamesRolesProvisioningService(NamesRolesProvisioningService):
+            def get_members_page(self, members_url=None):
+                members, next_page_url = super().get_members_page(members_url)
+                return [m for m in members if m["status"] == "Active"], next_page_url
+
+        members_url = "http://canvas.docker/api/lti/courses/1/names_and_roles"
+        registration = get_test_tool_conf().find_registration(
+            "https://canvas.instructure.com"
+        )
+        nrps = FilteredNamesRolesProvisioningService(
+            ServiceConnector(registration),
+            {"context_memberships_url": members_url},
+        )
+        with requests_mock.Mocker() as m:
+            m.post(
+                self._get_auth_token_url(),
+                text=json.dumps(self._get_auth_token_response()),
+            )
+            m.get(
+                members_url,
+                json={
+                    "members": [
+                        {"user_id": "1", "status": "Active"},
+                        {"user_id": "2", "status": "Deleted"},
+                    ]
+                },
+            )
+            for prefetch in (0, 1):
+                self.assertEqual(
+                    [
+                        member["user_id"]
+                        for member in nrps.iter_members(prefetch=prefetch)
+                    ],
+                    ["1"],
+                )
@@ -0,0 +1,76 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from pylti1p3.pagination import PagePrefetcher, iter_pages
+
+
+class FakePages:
+    def __init__(self, pages_count, delay=0.0, fail_on=None):
+        self.pages_count = pages_count
+        self.delay = delay
+        self.fail_on = fail_on
+        self.requested = []
+        self.lock = threading.Lock()
+
+    def get_page(self, url):
+        page = int(url.split("=")[1])
+        with self.lock:
+            self.requested.append(page)
+        time.sleep(self.delay)
+        if page == self.fail_on:
+            raise ValueError("Page " + str(page) + " failed")
+        next_url = "page=" + str(page + 1) if page < self.pages_count else None
+        return [page * 10, page * 10 + 1], next_url
+
+
+class TestPagination(unittest.TestCase):
+    def test_pages_are_returned_in_order(self):
+        for prefetch in (0, 1, 3):
+            pages = FakePages(5)
+            self.assertEqual(
+                [
+                    item
+                    for page in iter_pages(pages.get_page, "page=1", prefetch)
+                    for item in page
+                ],
+                [10, 11, 20, 21, 30, 31, 40, 41, 50, 51],
+            )
+        self.assertEqual(list(iter_pages(FakePages(5).get_page, None, 2)), [])
+
+    def test_next_page_is_requested_while_current_is_processed(self):
+        pages = FakePages(6, delay=0.05)
+        start = time.monotonic()
+        for _ in iter_pages(pages.get_page, "page=1", prefetch=1):
+            time.sleep(0.05)
+        prefetched_time = time.monotonic() - start
+        # 6 requests + 6 processing steps would take 0.6s one by one
+        self.assertLess(prefetched_time, 0.5)
+
+    def test_read_ahead_depth_is_bounded(self):
+        pages = FakePages(10)
+        prefetcher = iter(PagePrefetcher(pages.get_page, "page=1", depth=2))
+        self.assertEqual(next(prefetcher), [10, 11])
+        time.sleep(0.1)
+        # consumer has taken page 1, so pages 2 and 3 may be received ahead
+        self.assertEqual(pages.requested, [1, 2, 3])
+        prefetcher.close()
+        time.sleep(0.1)
+        self.assertEqual(pages.requested, [1, 2, 3])
+
+    def test_error_is_raised_to_consumer(self):
+        pages = FakePages(5, fail_on=3)
+        received = []
+        with self.assertRaisesRegex(ValueError, "Page 3 failed"):
+            for page in iter_pages(pages.get_page, "page=1", prefetch=2):
+                received.append(page)
+        self.assertEqual(received, [[10, 11], [20, 21]])
+
+    def test_consumer_is_woken_up_on_base_exception(self):
+        def get_page(_url):
+            raise KeyboardInterrupt
+
+        prefetcher = PagePrefetcher(get_page, "page=1")
+        # thread dies with KeyboardInterrupt, the consumer gets an error instead of waiting forever
+        with patch("threading.excepthook"), self.assertRaises(RuntimeError):
+            list(prefetcher)
@@ -0,0 +1,48 @@
+import unittest
+from unittest.mock import patch
+from pylti1p3.jwt_verification import CryptographyJwtVerifier
+from pylti1p3.public_key_cache import PublicKeyCache
+
+
+class TestPublicKeyCache(unittest.TestCase):
+    key_set_url = "https://canvas.instructure.com/api/lti/security/jwks"
+    jwk = {
+        "kty": "RSA",
+        "e": "AQAB",
+        "n": "uX1MpfEMQCBUMcj0sBYI-iFaG5Nodp3C6OlN8uY60fa5zSBd83-iIL3n_qzZ8VCluuTLfB7rrV_tiX727XIEqQ",
+        "kid": "2018-06-18T22:33:20Z",
+    }
+
+    def test_key_is_parsed_once(self):
+        cache = PublicKeyCache()
+        with patch.object(
+            CryptographyJwtVerifier,
+            "load_public_key",
+            wraps=CryptographyJwtVerifier.load_public_key,
+        ) as load_public_key:
+            key1 = cache.get_public_key(self.key_set_url, self.jwk, "RS256")
+            key2 = cache.get_public_key(self.key_set_url, dict(self.jwk), "RS256")
+            self.assertIs(key1, key2)
+            self.assertEqual(load_public_key.call_count, 1)
+
+            # key material was rotated under the same kid
+            rotated_jwk = dict(self.jwk, n=self.jwk["n"][:-2] + "Aw")
+            key3 = cache.get_public_key(self.key_set_url, rotated_jwk, "RS256")
+            self.assertIsNot(key1, key3)
+            self.assertEqual(load_public_key.call_count, 2)
+
+    def test_cache_is_bounded(self):
+        cache = PublicKeyCache(max_size=2)
+        for i in range(3):
+            cache.get_public_key(self.key_set_url, dict(self.jwk, kid=str(i)), "RS256")
+        self.assertFalse(cache.has_public_key(self.key_set_url, "0", "RS256"))
+        self.assertTrue(cache.has_public_key(self.key_set_url, "1", "RS256"))
+        self.assertTrue(cache.has_public_key(self.key_set_url, "2", "RS256"))
+
+        cache.remove_key_set(self.key_set_url)
+        self.assertFalse(cache.has_public_key(self.key_set_url, "2", "RS256"))
+
+    def test_unsupported_algorithm(self):
+        cache = PublicKeyCache()
+        with self.assertRaisesRegex(ValueError, "Unsupported algorithm"):
+            cache.get_public_key(self.key_set_url, self.jwk, "XX256")
@@ -0,0 +1,95 @@
+import unittest
+from unittest.mock import patch
+import requests_mock
+from pylti1p3.access_token_store import MemoryAccessTokenStore
+from pylti1p3.exception import LtiRateLimitException
+from pylti1p3.rate_limiter import LaunchDataStorageRateLimiter, MemoryRateLimiter
+from pylti1p3.service_connector import ServiceConnector
+from .cache import FakeCacheDataStorage
+from .tool_config import get_test_tool_conf
+
+
+class TestRateLimiter(unittest.TestCase):
+    iss = "https://canvas.instructure.com"
+    client_id = "10000000000004"
+
+    def test_token_bucket(self):
+        rate_limiter = MemoryRateLimiter(rate=10, burst=2)
+        with patch("time.monotonic", return_value=1000.0) as monotonic:
+            delays = [rate_limiter.reserve(self.iss, self.client_id) for _ in range(4)]
+            self.assertEqual(delays[:2], [0, 0])
+            self.assertAlmostEqual(delays[2], 0.1)
+            self.assertAlmostEqual(delays[3], 0.2)
+
+            # other platforms have their own budget
+            self.assertEqual(rate_limiter.reserve("https://moodle.test", "1"), 0)
+
+            # bucket is refilled with time, but not over the burst size
+            monotonic.return_value = 1010.0
+            delays = [rate_limiter.reserve(self.iss, self.client_id) for _ in range(3)]
+            self.assertEqual(delays[:2], [0, 0])
+            self.assertAlmostEqual(delays[2], 0.1)
+
+    def test_platform_rate(self):
+        rate_limiter = MemoryRateLimiter(rate=10).set_rate(self.iss, rate=1, burst=1)
+        self.assertEqual(rate_limiter.get_rate(self.iss, self.client_id), (1, 1))
+        self.assertEqual(rate_limiter.get_rate("https://moodle.test", "1"), (10, 10))
+        with patch("time.monotonic", return_value=1000.0):
+            rate_limiter.reserve(self.iss, self.client_id)
+            self.assertAlmostEqual(rate_limiter.reserve(self.iss, self.client_id), 1)
+
+    def test_shared_budget(self):
+        data_storage = FakeCacheDataStorage()
+        # two workers with the same cache
+        workers = [
+            LaunchDataStorageRateLimiter(data_storage, rate=10, burst=1)
+            for _ in range(2)
+        ]
+        with patch("time.time", return_value=1000.0):
+            delays = [
+                workers[i % 2].reserve(self.iss, self.client_id) for i in range(4)
+            ]
+        self.assertEqual(delays[0], 0)
+        for i in range(1, 4):
+            self.assertAlmostEqual(delays[i], i * 0.1)
+
+    def test_shared_budget_window(self):
+        data_storage = FakeCacheDataStorage()
+        rate_limiter = LaunchDataStorageRateLimiter(data_storage, rate=10, burst=5)
+        with patch("time.time", return_value=1000.0), patch.object(
+            data_storage, "incr_value", wraps=data_storage.incr_value
+        ) as incr_value:
+            delays = [rate_limiter.reserve(self.iss, self.client_id) for _ in range(7)]
+            # one counter update per request plus one when the first window turns out to be full
+            self.assertEqual(incr_value.call_count, 8)
+        for i, delay in enumerate(delays):
+            self.assertAlmostEqual(delay, i * 0.1)
+
+    def test_rate_limit_exceeded(self):
+        rate_limiter = LaunchDataStorageRateLimiter(
+            FakeCacheDataStorage(), rate=10, burst=1, max_delay=1
+        )
+        with patch("time.time", return_value=1000.0):
+            for _ in range(11):
+                rate_limiter.reserve(self.iss, self.client_id)
+            with self.assertRaises(LtiRateLimitException):
+                rate_limiter.reserve(self.iss, self.client_id)
+
+    def test_service_requests_are_limited(self):
+        registration = get_test_tool_conf().find_registration(self.iss)
+        service_url = "http://canvas.docker/api/lti/courses/1/names_and_roles"
+        connector = ServiceConnector(registration).set_rate_limiter(
+            MemoryRateLimiter(rate=1, burst=1)
+        )
+        with patch.object(
+            ServiceConnector, "_access_token_store", MemoryAccessTokenStore()
+        ), patch("time.sleep") as sleep, requests_mock.Mocker() as m:
+            m.post(
+                "http://canvas.docker/login/oauth2/token",
+                json={"access_token": "token1"},
+            )
+            m.get(service_url, json={"members": []})
+            for _ in range(2):
+                connector.make_service_request(["scope"], service_url)
+        self.assertEqual(sleep.call_count, 1)
+        self.assertAlmostEqual(sleep.call_args[0][0], 1, delta=0.1)
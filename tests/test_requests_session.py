@@ -0,0 +1,70 @@
+import unittest
+from unittest.mock import patch
+import requests
+import requests_mock
+from requests.adapters import HTTPAdapter
+from pylti1p3.key_set_fetcher import KeySetFetcher
+from pylti1p3.requests_session import RequestsSessionRegistry
+from pylti1p3.service_connector import ServiceConnector
+from .tool_config import get_test_tool_conf
+
+
+class TestRequestsSessionRegistry(unittest.TestCase):
+    def test_session_per_host(self):
+        registry = RequestsSessionRegistry()
+        self.addCleanup(registry.close)
+        session = registry.get_session("https://canvas.instructure.com/api/lti/jwks")
+        self.assertIs(
+            registry.get_session("https://CANVAS.instructure.com/login/oauth2/token"),
+            session,
+        )
+        self.assertIsNot(registry.get_session("https://moodle.test/jwks"), session)
+        self.assertIsNot(
+            registry.get_session("http://canvas.instructure.com/api/lti/jwks"), session
+        )
+        self.assertEqual(session.headers["User-Agent"], "PyLTI1p3-client")
+
+    def test_pool_options_and_timeout(self):
+        registry = RequestsSessionRegistry(pool_maxsize=3, pool_block=True, timeout=7)
+        self.addCleanup(registry.close)
+        session = registry.get_session("https://canvas.instructure.com")
+        adapter = session.get_adapter("https://canvas.instructure.com/jwks")
+        self.assertEqual(adapter.poolmanager.connection_pool_kw["maxsize"], 3)
+        self.assertTrue(adapter.poolmanager.connection_pool_kw["block"])
+
+        request = requests.Request("GET", "https://canvas.instructure.com/jwks")
+        with patch.object(HTTPAdapter, "send") as send:
+            adapter.send(request.prepare(), timeout=None)
+            self.assertEqual(send.call_args[1]["timeout"], 7)
+            adapter.send(request.prepare(), timeout=1)
+            self.assertEqual(send.call_args[1]["timeout"], 1)
+
+    def test_cookies_are_not_shared(self):
+        registry = RequestsSessionRegistry()
+        self.addCleanup(registry.close)
+        url = "https://canvas.instructure.com/jwks"
+        with requests_mock.Mocker() as m:
+            m.get(url, json={}, headers={"Set-Cookie": "session=user1"})
+            registry.get_session(url).get(url)
+        self.assertEqual(len(registry.get_session(url).cookies), 0)
+
+    def test_registry_is_used_by_default(self):
+        registry = RequestsSessionRegistry()
+        self.addCleanup(registry.close)
+        registration = get_test_tool_conf().find_registration(
+            "https://canvas.instructure.com"
+        )
+        url = "http://canvas.docker/api/lti/courses/1/names_and_roles"
+        connector = ServiceConnector(registration).set_requests_session_registry(
+            registry
+        )
+        self.assertIs(connector.get_requests_session(url), registry.get_session(url))
+
+        fetcher = KeySetFetcher().set_requests_session_registry(registry)
+        self.assertIs(fetcher.get_requests_session(url), registry.get_session(url))
+
+        # explicitly passed session has the priority
+        session = registry.create_session()
+        self.assertIs(
+            ServiceConnector(registration, session).get_requests_session(url), session
+        )
@@ -0,0 +1,148 @@
+import time
+import unittest
+from email.utils import formatdate
+from unittest.mock import patch
+import requests
+import requests_mock
+from pylti1p3.access_token_store import MemoryAccessTokenStore
+from pylti1p3.exception import LtiServiceException
+from pylti1p3.retry_policy import RetryPolicy
+from pylti1p3.service_connector import ServiceConnector
+from .tool_config import get_test_tool_conf
+
+
+class TestRetryPolicy(unittest.TestCase):
+    iss = "https://canvas.instructure.com"
+    auth_token_url = "http://canvas.docker/login/oauth2/token"
+    service_url = "http://canvas.docker/api/lti/courses/1/names_and_roles"
+    scopes = [
+        "https://purl.imsglobal.org/spec/lti-nrps/scope/contextmembership.readonly"
+    ]
+
+    def setUp(self):
+        patcher = patch.object(
+            ServiceConnector, "_access_token_store", MemoryAccessTokenStore()
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        sleep_patcher = patch("time.sleep")
+        self.sleep = sleep_patcher.start()
+        self.addCleanup(sleep_patcher.stop)
+        self.registration = get_test_tool_conf().find_registration(self.iss)
+
+    def _get_connector(self, retry_policy):
+        return ServiceConnector(self.registration).set_retry_policy(retry_policy)
+
+    def test_get_is_retried(self):
+        retry_policy = RetryPolicy(max_retries=3, backoff_factor=0.5)
+        with requests_mock.Mocker() as m:
+            m.post(self.auth_token_url, json={"access_token": "token1"})
+            m.get(
+                self.service_url,
+                [
+                    {"status_code": 503, "text": "Unavailable"},
+                    {"status_code": 429, "headers": {"Retry-After": "7"}},
+                    {"json": {"members": []}},
+                ],
+            )
+            resp = self._get_connector(retry_policy).make_service_request(
+                self.scopes, self.service_url
+            )
+        self.assertEqual(resp["body"], {"members": []})
+        delays = [c[0][0] for c in self.sleep.call_args_list]
+        self.assertEqual(len(delays), 2)
+        self.assertTrue(0 <= delays[0] <= 0.5)
+        self.assertEqual(delays[1], 7)
+        self.assertEqual(
+            retry_policy.get_stats(),
+            {"retries": 2, "retries_by_reason": {"503": 1, "429": 1}, "gave_up": 0},
+        )
+
+    def test_failed_streamed_response_is_closed(self):
+        with requests_mock.Mocker() as m, patch.object(
+            requests.Response, "close", autospec=True
+        ) as close:
+            m.post(self.auth_token_url, json={"access_token": "token1"})
+            m.get(
+                self.service_url,
+                [
+                    {"status_code": 503, "text": "Unavailable"},
+                    {"status_code": 401, "json": {"error": "invalid_token"}},
+                    {"json": {"members": []}},
+                ],
+            )
+            resp = self._get_connector(RetryPolicy()).make_streaming_service_request(
+                self.scopes, self.service_url, items_key="members"
+            )
+            # both failed responses are closed before the request is sent again
+            self.assertEqual(close.call_count, 2)
+            self.assertEqual(list(resp["items"]), [])
+
+    def test_retries_are_limited(self):
+        retry_policy = RetryPolicy(max_retries=2)
+        with requests_mock.Mocker() as m:
+            m.post(self.auth_token_url, json={"access_token": "token1"})
+            m.get(self.service_url, status_code=502)
+            with self.assertRaises(LtiServiceException):
+                self._get_connector(retry_policy).make_service_request(
+                    self.scopes, self.service_url
+                )
+            self.assertEqual(m.call_count, 4)
+        self.assertEqual(retry_policy.get_stats()["gave_up"], 1)
+
+        # other errors aren't retried at all
+        with requests_mock.Mocker() as m:
+            m.post(self.auth_token_url, json={"access_token": "token1"})
+            m.get(self.service_url, status_code=404)
+            with self.assertRaises(LtiServiceException):
+                self._get_connector(retry_policy).make_service_request(
+                    self.scopes, self.service_url
+                )
+            self.assertEqual(m.call_count, 1)
+
+    def test_post_retries_are_opt_in(self):
+        with requests_mock.Mocker() as m:
+            m.post(self.auth_token_url, json={"access_token": "token1"})
+            m.post(self.service_url, [{"status_code": 503}, {"json": {}}])
+            with self.assertRaises(LtiServiceException):
+                self._get_connector(RetryPolicy()).make_service_request(
+                    self.scopes, self.service_url, is_post=True, data="{}"
+                )
+
+        with requests_mock.Mocker() as m:
+            m.post(self.auth_token_url, json={"access_token": "token1"})
+            m.post(self.service_url, [{"status_code": 503}, {"json": {}}])
+            resp = self._get_connector(
+                RetryPolicy(retry_post=True)
+            ).make_service_request(
+                self.scopes, self.service_url, is_post=True, data="{}"
+            )
+            self.assertEqual(resp["body"], {})
+
+    def test_connection_error_is_retried(self):
+        retry_policy = RetryPolicy()
+        with requests_mock.Mocker() as m:
+            m.post(self.auth_token_url, json={"access_token": "token1"})
+            m.get(
+                self.service_url,
+                [{"exc": requests.ConnectionError}, {"json": {"members": []}}],
+            )
+            self._get_connector(retry_policy).make_service_request(
+                self.scopes, self.service_url
+            )
+        self.assertEqual(
+            retry_policy.get_stats()["retries_by_reason"], {"connection_error": 1}
+        )
+
+    def test_retry_after(self):
+        retry_policy = RetryPolicy(max_retry_after=60)
+        self.assertEqual(retry_policy.get_retry_delay(0, False, 503, "10"), 10)
+        self.assertAlmostEqual(
+            retry_policy.get_retry_delay(0, False, 503, formatdate(time.time() + 30)),
+            30,
+            delta=2,
+        )
+        # platform asks to wait for too long
+        self.assertIsNone(retry_policy.get_retry_delay(0, False, 503, "3600"))
+        # unparseable value: backoff is used
+        self.assertIsNotNone(retry_policy.get_retry_delay(0, False, 503, "soon"))
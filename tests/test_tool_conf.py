@@ -33,3 +33,19 @@ class TestToolConf(TestServicesBase):
             "https://canvas.instructure.com", client_id="10000000000004"
         )
         self.assertEqual(jwks, expected_jwks)
+
+    def test_signing_keys_are_parsed_once(self):
+        tc = get_test_tool_conf()
+        reg1 = tc.find_registration("https://canvas.instructure.com")
+        reg2 = tc.find_registration("https://canvas.instructure.com")
+
+        # every lookup builds new registration, but they share the same loaded key
+        signing_key = reg1.get_tool_signing_key()
+        self.assertIsNotNone(signing_key)
+        self.assertIs(reg2.get_tool_signing_key(), signing_key)
+        self.assertEqual(reg1.get_kid(), "NtQYzsKs_TWLQ0p3bLmfM7fOwY0nEBVVH3z3Q-zJ06Y")
+
+        # returned JWK may be changed without affecting the cached one
+        jwk = reg1.get_jwks()[0]
+        jwk["kid"] = "changed"
+        self.assertEqual(reg2.get_kid(), "NtQYzsKs_TWLQ0p3bLmfM7fOwY0nEBVVH3z3Q-zJ06Y")
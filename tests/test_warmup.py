@@ -0,0 +1,90 @@
+import unittest
+from unittest.mock import patch
+import requests_mock
+from pylti1p3.message_launch import MessageLaunch
+from pylti1p3.public_key_cache import PublicKeyCache
+from pylti1p3.tool_config import ToolConfDict
+from pylti1p3.warmup import format_warmup_results, warmup
+from .cache import FakeCacheDataStorage
+from .request import FakeRequest
+from .tool_config import TOOL_CONFIG, get_test_tool_conf
+
+
+class TestWarmup(unittest.TestCase):
+    def setUp(self):
+        patcher = patch.object(
+            MessageLaunch, "_parsed_public_key_cache", PublicKeyCache()
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_find_registrations(self):
+        tool_conf = get_test_tool_conf(tool_conf_extended=True)
+        registrations = tool_conf.find_registrations()
+        self.assertEqual(
+            sorted(r.get_client_id() for r in registrations),
+            ["10000000000000", "10000000000004", "pytest12345"],
+        )
+
+    def test_warmup(self):
+        tool_conf = get_test_tool_conf()
+        jwks = tool_conf.get_jwks()
+        jwks["keys"][0]["kid"] = "test-kid"
+        storage = FakeCacheDataStorage()
+
+        with requests_mock.Mocker() as m:
+            m.get(
+                TOOL_CONFIG["https://canvas.instructure.com"]["key_set_url"], json=jwks
+            )
+            m.get(
+                TOOL_CONFIG["http://imsglobal.org"]["key_set_url"],
+                status_code=500,
+                text="error",
+            )
+            results = warmup(tool_conf, data_storage=storage)
+
+        results = {r["issuer"]: r for r in results}
+        canvas = results["https://canvas.instructure.com"]
+        self.assertIsNone(canvas["error"])
+        self.assertEqual(canvas["keys"], 1)
+        self.assertTrue(
+            MessageLaunch.get_parsed_public_key_cache().has_public_key(
+                canvas["key_set_url"], "test-kid", "RS256"
+            )
+        )
+        self.assertIsNotNone(results["http://imsglobal.org"]["error"])
+        self.assertIn("ERROR", format_warmup_results(list(results.values())))
+
+    def test_launch_uses_key_set_from_warmup(self):
+        # pylint: disable=import-outside-toplevel
+        from pylti1p3.contrib.django import DjangoMessageLaunch
+
+        tool_conf = get_test_tool_conf()
+        key_set_url = TOOL_CONFIG["https://canvas.instructure.com"]["key_set_url"]
+        storage = FakeCacheDataStorage()
+        with requests_mock.Mocker() as m:
+            m.get(key_set_url, json=tool_conf.get_jwks())
+            m.get(TOOL_CONFIG["http://imsglobal.org"]["key_set_url"], json={"keys": []})
+            warmup(tool_conf, data_storage=storage, cache_lifetime=7200)
+
+        message_launch = DjangoMessageLaunch(FakeRequest(), tool_conf)
+        message_launch.set_public_key_caching(storage, cache_lifetime=7200)
+        with requests_mock.Mocker() as m:
+            self.assertEqual(
+                message_launch.fetch_public_key(key_set_url), tool_conf.get_jwks()
+            )
+            self.assertEqual(m.call_count, 0)
+
+    def test_warmup_configured_key_set(self):
+        jwks = get_test_tool_conf().get_jwks()
+        tool_conf = ToolConfDict(
+            {
+                "https://canvas.instructure.com": dict(
+                    TOOL_CONFIG["https://canvas.instructure.com"], key_set=jwks
+                )
+            }
+        )
+        with requests_mock.Mocker():
+            results = warmup(tool_conf)
+        self.assertEqual(results[0]["keys"], 1)
+        self.assertIsNone(results[0]["error"])